@@ -1,106 +1,866 @@
-from dash import Dash, html, dcc, callback, Input, Output, State, ALL, MATCH
+from utils import startup_profile
+from dash import Dash, html, dcc, callback, clientside_callback, no_update, Input, Output, State, MATCH, Patch
 from dash.exceptions import PreventUpdate
 from dash import callback_context as ctx
+from flask import Response, abort, g, jsonify, request, stream_with_context
 import dash_bootstrap_components as dbc
 import uuid
-from threading import Thread
-import webview
-from components.reminderAIO import ReminderAIO
+from threading import Event, Thread
+from components.reminderAIO import ReminderAIO, reminder_types
 from components.app_header import render_appheader
 from components import ids
+from utils.log_analytics import LogAnalyzer
+from utils.log_config import configure_logging, lazy
+from utils.metrics import DriftAlert, Metrics
+from utils.notifications import (
+    DesktopSink,
+    FileSink,
+    ModalSink,
+    NotificationDispatcher,
+    WebhookSink,
+)
+from utils.reminder_db import ReminderDatabase
+from utils.recurrence import SUNDAY, expand
+from utils.reminder_io import FORMATS, read_reminder_ids, read_reminders, write_reminders
+from utils.reminder_store import Reminder, ReminderStore
+from utils.scheduler_ipc import (
+    SchedulerClient,
+    SchedulerUnavailable,
+    parse_fire_time,
+    reminder_from_wire,
+    reminder_to_wire,
+)
+from utils.run_times import RunTimeExecutor, current_run_time
+from utils.timezones import WallClockTrigger, available_zones, validate_zone
+from utils.trigger_events import TriggerEventQueue
 import time
 from datetime import datetime, timedelta
 import logging
+from apscheduler.events import (
+    EVENT_JOB_ERROR,
+    EVENT_JOB_EXECUTED,
+    EVENT_JOB_MISSED,
+    EVENT_JOB_REMOVED,
+    EVENT_JOB_SUBMITTED,
+)
+from apscheduler.jobstores.base import JobLookupError
 from apscheduler.schedulers.background import BackgroundScheduler
-from apscheduler.triggers.cron import CronTrigger
-from apscheduler.triggers.interval import IntervalTrigger
 from apscheduler.triggers.date import DateTrigger
+import argparse
+import atexit
+import heapq
+import io
 import os
+import tempfile
+from bisect import bisect_left, bisect_right
+from collections import Counter
+from contextlib import contextmanager
+from functools import lru_cache
+from itertools import islice
+
+startup_profile.mark("imports")
 
 log_dir = r"Log"
-if not os.path.exists(log_dir):
-    os.makedirs(log_dir)
-log_handler = logging.FileHandler(
-    filename=os.path.join(log_dir, "Neuron.log"), encoding="utf-8"
+# Every process of a split deployment, web workers and scheduler daemons
+# alike, appends to the same Neuron.log, so none of them rotates it
+SHARED_LOG = bool(
+    os.environ.get("NEURON_SCHEDULER_SOCKET") or os.environ.get("NEURON_SCHEDULER_DAEMON")
+)
+log_listener = configure_logging(
+    log_dir,
+    level=os.environ.get("NEURON_LOG_LEVEL", "INFO"),
+    json_lines=os.environ.get("NEURON_LOG_JSON") == "1",
+    rotate=not SHARED_LOG,
+)
+startup_profile.mark("logging")
+
+data_dir = r"Data"
+if not os.path.exists(data_dir):
+    os.makedirs(data_dir)
+
+# Reminders missed while the app was down are fired once on startup if the
+# miss is recent enough, otherwise they are only logged.
+CATCH_UP_GRACE_PERIOD = timedelta(hours=1)
+
+SCHEDULER_JOB_DEFAULTS = {"coalesce": True, "misfire_grace_time": 60}
+
+
+def create_scheduler(backend=None):
+    """Build the scheduler backend named by NEURON_SCHEDULER.
+
+    "apscheduler" (the default) runs one APScheduler job per reminder;
+    "buckets" groups reminders by fire time and delivers each group with
+    trigger_reminders.
+    """
+    backend = backend or os.environ.get("NEURON_SCHEDULER", "apscheduler")
+    if backend == "buckets":
+        from utils.bucket_scheduler import BucketScheduler
+
+        return BucketScheduler(
+            batch_handlers={trigger_reminder: trigger_reminders},
+            job_defaults=SCHEDULER_JOB_DEFAULTS,
+        )
+    return BackgroundScheduler(
+        executors={"default": RunTimeExecutor()}, job_defaults=SCHEDULER_JOB_DEFAULTS
+    )
+
+
+reminder_store = ReminderStore()
+reminder_db = ReminderDatabase(os.path.join(data_dir, "Neuron.db"))
+trigger_events = TriggerEventQueue()
+metrics = Metrics()
+# Alert when reminders fire more than this many seconds after they are due
+DRIFT_ALERT_SECONDS = float(os.environ.get("NEURON_DRIFT_ALERT_SECONDS", 5))
+drift_alert = DriftAlert(DRIFT_ALERT_SECONDS)
+# Triggers fan out to the browser modal and the optional sinks configured by
+# NEURON_NOTIFY_FILE, NEURON_NOTIFY_WEBHOOK_URL and NEURON_NOTIFY_DESKTOP
+notifications = NotificationDispatcher(metrics)
+atexit.register(notifications.stop, 5)
+log_analyzer = LogAnalyzer(
+    os.path.join(log_dir, "Neuron.log"), os.path.join(data_dir, "log_history.json")
 )
-log_format = "%(asctime)s: %(levelname)s: %(message)s"
-logging.basicConfig(handlers=[log_handler], level=logging.DEBUG, format=log_format)
-scheduler = BackgroundScheduler()
+
+# Split deployment: when set, a scheduler_daemon.py process owns the jobs and
+# this process only serves the web UI, e.g. as one of several WSGI workers
+SCHEDULER_SOCKET = os.environ.get("NEURON_SCHEDULER_SOCKET")
+scheduler_client = SchedulerClient(SCHEDULER_SOCKET) if SCHEDULER_SOCKET else None
+startup_profile.mark("database and stores")
 
 app = Dash(__name__, external_stylesheets=[dbc.themes.SIMPLEX])
 server = app.server
+startup_profile.mark("dash app")
 
+# Fallback poll for clients that cannot hold the /reminder-events stream open
+REMINDER_POLL_INTERVAL_MS = 5000
 
-def schedule_reminder(
-    reminder_message, reminder_id, reminder_time, reminder_type, n_days=None
-):
-    """Schedule a reminder based on the reminder type."""
+
+@server.before_request
+def start_callback_timer():
+    if request.path.endswith("/_dash-update-component"):
+        g.callback_started = time.perf_counter()
+
+
+@server.after_request
+def record_callback_metrics(response):
+    """Time every server-side Dash callback, labelled by its function name."""
+    started = g.pop("callback_started", None)
+    if started is not None:
+        output = (request.get_json(silent=True) or {}).get("output")
+        callback = app.callback_map.get(output, {}).get("callback")
+        metrics.record_callback(
+            getattr(callback, "__name__", "unknown"),
+            time.perf_counter() - started,
+            request.content_length or 0,
+            response.content_length or 0,
+            response.status_code >= 500,
+        )
+    return response
+
+
+@server.errorhandler(SchedulerUnavailable)
+def scheduler_unavailable(ex):
+    return jsonify({"error": str(ex)}), 503
+
+
+@server.route("/metrics")
+def metrics_endpoint():
+    """Callback and scheduler metrics in the Prometheus text format."""
+    gauges = {
+        "neuron_reminders": (len(reminder_store), "Reminders in the reminder store."),
+        "neuron_scheduled_jobs": (len(scheduler.get_jobs()), "Jobs held by the scheduler."),
+        "neuron_scheduler_backlog": (
+            scheduler_backlog() or 0,
+            "Jobs waiting for a scheduler thread.",
+        ),
+        "neuron_trigger_drift_alerts": (
+            drift_alert.raised,
+            f"Times fire drift went over {DRIFT_ALERT_SECONDS}s.",
+        ),
+        "neuron_notification_queue_depth": (
+            {f'sink="{sink}"': depth for sink, depth in notifications.queue_depths().items()},
+            "Trigger batches waiting for each notification sink.",
+        ),
+    }
+    return Response(metrics.render(gauges), mimetype="text/plain; version=0.0.4")
+
+
+@server.route("/reminder-events")
+def reminder_events():
+    """Server-sent event stream of triggered reminders."""
+    cursor = request.headers.get("Last-Event-ID") or request.args.get("cursor")
+    try:
+        cursor = int(cursor) if cursor else trigger_events.last_seq
+    except ValueError:
+        # Not a cursor this server handed out, so start from the newest event
+        cursor = trigger_events.last_seq
+    return Response(
+        stream_with_context(trigger_events.stream(cursor)),
+        mimetype="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@lru_cache(maxsize=None)
+def shared_trigger(kind, value, time_of_day, zone):
+    """Calendar rules are stateless, so reminders with the same rule share one."""
+    return WallClockTrigger(kind, value, time_of_day, zone, memoize=True)
+
+
+def build_trigger(reminder_time, reminder_type, n_days=None, zone=None):
+    """Build the trigger for a reminder type, on the wall clock of `zone`.
+
+    Raises ValueError for a "Once in every" step that is not a positive
+    whole number of days.
+    """
     trigger = None
+    day, time_of_day = reminder_time.date(), reminder_time.time()
 
     if reminder_type == "Once only":
-        trigger = DateTrigger(run_date=reminder_time)
+        trigger = WallClockTrigger("once", day, time_of_day, zone)
     elif reminder_type == "Daily":
-        trigger = IntervalTrigger(days=1, start_date=reminder_time)
+        trigger = WallClockTrigger("step", (day, 1), time_of_day, zone)
     elif reminder_type == "Every Week":
-        trigger = CronTrigger(
-            day_of_week="sun", hour=reminder_time.hour, minute=reminder_time.minute
-        )
+        trigger = shared_trigger("weekday", SUNDAY, time_of_day, zone)
     elif reminder_type == "Every Month":
-        trigger = CronTrigger(
-            day=reminder_time.day, hour=reminder_time.hour, minute=reminder_time.minute
-        )
+        trigger = shared_trigger("day", day.day, time_of_day, zone)
     elif reminder_type == "Every Year":
-        trigger = CronTrigger(
-            month=reminder_time.month,
-            day=reminder_time.day,
-            hour=reminder_time.hour,
-            minute=reminder_time.minute,
-        )
+        trigger = shared_trigger("month_day", (day.month, day.day), time_of_day, zone)
     elif reminder_type == "Once in every" and n_days:
-        trigger = IntervalTrigger(days=n_days, start_date=reminder_time)
+        if n_days < 1 or n_days != int(n_days):
+            raise ValueError(f"n_days must be a positive whole number, not {n_days!r}")
+        trigger = WallClockTrigger("step", (day, int(n_days)), time_of_day, zone)
+    return trigger
+
 
+def schedule_reminder(
+    reminder_id,
+    trigger,
+    reminder_time,
+    reminder_type,
+    replace_existing=False,
+):
+    """Schedule a reminder on the trigger `build_trigger` gave its type."""
     if trigger is not None:
-        scheduler.add_job(
+        job = scheduler.add_job(
             func=trigger_reminder,
             trigger=trigger,
-            args=[reminder_message, reminder_id, reminder_time, reminder_type],
+            args=[reminder_id],
             id=reminder_id,
+            replace_existing=replace_existing,
         )
+        if scheduler.running:
+            next_run_time = job.next_run_time
+        else:
+            next_run_time = trigger.get_next_fire_time(None, datetime.now().astimezone())
+        reminder_store.set_next_fire_time(reminder_id, to_local_naive(next_run_time))
 
-        print(scheduler.get_jobs())
+        logging.debug("Jobs after scheduling: %s", lazy(scheduler.get_jobs))
         logging.info(
             f"Scheduled reminder {reminder_id} at {reminder_time} with type {reminder_type}"
         )
         return reminder_id
 
 
-reminder_status = None
+def to_local_naive(value):
+    """Convert an APScheduler fire time to the naive local time used by the app."""
+    return None if value is None else value.astimezone().replace(tzinfo=None)
+
+
+def update_next_fire_time(event):
+    """Keep the reminder store's fire time index in step with the scheduler.
+
+    A fast job can finish before APScheduler stores the job's next run
+    time, so a run time that is not past the finished run is recomputed.
+    """
+    job = scheduler.get_job(event.job_id)
+    next_run_time = job.next_run_time if job else None
+    scheduled = getattr(event, "scheduled_run_time", None)
+    if next_run_time is not None and scheduled is not None and next_run_time <= scheduled:
+        next_run_time = job.trigger.get_next_fire_time(scheduled, datetime.now().astimezone())
+    reminder_store.set_next_fire_time(event.job_id, to_local_naive(next_run_time))
+
+
+JOB_EVENT_NAMES = {
+    EVENT_JOB_EXECUTED: "executed",
+    EVENT_JOB_MISSED: "missed",
+    EVENT_JOB_ERROR: "error",
+}
+
+
+def record_job_metrics(event):
+    if event.code == EVENT_JOB_SUBMITTED:
+        fire_delay = datetime.now().astimezone() - event.scheduled_run_times[0]
+        metrics.record_job_event("submitted", fire_delay.total_seconds())
+    else:
+        metrics.record_job_event(JOB_EVENT_NAMES[event.code])
+
+
+def register_scheduler_listeners():
+    scheduler.add_listener(
+        update_next_fire_time,
+        EVENT_JOB_EXECUTED | EVENT_JOB_ERROR | EVENT_JOB_MISSED | EVENT_JOB_REMOVED,
+    )
+    scheduler.add_listener(
+        record_job_metrics,
+        EVENT_JOB_SUBMITTED | EVENT_JOB_EXECUTED | EVENT_JOB_ERROR | EVENT_JOB_MISSED,
+    )
+
+
+
+def first_fire_between(trigger, start, end):
+    """Return the trigger's first fire time in the (start, end] window, if any."""
+    fire_time = trigger.get_next_fire_time(None, start + timedelta(seconds=1))
+    if fire_time is not None and start < fire_time <= end:
+        return fire_time
+    return None
 
 
-def trigger_reminder(reminder_message, reminder_id, reminder_time, reminder_type):
-    """Function to trigger a reminder (e.g., show modal)."""
-    msg = f"""Reminder {reminder_id} with message {reminder_message} and
-            type {reminder_type} triggered at {datetime.now()}"""
-    logging.info(msg)
-    global reminder_status
-    reminder_status = (reminder_id, f"{reminder_message} scheduled at {reminder_time} is triggered")
-    return reminder_message, reminder_type, reminder_time
+def rehydrate_reminders():
+    """Load persisted reminders and queue their jobs before the scheduler starts.
+
+    Jobs added before `scheduler.start()` are held as pending and registered
+    in one pass when the scheduler starts, so this stays linear in the number
+    of reminders. A reminder that cannot be scheduled is logged and skipped
+    rather than stopping the others.
+    """
+    started = time.perf_counter()
+    loaded = reminder_db.load_all()
+    reminder_store.bulk_load([reminder for reminder, _ in loaded])
+
+    now = datetime.now().astimezone()
+    outcomes = Counter()
+    for reminder, last_fired_at in loaded:
+        try:
+            outcomes[rehydrate_reminder(reminder, last_fired_at, now)] += 1
+        except Exception:
+            logging.exception(f"Skipping reminder {reminder.reminder_id}, it cannot be scheduled")
+            reminder_store.set_next_fire_time(reminder.reminder_id, None)
+            outcomes["skipped"] += 1
+
+    logging.info(
+        f"Rehydrated {len(loaded)} reminders in {time.perf_counter() - started:.3f}s "
+        f"({outcomes['caught up']} caught up, {outcomes['missed']} missed, "
+        f"{outcomes['skipped']} skipped)"
+    )
+
+
+def rehydrate_reminder(reminder, last_fired_at, now):
+    """Queue one persisted reminder's jobs; return "caught up", "missed" or None."""
+    trigger = build_trigger(
+        reminder.reminder_datetime, reminder.reminder_type, reminder.n_days, reminder.zone
+    )
+    if trigger is None:
+        return None
+
+    outcome = None
+    since = last_fired_at.astimezone()
+    catch_up_since = max(since, now - CATCH_UP_GRACE_PERIOD)
+    if due := first_fire_between(trigger, catch_up_since, now):
+        # A separate one-shot job, so the recurrence keeps its alignment
+        scheduler.add_job(
+            func=trigger_reminder,
+            trigger=DateTrigger(run_date=now),
+            args=[reminder.reminder_id, to_local_naive(due)],
+            id=f"{reminder.reminder_id}:catch-up",
+            replace_existing=True,
+        )
+        outcome = "caught up"
+    elif missed_at := first_fire_between(trigger, since, now):
+        logging.info(f"Reminder {reminder.reminder_id} missed while offline")
+        reminder_db.record_trigger(reminder.reminder_id, reminder.message, missed_at)
+        outcome = "missed"
+    if reminder.reminder_type == "Once only" and trigger.get_next_fire_time(None, now) <= now:
+        # Already fired, caught up or missed; re-adding it would fire it again
+        return outcome
+
+    scheduler.add_job(
+        func=trigger_reminder,
+        trigger=trigger,
+        args=[reminder.reminder_id],
+        id=reminder.reminder_id,
+        replace_existing=True,
+    )
+    return outcome
+
 
+def trigger_reminder(reminder_id, reminder_time=None):
+    """Function to trigger a reminder (e.g., show modal).
 
-def create_reminder(reminder_id):
-    new_reminder = ReminderAIO(aio_id=reminder_id)
+    Jobs only carry the reminder id, the rest is read from the reminder
+    store. `reminder_time` is when a snooze or catch-up job was due; other
+    jobs are due at the run time the scheduler submitted them for.
+    """
+    return trigger_reminders([(reminder_id, reminder_time)], [current_run_time()])[0]
+
+
+def trigger_reminders(batch, run_times=None):
+    """Trigger a batch of reminders with one database write and one publish.
+
+    `batch` holds trigger_reminder argument lists and `run_times` the
+    scheduler's run time of each. The reminder's next fire time is no
+    substitute: a "Once only" job clears it when it is removed, which can
+    be before it runs. Returns a (message, type, time) tuple per entry, or
+    None for a reminder that was deleted before its job ran.
+    """
+    triggered_at = datetime.now()
+    fired = []
+    results = []
+    for args, run_time in zip(batch, run_times or [None] * len(batch)):
+        reminder = reminder_store.get(args[0])
+        if reminder is None:
+            logging.info(f"Reminder {args[0]} no longer exists, skipping trigger.")
+            results.append(None)
+            continue
+        overridden = args[1] if len(args) > 1 else None
+        reminder_time = overridden or reminder.reminder_datetime
+        due = overridden or to_local_naive(run_time) or reminder.next_fire_time
+        # utils/log_analytics.py parses this record, keep them in step
+        msg = f"""Reminder {reminder.reminder_id} with message {reminder.message} and
+            type {reminder.reminder_type} triggered at {triggered_at}, due {due}"""
+        logging.info(msg)
+        fired.append((reminder, reminder_time, due))
+        results.append((reminder.message, reminder.reminder_type, reminder_time))
+    trigger_ids = reminder_db.record_fired_many(
+        [(reminder.reminder_id, reminder.message) for reminder, _, _ in fired],
+        triggered_at,
+    )
+    fired_at = triggered_at.timestamp()
+    events = [
+        {
+            "trigger_id": trigger_id,
+            "reminder_id": reminder.reminder_id,
+            "message": f"{reminder.message} scheduled at {reminder_time} is triggered",
+            "triggered_at": triggered_at.isoformat(),
+            "timings": {"due": due.timestamp() if due else None, "fired": fired_at},
+        }
+        for trigger_id, (reminder, reminder_time, due) in zip(trigger_ids, fired)
+    ]
+    # Sinks deliver on their own threads, so a slow one never holds this
+    # scheduler thread or the reminders due after it
+    notifications.submit(events)
+    return results
+
+
+def publish_triggers(events):
+    """The modal sink: queue triggers for browsers and record their latency."""
+    enqueued_at = time.time()
+    events = [dict(event, timings=dict(event["timings"], enqueued=enqueued_at)) for event in events]
+    trigger_events.publish_many(events)
+    record_fire_latency(events)
+
+
+def configure_notifications():
+    """Register the modal sink and any sink the environment enables."""
+    notifications.add_sink(ModalSink(publish_triggers))
+    path = os.environ.get("NEURON_NOTIFY_FILE")
+    if path:
+        notifications.add_sink(FileSink(path))
+    url = os.environ.get("NEURON_NOTIFY_WEBHOOK_URL")
+    if url:
+        # Network calls are the slowest sink, so a few deliver at once
+        notifications.add_sink(WebhookSink(url), concurrency=4)
+    if os.environ.get("NEURON_NOTIFY_DESKTOP") == "1":
+        enable_desktop_notifications()
+
+
+def enable_desktop_notifications():
+    if DesktopSink.available():
+        notifications.add_sink(DesktopSink())
+    else:
+        logging.warning("Desktop notifications need notify-send or osascript, not enabled")
+
+
+def record_fire_latency(events, watch_drift=True):
+    """Record how late triggers fired and were queued, and watch the drift.
+
+    `timings` of a trigger event are epoch seconds: when the reminder was
+    due, when its job started and when the event was queued for browsers.
+    Drift over DRIFT_ALERT_SECONDS is logged once per episode, with the
+    scheduler's thread pool backlog, since a saturated pool is the usual
+    cause.
+    """
+    drifts = []
+    for event in events:
+        timings = event["timings"]
+        if timings["due"] is not None:
+            drifts.append(timings["fired"] - timings["due"])
+            metrics.record_trigger_latency("fire_drift", drifts[-1])
+        metrics.record_trigger_latency("enqueue", timings["enqueued"] - timings["fired"])
+    if not drifts or not watch_drift:
+        return
+    alert = drift_alert.observe(max(drifts))
+    if alert == "raised":
+        logging.warning(
+            f"Reminders are firing {max(drifts):.1f}s late, over the "
+            f"{drift_alert.threshold}s alert threshold; "
+            f"{scheduler_backlog()} jobs are waiting for a scheduler thread"
+        )
+    elif alert == "cleared":
+        logging.warning(
+            f"Reminders fire within {drift_alert.threshold / 2}s of their due time again"
+        )
+
+
+def record_delivery_latency(events):
+    """Record when browsers received triggers, from the show_modal callback."""
+    acknowledged_at = time.time()
+    for event in events:
+        timings = event.get("timings")
+        if not timings:
+            continue
+        metrics.record_trigger_latency("delivery", acknowledged_at - timings["enqueued"])
+        if timings["due"] is not None:
+            metrics.record_trigger_latency("end_to_end", acknowledged_at - timings["due"])
+
+
+def scheduler_backlog():
+    """Jobs waiting in the scheduler's thread pool queue, if it can be read."""
+    if not scheduler.running:
+        return None
+    if isinstance(scheduler, BackgroundScheduler):
+        # APScheduler does not expose its pool, so this reads private state
+        pool = getattr(scheduler._lookup_executor("default"), "_pool", None)
+    else:
+        pool = getattr(scheduler, "_executor", None)
+    work_queue = getattr(pool, "_work_queue", None)
+    return work_queue.qsize() if work_queue is not None else None
+
+
+scheduler = create_scheduler()
+register_scheduler_listeners()
+configure_notifications()
+# Clear while startup rehydrates reminders in the background. Rehydration
+# works from a snapshot of the database, so edits wait for it: otherwise a
+# deleted reminder's job would come back and an edited one keep its old trigger.
+rehydrated = Event()
+rehydrated.set()
+
+
+def create_reminder_editor(reminder_id, reminder=None):
+    if reminder is None:
+        return ReminderAIO(
+            aio_id=reminder_id, zone_dropdown_properties={"options": available_zones()}
+        )
+    return ReminderAIO(
+        aio_id=reminder_id,
+        reminder_message_input_properties={"value": reminder.message},
+        reminder_type_dropdown_properties={"value": reminder.reminder_type},
+        reminder_datepicker_properties={
+            "date": reminder.reminder_datetime.date().isoformat()
+        },
+        reminder_time_input_properties={
+            "value": reminder.reminder_datetime.strftime("%H:%M")
+        },
+        n_days_input_properties={"value": reminder.n_days},
+        zone_dropdown_properties={"options": available_zones(), "value": reminder.zone},
+    )
+
+
+def create_reminder(reminder_id, reminder=None):
     return html.Div(
         [
-            html.Div(new_reminder, id=reminder_id),
+            html.Div(create_reminder_editor(reminder_id, reminder), id=reminder_id),
             html.Button("🗑️", id={"type": "delete-button", "index": reminder_id}),
-        ]
+        ],
+        id={"type": "reminder-row", "index": reminder_id},
+    )
+
+
+def describe_reminder(reminder):
+    repeat = f" {reminder.n_days} days" if reminder.reminder_type == "Once in every" else ""
+    next_fire_time = reminder.next_fire_time
+    zone = f" {reminder.zone}" if reminder.zone else ""
+    return (
+        f"{reminder.message} - {reminder.reminder_type}{repeat} from "
+        f"{reminder.reminder_datetime:%d %b %Y %H:%M}{zone}, next "
+        f"{f'{next_fire_time:%d %b %Y %H:%M}' if next_fire_time else 'never'}"
+    )
+
+
+def create_reminder_summary(reminder):
+    """A read-only row; open_reminder_editor swaps in the ReminderAIO on demand."""
+    reminder_id = reminder.reminder_id
+    return html.Div(
+        [
+            html.Div(
+                describe_reminder(reminder), id={"type": "reminder-editor", "index": reminder_id}
+            ),
+            html.Button("✏️", id={"type": "open-button", "index": reminder_id}),
+            html.Button("🗑️", id={"type": "delete-button", "index": reminder_id}),
+        ],
+        id={"type": "reminder-row", "index": reminder_id},
+    )
+
+
+@contextmanager
+def quiet_apscheduler_logging():
+    """APScheduler logs two lines per added job, which dominates bulk scheduling.
+
+    Callers log one summary line instead.
+    """
+    apscheduler_logger = logging.getLogger("apscheduler")
+    apscheduler_level = apscheduler_logger.level
+    apscheduler_logger.setLevel(logging.WARNING)
+    try:
+        yield
+    finally:
+        apscheduler_logger.setLevel(apscheduler_level)
+
+
+def start_scheduler(paused=False):
+    """Start the APScheduler in the background, or follow the scheduler daemon.
+
+    A `paused` scheduler computes every next fire time but runs no jobs.
+    Sets `rehydrated` when done, whether or not startup succeeded.
+    """
+    try:
+        if scheduler_client is not None:
+            Thread(target=follow_scheduler, name="SchedulerFeed", daemon=True).start()
+            return
+        started = time.perf_counter()
+        with quiet_apscheduler_logging():
+            rehydrate_reminders()
+            startup_profile.mark("rehydrate reminders")
+            scheduler.start(paused=paused)
+            reminder_store.set_next_fire_times(
+                {job.id: to_local_naive(job.next_run_time) for job in scheduler.get_jobs()}
+            )
+            startup_profile.mark("start scheduler")
+        logging.info(f"Scheduler ready in {time.perf_counter() - started:.3f}s")
+    finally:
+        rehydrated.set()
+
+
+def follow_scheduler():
+    """Mirror the daemon's reminders into this worker and relay its triggers."""
+    for message in scheduler_client.subscribe():
+        if "snapshot" in message:
+            if message["first"]:
+                reminder_store.clear()
+            reminder_store.bulk_load([reminder_from_wire(r) for r in message["snapshot"]])
+        elif "events" in message:
+            apply_scheduler_events(message["events"])
+
+
+def apply_scheduler_events(events):
+    triggers = []
+    for event in events:
+        kind = event.get("kind")
+        if kind == "upsert":
+            reminder_store.bulk_load([reminder_from_wire(r) for r in event["reminders"]])
+        elif kind == "remove":
+            for reminder_id in event["reminder_ids"]:
+                reminder_store.remove(reminder_id)
+        elif kind == "fire_times":
+            for reminder_id, next_fire_time in event["next_fire_times"].items():
+                reminder_store.set_next_fire_time(reminder_id, parse_fire_time(next_fire_time))
+        else:
+            triggers.append(event)
+    if triggers:
+        trigger_events.publish_many(triggers)
+        # Fired in the daemon, which also watches the drift, but /metrics is
+        # served here
+        record_fire_latency([t for t in triggers if "timings" in t], watch_drift=False)
+
+
+IMPORT_BATCH_SIZE = 1000
+IMPORT_MAX_REPORTED_ERRORS = 100
+EXPORT_CONTENT_TYPES = {
+    "csv": "text/csv",
+    "jsonl": "application/x-ndjson",
+    "ics": "text/calendar",
+}
+IMPORT_CONTENT_TYPES = {v: k for k, v in EXPORT_CONTENT_TYPES.items()}
+
+
+def schedule_reminders_bulk(reminders):
+    """Save and schedule a batch of reminders in one database transaction."""
+    rehydrated.wait()
+    if scheduler_client is not None:
+        scheduler_client.request(
+            "upsert_many", reminders=[reminder_to_wire(r) for r in reminders]
+        )
+        reminder_store.bulk_load(reminders)
+        return
+    now = datetime.now().astimezone()
+    with quiet_apscheduler_logging():
+        for reminder in reminders:
+            trigger = build_trigger(
+                reminder.reminder_datetime, reminder.reminder_type, reminder.n_days, reminder.zone
+            )
+            if trigger is None:
+                continue
+            reminder.next_fire_time = to_local_naive(
+                trigger.get_next_fire_time(None, now)
+            )
+            scheduler.add_job(
+                func=trigger_reminder,
+                trigger=trigger,
+                args=[reminder.reminder_id],
+                id=reminder.reminder_id,
+                replace_existing=True,
+            )
+    reminder_store.bulk_load(reminders)
+    reminder_db.upsert_many(reminders)
+
+
+def delete_reminders_bulk(reminder_ids):
+    rehydrated.wait()
+    if scheduler_client is not None:
+        reminder_ids = list(reminder_ids)
+        deleted = scheduler_client.request("remove_many", reminder_ids=reminder_ids)
+        for reminder_id in reminder_ids:
+            reminder_store.remove(reminder_id)
+        return deleted
+    deleted = []
+    with quiet_apscheduler_logging():
+        for reminder_id in reminder_ids:
+            if reminder_store.remove(reminder_id) is None:
+                continue
+            try:
+                scheduler.remove_job(reminder_id)
+            except JobLookupError:
+                pass
+            remove_overlay_jobs(reminder_id)
+            deleted.append(reminder_id)
+    reminder_db.delete_many(deleted)
+    return len(deleted)
+
+
+def import_reminders(lines, fmt):
+    """Stream, validate and schedule reminders in batches of IMPORT_BATCH_SIZE.
+
+    When records repeat a reminder id the last one wins, and the ones it
+    replaces are reported as rejected.
+    """
+    started = time.perf_counter()
+    errors = []
+    # Record number of each reminder id imported so far
+    records = {}
+    batch = {}
+    for number, reminder, error in read_reminders(lines, fmt):
+        if error is not None:
+            errors.append({"record": number, "error": error})
+            continue
+        replaced = records.get(reminder.reminder_id)
+        if replaced is not None:
+            errors.append({
+                "record": replaced,
+                "error": f"replaced by record {number} with the same reminder_id",
+            })
+            batch.pop(reminder.reminder_id, None)
+        records[reminder.reminder_id] = number
+        batch[reminder.reminder_id] = reminder
+        if len(batch) >= IMPORT_BATCH_SIZE:
+            schedule_reminders_bulk(list(batch.values()))
+            batch = {}
+    if batch:
+        schedule_reminders_bulk(list(batch.values()))
+    imported = len(records)
+
+    logging.info(
+        f"Imported {imported} reminders from {fmt} in "
+        f"{time.perf_counter() - started:.3f}s ({len(errors)} rejected)"
+    )
+    return {
+        "imported": imported,
+        "rejected": len(errors),
+        "errors": errors[:IMPORT_MAX_REPORTED_ERRORS],
+    }
+
+
+def request_format():
+    fmt = request.args.get("format") or IMPORT_CONTENT_TYPES.get(request.mimetype)
+    if fmt not in FORMATS:
+        abort(400, description=f"format must be one of {', '.join(FORMATS)}")
+    return fmt
+
+
+def request_lines():
+    """Decode the request body lazily instead of reading it all at once."""
+    return io.TextIOWrapper(
+        io.BufferedReader(request.stream), encoding="utf-8-sig", newline=""
+    )
+
+
+@server.route("/api/reminders", methods=["POST"])
+def import_reminders_api():
+    """Create or update reminders from a CSV, JSON lines or iCalendar body."""
+    fmt = request_format()
+    return jsonify(import_reminders(request_lines(), fmt))
+
+
+@server.route("/api/reminders/delete", methods=["POST"])
+def delete_reminders_api():
+    """Delete the reminders listed one id per line (or as JSON lines)."""
+    errors = []
+
+    def valid_ids():
+        for number, reminder_id, error in read_reminder_ids(request_lines()):
+            if error is not None:
+                errors.append({"record": number, "error": error})
+            else:
+                yield reminder_id
+
+    deleted = delete_reminders_bulk(valid_ids())
+    return jsonify({
+        "deleted": deleted,
+        "rejected": len(errors),
+        "errors": errors[:IMPORT_MAX_REPORTED_ERRORS],
+    })
+
+
+@server.route("/api/reminders", methods=["GET"])
+def export_reminders_api():
+    fmt = request_format()
+    return Response(
+        stream_with_context(write_reminders(iter(reminder_store), fmt)),
+        mimetype=EXPORT_CONTENT_TYPES[fmt],
     )
 
 
-def start_scheduler():
-    """Start the APScheduler in the background."""
-    scheduler.start()
+# Snooze choices in the reminder modal, in minutes
+DEFAULT_SNOOZE_MINUTES = 5
+# Custom snoozes are capped at a week
+MAX_SNOOZE_MINUTES = 7 * 24 * 60
+SNOOZE_OPTIONS = [("5 minutes", "5"), ("15 minutes", "15"), ("1 hour", "60"), ("Custom", "custom")]
+
+# Editor rows sent per page of search results
+EDITOR_PAGE_SIZE = 50
+# Short enough to search as you type, long enough to skip most keystrokes
+SEARCH_DEBOUNCE_MS = 150
+REMINDER_STATE_OPTIONS = [("Any state", "any"), ("Active", "active"), ("Inactive", "inactive")]
+
+reminder_search_bar = html.Div(
+    [
+        dbc.Input(
+            id=ids.REMINDER_SEARCH_INPUT,
+            type="search",
+            placeholder="Search reminders",
+            debounce=SEARCH_DEBOUNCE_MS,
+        ),
+        dcc.Dropdown(
+            id=ids.REMINDER_TYPE_FILTER,
+            options=[{"label": t, "value": t} for t in reminder_types],
+            placeholder="Any type",
+        ),
+        dcc.DatePickerRange(id=ids.REMINDER_DATE_FILTER, clearable=True),
+        dcc.Dropdown(
+            id=ids.REMINDER_STATE_FILTER,
+            options=[{"label": label, "value": value} for label, value in REMINDER_STATE_OPTIONS],
+            value="any",
+            clearable=False,
+        ),
+        html.Div(id=ids.REMINDER_SEARCH_SUMMARY),
+        dbc.Pagination(
+            id=ids.REMINDER_PAGINATION, max_value=1, active_page=1, fully_expanded=False
+        ),
+    ]
+)
 
+TAB_PAGE_SIZE = 50
+# Window sizes in hours; 0 means no limit
+TAB_WINDOW_OPTIONS = [("All", 0), ("24 hours", 24), ("7 days", 24 * 7), ("30 days", 24 * 30)]
 
 reminder_tabs = html.Div(
     [
@@ -110,8 +870,27 @@ reminder_tabs = html.Div(
             children=[
                 dcc.Tab(label="Upcoming Reminders", value="upcoming-reminders"),
                 dcc.Tab(label="Missed Reminders", value="missed-reminders"),
+                dcc.Tab(label="Agenda", value="agenda"),
+                dcc.Tab(label="History", value="history"),
             ],
         ),
+        html.Div(
+            [
+                dcc.Dropdown(
+                    id=ids.TAB_WINDOW_DROPDOWN,
+                    options=[
+                        {"label": label, "value": hours}
+                        for label, hours in TAB_WINDOW_OPTIONS
+                    ],
+                    value=TAB_WINDOW_OPTIONS[0][1],
+                    clearable=False,
+                ),
+                dbc.Pagination(
+                    id=ids.TAB_PAGINATION, max_value=1, active_page=1, fully_expanded=False
+                ),
+            ],
+            id=ids.TAB_CONTROLS,
+        ),
         html.Div(
             id=ids.TAB_CONTENT_CONTAINER,
             style={"pointer-events": "none", "cursor": "not-allowed"},
@@ -120,73 +899,177 @@ reminder_tabs = html.Div(
 )
 
 
-def get_upcoming_reminders(current_reminders):
+def get_missed_reminders(window_hours, page):
+    """Return the total count and one page of missed reminder descriptions."""
+    now = datetime.now()
+    total, missed = reminder_db.missed_triggers(
+        now - timedelta(hours=window_hours) if window_hours else datetime.fromtimestamp(0),
+        now,
+        limit=TAB_PAGE_SIZE,
+        offset=(page - 1) * TAB_PAGE_SIZE,
+    )
+    return total, [
+        f"Reminder {message} triggered at {triggered_at} was not acknowledged"
+        for _, message, triggered_at in missed
+    ]
+
+
+def get_upcoming_reminders(window_hours, page):
+    """Return the total count and one page of upcoming reminder descriptions."""
+    now = datetime.now()
+    total, reminders = reminder_store.upcoming(
+        now,
+        until=now + timedelta(hours=window_hours) if window_hours else None,
+        limit=TAB_PAGE_SIZE,
+        offset=(page - 1) * TAB_PAGE_SIZE,
+    )
     div_elements = []
 
-    for reminder in current_reminders:
-        reminder_message, reminder_type, reminder_datetime, n_days_value = get_reminderinfo(reminder)
+    for reminder in reminders:
+        if reminder.n_days:
+            msg = f"Reminder {reminder.message} of type: {reminder.reminder_type} scheduled for {reminder.next_fire_time} repeating every {reminder.n_days}"
+        else:
+            msg = f"Reminder {reminder.message} of type: {reminder.reminder_type} scheduled for {reminder.next_fire_time}"
+        div_elements.append(msg)
 
-        if reminder_datetime > datetime.now():
-            if n_days_value:
-                msg = f"Reminder {reminder_message} of type: {reminder_type} scheduled for {reminder_datetime} repeating every {n_days_value}"
-            else:
-                msg = f"Reminder {reminder_message} of type: {reminder_type} scheduled for {reminder_datetime}"
-            div_elements.append(msg)
+    return total, div_elements
 
-    return div_elements
 
+# The agenda covers this many days when the window is "All"
+AGENDA_DEFAULT_DAYS = 90
 
-def get_reminderinfo(reminder):
-    aio_component = reminder["props"]["children"][0]
-    subcomponents = aio_component["props"]["children"]["props"]["children"][0]["props"][
-        "children"
-    ]
-    message_component = subcomponents[0]
-    reminder_type_component = subcomponents[1]
-    date_component = subcomponents[2]
-    time_component = subcomponents[3]
-    every_n_days_component = subcomponents[4]
-
-    message = message_component["props"]["children"]["props"]["value"]
-    reminder_type = reminder_type_component["props"]["children"]["props"]["value"]
-    date_value = date_component["props"]["children"]["props"]["date"]
-    time_value = time_component["props"]["children"]["props"]["value"]
-
-    if not (every_n_days_component["props"]["children"]["props"]["disabled"]):
-        n_days_value = every_n_days_component["props"]["children"]["props"]["value"]
-    else:
-        n_days_value = None
-    reminder_datetime_str = f"{date_value} {time_value}"
-    reminder_datetime = datetime.strptime(reminder_datetime_str, "%Y-%m-%d %H:%M")
 
-    return message, reminder_type, reminder_datetime, n_days_value
+@lru_cache(maxsize=8)
+def agenda_occurrences(first_day, last_day, store_version):
+    """Fire times of every reminder, cached per window and store version."""
+    return expand(iter(reminder_store), first_day, last_day)
 
 
-app.layout = html.Div(
-    [
-        render_appheader(),
-        dbc.Modal(
-            [
-                dbc.ModalHeader(dbc.ModalTitle("Reminder Status"), close_button=False),
-                dbc.ModalBody(id=ids.REMINDER_STATUS_MODAL_BODY),
-                dbc.ModalFooter([dbc.Button("Snooze", id=ids.SNOOZE_BUTTON, n_clicks=0,color="dark"),
-                                 dbc.Button("OK", id=ids.OK_BUTTON, n_clicks=0, color="info")]),
-            ],
-            id=ids.REMINDER_STATUS_MODAL,
-            is_open=False,
-            centered=True,
-            keyboard=False
-        ),
-        html.Button("Add Reminder", id=ids.ADD_REMINDER_BUTTON),
-        html.Div(id=ids.REMINDER_CONTAINER),
-        dcc.Interval(id=ids.UPDATE_TIME_IN_INTERVALS, interval=1000, n_intervals=0),
-        dcc.Store(id=ids.REMINDER_STATUS_MESSAGE_STORE),
-        dcc.Interval(
-            id=ids.REMINDER_POLL_UPDATE_IN_INTERVALS, interval=50, n_intervals=0
-        ),
-        reminder_tabs,
+def tagged_fire_times(fire_times, start, stop, reminder_id):
+    for index in range(start, stop):
+        yield fire_times[index], reminder_id
+
+
+def get_agenda(window_hours, page):
+    """Return the total count and one page of upcoming occurrences.
+
+    Unlike the Upcoming tab, which lists each reminder once, the agenda lists
+    every time a reminder fires in the window.
+    """
+    now = datetime.now()
+    until = now + (
+        timedelta(hours=window_hours) if window_hours else timedelta(days=AGENDA_DEFAULT_DAYS)
+    )
+    occurrences = agenda_occurrences(now.date(), until.date(), reminder_store.version)
+
+    total = 0
+    streams = []
+    for reminder_id, fire_times in occurrences.items():
+        start = bisect_right(fire_times, now)
+        stop = bisect_left(fire_times, until, start)
+        if start < stop:
+            total += stop - start
+            streams.append(tagged_fire_times(fire_times, start, stop, reminder_id))
+
+    offset = (page - 1) * TAB_PAGE_SIZE
+    entries = []
+    for fire_time, reminder_id in islice(heapq.merge(*streams), offset, offset + TAB_PAGE_SIZE):
+        reminder = reminder_store.get(reminder_id)
+        if reminder is not None:
+            entries.append(f"{fire_time:%a %d %b %Y %H:%M} - {reminder.message}")
+    return total, entries
+
+
+def format_seconds(seconds):
+    return "n/a" if seconds is None else f"{seconds:g}s"
+
+
+def get_trigger_history(page):
+    """Return the fire counts of one page of reminders, after a summary.
+
+    The summary is read from Log/Neuron.log by the log analyzer, which picks
+    up where it stopped last time on a background thread; a render shows what
+    has been read so far. The tab window does not apply here.
+    """
+    log_analyzer.refresh()
+    with log_analyzer.reading() as history:
+        return trigger_history_entries(history, page)
+
+
+def trigger_history_entries(history, page):
+    offset = (page - 1) * TAB_PAGE_SIZE
+    entries = []
+    if page == 1:
+        if log_analyzer.offset < log_analyzer.size:
+            entries.append(
+                f"Read {log_analyzer.offset / log_analyzer.size:.0%} of Neuron.log so far"
+            )
+        entries.append(f"{history.fires} triggers")
+        entries += [
+            f"{reminder_type}: {fires} triggers, scheduled {scheduled} times"
+            for reminder_type, (fires, scheduled) in history.by_type().items()
+        ]
+        entries.append(
+            "Triggers by hour: "
+            + ", ".join(
+                f"{hour:02d}h {fires}" for hour, fires in enumerate(history.fires_by_hour) if fires
+            )
+        )
+        entries.append(
+            f"Delay after due time: p50 <= {format_seconds(history.delay_quantile(0.5))}, "
+            f"p95 <= {format_seconds(history.delay_quantile(0.95))}, "
+            f"max {format_seconds(history.max_delay if history.delay.count else None)}"
+        )
+    entries += [
+        f"Reminder {message} ({reminder_id}) triggered {fires} times"
+        for reminder_id, message, fires in history.top_reminders(TAB_PAGE_SIZE, offset)
     ]
-)
+    return len(history.fires_by_reminder), entries
+
+
+def serve_layout():
+    return html.Div(
+        [
+            render_appheader(),
+            dbc.Modal(
+                [
+                    dbc.ModalHeader(dbc.ModalTitle("Reminder Status"), close_button=False),
+                    dbc.ModalBody(id=ids.REMINDER_STATUS_MODAL_BODY),
+                    dbc.ModalFooter([dbc.Select(id=ids.SNOOZE_DURATION_SELECT,
+                                                options=[{"label": label, "value": value}
+                                                         for label, value in SNOOZE_OPTIONS],
+                                                value=SNOOZE_OPTIONS[0][1],
+                                                style={"width": "auto"}),
+                                     dbc.Input(id=ids.SNOOZE_CUSTOM_MINUTES_INPUT, type="number", min=1,
+                                               max=MAX_SNOOZE_MINUTES, placeholder="Minutes", disabled=True,
+                                               style={"width": "7em"}),
+                                     dbc.Button("Snooze", id=ids.SNOOZE_BUTTON, n_clicks=0,color="dark"),
+                                     dbc.Button("OK", id=ids.OK_BUTTON, n_clicks=0, color="info")]),
+                ],
+                id=ids.REMINDER_STATUS_MODAL,
+                is_open=False,
+                centered=True,
+                keyboard=False
+            ),
+            html.Button("Add Reminder", id=ids.ADD_REMINDER_BUTTON),
+            reminder_search_bar,
+            # Filled with the first page by search_reminder_rows on load
+            html.Div(id=ids.REMINDER_CONTAINER),
+            dcc.Interval(id=ids.UPDATE_TIME_IN_INTERVALS, interval=1000, n_intervals=0),
+            dcc.Store(id=ids.REMINDER_STATUS_MESSAGE_STORE),
+            dcc.Store(id=ids.REMINDER_EVENT_CURSOR_STORE),
+            dcc.Store(id=ids.PENDING_TRIGGERS_STORE, data=[]),
+            dcc.Interval(
+                id=ids.REMINDER_POLL_UPDATE_IN_INTERVALS,
+                interval=REMINDER_POLL_INTERVAL_MS,
+                n_intervals=0,
+            ),
+            reminder_tabs,
+        ]
+    )
+
+
+app.layout = serve_layout
 
 
 def run_app():
@@ -196,62 +1079,111 @@ def run_app():
 @callback(
     output=Output(ids.REMINDER_CONTAINER, "children", allow_duplicate=True),
     inputs=Input("add-reminder-button", "n_clicks"),
-    state=State(ids.REMINDER_CONTAINER, "children"),
     prevent_initial_call=True,
 )
-def add_reminder(add_reminder_button_click, current_reminders):
+def add_reminder(add_reminder_button_click):
+    """Append one row to REMINDER_CONTAINER without sending the others."""
     try:
-        if current_reminders is None:
-            current_reminders = []
-
         if add_reminder_button_click is None or add_reminder_button_click == 0:
-            return current_reminders
+            raise PreventUpdate()
         reminder_id = str(uuid.uuid4())
         new_reminder = create_reminder(reminder_id)
-        return current_reminders + [new_reminder]
+        current_reminders = Patch()
+        current_reminders.append(new_reminder)
+        return current_reminders
+    except PreventUpdate:
+        raise
     except Exception as ex:
         logging.error("Exception occurred when adding reminder %ex", ex)
+        raise PreventUpdate()
 
 
 @callback(
-    output=Output(ids.REMINDER_CONTAINER, "children"),
-    inputs=Input({"type": "delete-button", "index": ALL}, "n_clicks"),
-    state=State(ids.REMINDER_CONTAINER, "children"),
+    output=[
+        Output({"type": "reminder-row", "index": MATCH}, "children"),
+        Output({"type": "reminder-row", "index": MATCH}, "style"),
+    ],
+    inputs=Input({"type": "delete-button", "index": MATCH}, "n_clicks"),
     prevent_initial_call=True,
 )
-def delete_reminder(delete_button_click, current_reminders):
+def delete_reminder(delete_button_click):
+    """Empty and hide only the deleted row, leaving the rest of the list alone."""
     try:
-        if not delete_button_click or not any(delete_button_click):
-            return current_reminders
-
-        reminder_id = ctx.triggered_id["index"]
-        updated_reminders = []
+        if not delete_button_click:
+            raise PreventUpdate()
 
-        job = scheduler.get_job(str(reminder_id))
-
-        if job:
-            scheduler.remove_job(str(reminder_id))
-            logging.info(f"Removed reminder {reminder_id} from scheduler")
-        else:
-            logging.info(f"No job found for reminder {reminder_id}, skipping removal.")
-
-        for reminder in current_reminders:
-            if reminder["props"]["children"][0]["props"]["id"] != reminder_id:
-                updated_reminders.append(reminder)
-        print(f'Jobs during scheduling {scheduler.get_jobs()}')
-        return updated_reminders
+        remove_reminder(ctx.triggered_id["index"])
+        return [], {"display": "none"}
 
+    except PreventUpdate:
+        raise
     except Exception as ex:
         logging.error(f"Exception occurred when deleting reminder: {ex}")
         raise PreventUpdate()
 
 
 @callback(
+    output=[
+        Output({"type": "reminder-editor", "index": MATCH}, "children"),
+        Output({"type": "open-button", "index": MATCH}, "style"),
+    ],
+    inputs=Input({"type": "open-button", "index": MATCH}, "n_clicks"),
+    prevent_initial_call=True,
+)
+def open_reminder_editor(open_button_click):
+    """Replace a compact row's text with the full ReminderAIO editor."""
+    if not open_button_click:
+        raise PreventUpdate()
+    reminder_id = ctx.triggered_id["index"]
+    reminder = reminder_store.get(reminder_id)
+    if reminder is None:
+        raise PreventUpdate()
+    return create_reminder_editor(reminder_id, reminder), {"display": "none"}
+
+
+def remove_reminder(reminder_id):
+    """Unschedule a reminder and delete it from the store and database."""
+    rehydrated.wait()
+    if scheduler_client is not None:
+        scheduler_client.request("remove", reminder_id=reminder_id)
+        reminder_store.remove(reminder_id)
+        return
+
+    job = scheduler.get_job(str(reminder_id))
+
+    if job:
+        scheduler.remove_job(str(reminder_id))
+        logging.info(f"Removed reminder {reminder_id} from scheduler")
+    else:
+        logging.info(f"No job found for reminder {reminder_id}, skipping removal.")
+    remove_overlay_jobs(reminder_id)
+    reminder_store.remove(reminder_id)
+    reminder_db.delete(reminder_id)
+    logging.debug("Jobs after deleting: %s", lazy(scheduler.get_jobs))
+
+
+def remove_overlay_jobs(reminder_id):
+    """Remove the one-shot snooze and catch-up jobs of a deleted reminder."""
+    for job_id in (snooze_job_id(reminder_id), f"{reminder_id}:catch-up"):
+        try:
+            scheduler.remove_job(job_id)
+        except JobLookupError:
+            pass
+
+
+# Runs in the browser, so the clock costs no server round trips
+clientside_callback(
+    """
+    function update_time(n_intervals) {
+        const now = new Date();
+        const pad = (value) => String(value).padStart(2, "0");
+        return `${pad(now.getDate())}/${pad(now.getMonth() + 1)}/${now.getFullYear()}` +
+            ` - ${pad(now.getHours())}:${pad(now.getMinutes())}:${pad(now.getSeconds())}`;
+    }
+    """,
     Output("current-time", "children"),
     Input(ids.UPDATE_TIME_IN_INTERVALS, "n_intervals"),
 )
-def update_time(n_intervals):
-    return time.strftime("%d/%m/%Y - %H:%M:%S")
 
 
 @callback(
@@ -277,10 +1209,14 @@ def update_time(n_intervals):
         {"component": "ReminderAIO", "subcomponent": "n-days-input", "aio_id": MATCH},
         "value",
     ),
+    Input(
+        {"component": "ReminderAIO", "subcomponent": "zone-dropdown", "aio_id": MATCH},
+        "value",
+    ),
     prevent_initial_call=True,
 )
 def schedule_new_reminder(
-    reminder_message, reminder_date, reminder_time, reminder_type, n_days
+    reminder_message, reminder_date, reminder_time, reminder_type, n_days, zone
 ):
     """Callback to schedule the reminder."""
     try:
@@ -302,111 +1238,360 @@ def schedule_new_reminder(
                 datetime.strptime(reminder_time, "%H:%M").time(),
             )
 
-            if reminder_type == "Once in every" and n_days:
-                schedule_reminder(
-                    reminder_message,
+            upsert_reminder(
+                Reminder(
                     reminder_id,
-                    reminder_datetime,
+                    reminder_message,
                     reminder_type,
-                    n_days,
-                )
-            else:
-                schedule_reminder(
-                    reminder_message, reminder_id, reminder_datetime, reminder_type
+                    reminder_datetime,
+                    n_days if reminder_type == "Once in every" else None,
+                    validate_zone(zone),
                 )
+            )
         raise PreventUpdate()
+    except PreventUpdate:
+        raise
     except Exception as e:
         logging.error(f"Error while scheduling reminder: {e}")
         raise PreventUpdate()
 
 
+def upsert_reminder(reminder):
+    """Save a reminder, touching its job only as much as the edit requires.
+
+    An unchanged definition is a no-op, a message-only edit leaves the job
+    alone since jobs read the message from the store when they fire, and
+    anything else replaces the job in one step. Returns False when nothing
+    had to change; raises ValueError, before saving anything, when the
+    reminder's trigger cannot be built.
+    """
+    rehydrated.wait()
+    reminder_id = reminder.reminder_id
+    previous = reminder_store.get(reminder_id)
+    same_schedule = (
+        previous is not None and previous.schedule_key() == reminder.schedule_key()
+    )
+    if same_schedule and previous.message == reminder.message:
+        logging.debug("Reminder %s unchanged, skipping reschedule", reminder_id)
+        return False
+    # Built before anything is saved, so an invalid definition changes nothing
+    trigger = build_trigger(
+        reminder.reminder_datetime, reminder.reminder_type, reminder.n_days, reminder.zone
+    )
+
+    if scheduler_client is not None:
+        scheduler_client.request("upsert", reminder=reminder_to_wire(reminder))
+        reminder_store.upsert(reminder)
+        return True
+
+    job = scheduler.get_job(reminder_id)
+    if same_schedule and job is not None:
+        reminder.next_fire_time = previous.next_fire_time
+        reminder_store.upsert(reminder)
+        reminder_db.upsert(reminder)
+        logging.info(f"Updated message of reminder {reminder_id}")
+        return True
+
+    reminder_store.upsert(reminder)
+    reminder_db.upsert(reminder)
+    scheduled = schedule_reminder(
+        reminder_id,
+        trigger,
+        reminder.reminder_datetime,
+        reminder.reminder_type,
+        replace_existing=True,
+    )
+    if scheduled is None and job is not None:
+        # The new definition has no trigger yet, e.g. "Once in every" without n_days
+        scheduler.remove_job(reminder_id)
+    return True
+
+
 @callback(
     Output(ids.REMINDER_STATUS_MESSAGE_STORE, "data"),
+    Output(ids.REMINDER_EVENT_CURSOR_STORE, "data"),
     Input(ids.REMINDER_POLL_UPDATE_IN_INTERVALS, "n_intervals"),
+    State(ids.REMINDER_EVENT_CURSOR_STORE, "data"),
 )
-def poll_data(n_intervals):
-    global reminder_status
-    if reminder_status:
-        return reminder_status
+def poll_data(n_intervals, cursor):
+    if cursor is None:
+        return no_update, trigger_events.last_seq
+    events, cursor = trigger_events.read(cursor)
+    if events:
+        return events, cursor
     raise PreventUpdate()
 
 
+clientside_callback(
+    """
+    function pause_poll_while_streaming(n_intervals) {
+        // assets/js/reminder_events.js re-enables the poll if the stream fails
+        return Boolean(window.reminderEventsOpen);
+    }
+    """,
+    Output(ids.REMINDER_POLL_UPDATE_IN_INTERVALS, "disabled"),
+    Input(ids.REMINDER_POLL_UPDATE_IN_INTERVALS, "n_intervals"),
+)
+
+
 @callback(
     [
         Output(ids.REMINDER_STATUS_MODAL, "is_open"),
         Output(ids.REMINDER_STATUS_MODAL_BODY, "children"),
         Output(ids.OK_BUTTON, 'n_clicks'),
         Output(ids.SNOOZE_BUTTON, 'n_clicks'),
+        Output(ids.PENDING_TRIGGERS_STORE, "data"),
     ],
     [
         Input(ids.REMINDER_STATUS_MESSAGE_STORE, "data"),
         Input(ids.OK_BUTTON, "n_clicks"),
         Input(ids.SNOOZE_BUTTON, "n_clicks"),
     ],
-    [State(ids.REMINDER_STATUS_MODAL, "is_open"), State(ids.REMINDER_CONTAINER, 'children')],
+    [
+        State(ids.REMINDER_STATUS_MODAL, "is_open"),
+        State(ids.PENDING_TRIGGERS_STORE, "data"),
+        State(ids.SNOOZE_DURATION_SELECT, "value"),
+        State(ids.SNOOZE_CUSTOM_MINUTES_INPUT, "value"),
+    ],
     prevent_initial_call=True,
 )
-def show_modal(store_object_data, ok_click , snooze_click, is_open, current_reminders):
-    """Callback to show/hide the modal and update its content."""
-    global reminder_status
-    reminder_id = store_object_data[0]
-    message = store_object_data[1]
-    print(f'reminder status {reminder_status}')
+def show_modal(
+    new_triggers,
+    ok_click,
+    snooze_click,
+    is_open,
+    pending_triggers,
+    snooze_duration,
+    custom_snooze_minutes,
+):
+    """Callback to show/hide the modal and update its content.
+
+    Triggers that arrive while the modal is open are added to the pending
+    batch, and OK or Snooze applies to the whole batch at once.
+    """
+    pending_triggers = pending_triggers or []
+    if snooze_click:
+        # Read before acknowledging, so the batch is never acknowledged but not snoozed
+        minutes = snooze_minutes(snooze_duration, custom_snooze_minutes)
+    if ok_click or snooze_click:
+        reminder_db.acknowledge_triggers(
+            [t["trigger_id"] for t in pending_triggers],
+            "ok" if ok_click else "snoozed",
+            datetime.now(),
+        )
     if ok_click:
-        reminder_status = None
-        return False, None, None, None
+        return False, None, None, None, []
     if snooze_click:
-        snooze_reminder(reminder_id, current_reminders)
-        reminder_status = None
-        return False, None, None, None
-    if message:
-        reminder_status = None
-        return True, message, None, None
-    return is_open, None, None, None
+        snooze_reminders(dict.fromkeys(t["reminder_id"] for t in pending_triggers), minutes)
+        return False, None, None, None, []
+
+    seen = {t["seq"] for t in pending_triggers}
+    arrived = [t for t in new_triggers or [] if t["seq"] not in seen]
+    record_delivery_latency(arrived)
+    pending_triggers = pending_triggers + arrived
+    if pending_triggers:
+        if len(pending_triggers) == 1:
+            body = pending_triggers[0]["message"]
+        else:
+            body = html.Ul([html.Li(t["message"]) for t in pending_triggers])
+        return True, body, None, None, pending_triggers
+    return is_open, None, None, None, pending_triggers
+
+
+clientside_callback(
+    """
+    function toggle_custom_snooze(duration) {
+        return duration !== "custom";
+    }
+    """,
+    Output(ids.SNOOZE_CUSTOM_MINUTES_INPUT, "disabled"),
+    Input(ids.SNOOZE_DURATION_SELECT, "value"),
+)
 
 
 
 @callback(
-    output=Output(ids.TAB_CONTENT_CONTAINER, "children"),
-    inputs=Input(ids.UPCOMING_MISSED_REMINDERS_TABS, "value"),
-    state=State(ids.REMINDER_CONTAINER, "children"),
-    prevent_initial_call=True,
+    output=[
+        Output(ids.TAB_CONTENT_CONTAINER, "children"),
+        Output(ids.TAB_PAGINATION, "max_value"),
+        Output(ids.TAB_PAGINATION, "active_page"),
+    ],
+    inputs=[
+        Input(ids.UPCOMING_MISSED_REMINDERS_TABS, "value"),
+        Input(ids.TAB_WINDOW_DROPDOWN, "value"),
+        Input(ids.TAB_PAGINATION, "active_page"),
+    ],
 )
-def render_tab_content(tab, current_reminders):
+def render_tab_content(tab, window_hours, page):
+    if ctx.triggered_id != ids.TAB_PAGINATION or not page:
+        page = 1
     if tab == "upcoming-reminders":
-        upcoming_reminders = get_upcoming_reminders(current_reminders)
-        return html.Ul([html.Li(x) for x in upcoming_reminders])
+        total, reminders = get_upcoming_reminders(window_hours, page)
     elif tab == "missed-reminders":
-        return html.Div("Missed reminders yet to be implemented")
+        total, reminders = get_missed_reminders(window_hours, page)
+    elif tab == "agenda":
+        total, reminders = get_agenda(window_hours, page)
+    elif tab == "history":
+        total, reminders = get_trigger_history(page)
+    else:
+        raise PreventUpdate()
+    max_page = max(1, -(-total // TAB_PAGE_SIZE))
+    return html.Ul([html.Li(x) for x in reminders]), max_page, page
+
+
+def find_reminders(query, reminder_type, start_date, end_date, state, page):
+    """Return the total and one page of reminders matching the search bar."""
+    return reminder_store.search(
+        query,
+        reminder_type,
+        datetime.fromisoformat(start_date) if start_date else None,
+        datetime.fromisoformat(end_date) + timedelta(days=1) if end_date else None,
+        {"active": True, "inactive": False}.get(state),
+        limit=EDITOR_PAGE_SIZE,
+        offset=(page - 1) * EDITOR_PAGE_SIZE,
+    )
+
+
+@callback(
+    output=[
+        Output(ids.REMINDER_CONTAINER, "children"),
+        Output(ids.REMINDER_PAGINATION, "max_value"),
+        Output(ids.REMINDER_PAGINATION, "active_page"),
+        Output(ids.REMINDER_SEARCH_SUMMARY, "children"),
+    ],
+    inputs=[
+        Input(ids.REMINDER_SEARCH_INPUT, "value"),
+        Input(ids.REMINDER_TYPE_FILTER, "value"),
+        Input(ids.REMINDER_DATE_FILTER, "start_date"),
+        Input(ids.REMINDER_DATE_FILTER, "end_date"),
+        Input(ids.REMINDER_STATE_FILTER, "value"),
+        Input(ids.REMINDER_PAGINATION, "active_page"),
+    ],
+)
+def search_reminder_rows(query, reminder_type, start_date, end_date, state, page):
+    """Send compact rows for one page of matching reminders.
+
+    The page is the only part of the list in the browser, so the layout and
+    DOM stay the same size however many reminders there are.
+    """
+    if ctx.triggered_id != ids.REMINDER_PAGINATION or not page:
+        page = 1
+    total, reminders = find_reminders(query, reminder_type, start_date, end_date, state, page)
+    rows = [create_reminder_summary(r) for r in reminders]
+    max_page = max(1, -(-total // EDITOR_PAGE_SIZE))
+    return rows, max_page, page, f"{total} reminders"
+
+
+def snooze_job_id(reminder_id):
+    return f"{reminder_id}:snooze"
 
 
-def snooze_reminder(reminder_id, current_reminders):
-    reminder = search_reminder_with_reminder_id(reminder_id, current_reminders)
-    reminder_message, reminder_type, reminder_datetime, n_days_value = get_reminderinfo(reminder)
-    print(reminder_datetime)
-    reminder_datetime = reminder_datetime + timedelta(seconds=10)
-    print(reminder_datetime)
-    if n_days_value:
-        schedule_reminder(reminder_message, reminder_id, reminder_datetime, reminder_type, n_days_value)
-    schedule_reminder(reminder_message, reminder_id, reminder_datetime, reminder_type)
-    print("Snoozed Reminder successfully")
+def snooze_minutes(duration, custom_minutes):
+    """Minutes chosen in the modal.
 
-def search_reminder_with_reminder_id(reminder_id, current_reminders):
-    for reminder in current_reminders:
-        if reminder["props"]["children"][0]["props"]["id"] == reminder_id:
-            return reminder
+    A missing or invalid custom value uses the default, and a custom value
+    above MAX_SNOOZE_MINUTES is capped.
+    """
+    if duration != "custom":
+        return int(duration or DEFAULT_SNOOZE_MINUTES)
+    if isinstance(custom_minutes, (int, float)) and custom_minutes > 0:
+        return min(custom_minutes, MAX_SNOOZE_MINUTES)
+    return DEFAULT_SNOOZE_MINUTES
 
 
+def snooze_reminders(reminder_ids, minutes=DEFAULT_SNOOZE_MINUTES):
+    """Fire each reminder once more in `minutes`, leaving its schedule alone.
+
+    A snooze is a one-shot overlay job next to the reminder's own job, so
+    snoozing costs one job insert per reminder. Snoozing again moves the
+    overlay instead of adding another.
+    """
+    rehydrated.wait()
+    reminder_ids = list(reminder_ids)
+    if scheduler_client is not None:
+        scheduler_client.request("snooze", reminder_ids=reminder_ids, minutes=minutes)
+        return
+    snooze_until = datetime.now().replace(microsecond=0) + timedelta(minutes=minutes)
+    # Date triggers hold no state, so all overlays share one
+    trigger = DateTrigger(run_date=snooze_until)
+    snoozed = 0
+    with quiet_apscheduler_logging():
+        for reminder_id in reminder_ids:
+            reminder = search_reminder_with_reminder_id(reminder_id)
+            if reminder is None:
+                logging.info(f"Reminder {reminder_id} no longer exists, skipping snooze.")
+                continue
+            scheduler.add_job(
+                func=trigger_reminder,
+                trigger=trigger,
+                args=[reminder_id, snooze_until],
+                id=snooze_job_id(reminder_id),
+                replace_existing=True,
+            )
+            snoozed += 1
+    logging.info(f"Snoozed {snoozed} reminders until {snooze_until}")
+
+
+def search_reminder_with_reminder_id(reminder_id):
+    return reminder_store.get(reminder_id)
+
+
+
+def run_desktop():
+    """Show the app in a pywebview window instead of a browser tab."""
+    import webview  # Desktop only, so the web server never pays for it
+
+    webview.create_window("Neuron", server)
+    webview.start()
+
+
+def measure_startup():
+    """Finish starting up the way `python app.py` does and return the phases.
+
+    Startup runs on a copy of the database with the scheduler paused, so a
+    profile run fires no reminders, catch-up ones included, and records
+    nothing in the live database. With nothing fired, the notification
+    dispatcher never starts either.
+    """
+    global reminder_db
+    live_db = reminder_db
+    with tempfile.TemporaryDirectory() as directory:
+        reminder_db = live_db.copy(os.path.join(directory, "Neuron.db"))
+        try:
+            start_scheduler(paused=True)
+            serve_layout()
+            startup_profile.mark("first layout")
+            if scheduler.running:
+                scheduler.shutdown(wait=False)
+        finally:
+            reminder_db.close()
+            reminder_db = live_db
+    return startup_profile.phases()
+
+
+startup_profile.mark("callbacks and routes")
+
 
 if __name__ == "__main__":
-    # t_scheduler = Thread(target=start_scheduler)
-    # t_scheduler.daemon = True
-    # t_scheduler.start()
-    start_scheduler()
-
-    run_app()
-    # t_app = Thread(target=run_app)
-    # t_app.daemon = True
-    # t_app.start()
-    # webview.create_window("Neuron", server)
-    # webview.start(debug=True)
+    parser = argparse.ArgumentParser(description="Neuron reminders")
+    parser.add_argument(
+        "--desktop", action="store_true", help="open in a desktop window"
+    )
+    parser.add_argument(
+        "--profile-startup",
+        action="store_true",
+        help="print a breakdown of import and startup time, then exit",
+    )
+    args = parser.parse_args()
+
+    if args.profile_startup:
+        startup_profile.run_report("app", "measure_startup")
+    else:
+        # Rehydrating many reminders takes seconds; serve the UI meanwhile
+        rehydrated.clear()
+        Thread(target=start_scheduler, name="StartScheduler", daemon=True).start()
+        if args.desktop:
+            enable_desktop_notifications()
+            run_desktop()
+        else:
+            run_app()
@@ -0,0 +1,39 @@
+// Push reminder triggers from the server into the reminder status store.
+// The dcc.Interval poll in app.py is the fallback for browsers where the
+// event stream cannot be opened. It pauses itself while the stream is open
+// (see pause_poll_while_streaming) and is re-enabled here when it fails.
+(function () {
+    if (!window.EventSource) {
+        return;
+    }
+
+    var STORE_ID = "reminder-status-message-store";
+    var CURSOR_STORE_ID = "reminder-event-cursor-store";
+    var POLL_ID = "reminder-poll-update-in-intervals";
+    var source = new EventSource("/reminder-events");
+
+    function dashReady() {
+        return window.dash_clientside && window.dash_clientside.set_props;
+    }
+
+    source.onopen = function () {
+        window.reminderEventsOpen = true;
+    };
+
+    source.onerror = function () {
+        // EventSource reconnects by itself; poll until onopen fires again
+        window.reminderEventsOpen = false;
+        if (dashReady()) {
+            window.dash_clientside.set_props(POLL_ID, {disabled: false});
+        }
+    };
+
+    source.onmessage = function (event) {
+        if (!dashReady()) {
+            return;
+        }
+        // Each message is a batch of every trigger since the last one
+        window.dash_clientside.set_props(STORE_ID, {data: JSON.parse(event.data)});
+        window.dash_clientside.set_props(CURSOR_STORE_ID, {data: Number(event.lastEventId)});
+    };
+})();
@@ -0,0 +1,76 @@
+"""Measure startup rehydration time and memory for persisted reminders.
+
+Usage: python benchmarks/bench_rehydration.py [count ...]
+
+Counts should be given in increasing order, since memory is reported as
+growth of the process peak RSS.
+"""
+import logging
+import os
+import random
+import sys
+import tempfile
+import resource
+import time
+import uuid
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import app  # noqa: E402
+from components.reminderAIO import reminder_types  # noqa: E402
+from utils.reminder_db import ReminderDatabase  # noqa: E402
+from utils.reminder_store import Reminder, ReminderStore  # noqa: E402
+
+
+def synthetic_reminders(count):
+    now = datetime.now().replace(second=0, microsecond=0)
+    for i in range(count):
+        reminder_type = reminder_types[i % len(reminder_types)]
+        yield Reminder(
+            str(uuid.uuid4()),
+            f"Synthetic reminder {i}",
+            reminder_type,
+            now + timedelta(minutes=random.randint(1, 60 * 24 * 30)),
+            random.randint(2, 30) if reminder_type == "Once in every" else None,
+        )
+
+
+def measure(count):
+    with tempfile.TemporaryDirectory() as tmp:
+        database = ReminderDatabase(os.path.join(tmp, "Neuron.db"))
+        database.upsert_many(synthetic_reminders(count))
+        database.close()
+
+        app.reminder_db = ReminderDatabase(os.path.join(tmp, "Neuron.db"))
+        app.reminder_store = ReminderStore()
+        app.scheduler = app.BackgroundScheduler(
+            job_defaults={"coalesce": True, "misfire_grace_time": 60}
+        )
+
+        logging.getLogger("apscheduler").setLevel(logging.WARNING)
+        rss_before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        started = time.perf_counter()
+        app.rehydrate_reminders()
+        rehydrated = time.perf_counter()
+        app.scheduler.start(paused=True)
+        scheduler_started = time.perf_counter()
+        rss_after = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+        jobs = len(app.scheduler.get_jobs())
+        app.scheduler.shutdown(wait=False)
+        app.reminder_db.close()
+
+    return {
+        "reminders": count,
+        "jobs": jobs,
+        "rehydrate_seconds": round(rehydrated - started, 3),
+        "scheduler_start_seconds": round(scheduler_started - rehydrated, 3),
+        "peak_rss_growth_mb": round((rss_after - rss_before) / 1024, 1),
+    }
+
+
+if __name__ == "__main__":
+    counts = [int(arg) for arg in sys.argv[1:]] or [10_000, 100_000]
+    for count in counts:
+        print(measure(count))
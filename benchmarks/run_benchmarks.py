@@ -0,0 +1,576 @@
+"""Offline benchmark suite for scheduling, callbacks and trigger fan-out.
+
+Usage:
+    python benchmarks/run_benchmarks.py [--sizes 1000 10000] [--burst 500]
+        [--dispatch-size 100000] [--output results.json] [--compare previous.json]
+
+Everything runs in a temporary working directory, so the benchmark never
+touches Log/ or Data/ of the checkout. Results are written as JSON (by
+default to benchmarks/results/<git revision>.json) so runs on different
+commits can be compared with --compare.
+"""
+import argparse
+import gc
+import json
+import os
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+import uuid
+from datetime import datetime, timedelta
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+
+INVOCATION_DIR = os.getcwd()
+WORK_DIR = tempfile.mkdtemp(prefix="neuron-bench-")
+os.chdir(WORK_DIR)
+
+import app  # noqa: E402
+from components.reminderAIO import reminder_types  # noqa: E402
+from utils.notifications import NotificationDispatcher  # noqa: E402
+from utils.reminder_db import ReminderDatabase  # noqa: E402
+from utils.reminder_store import Reminder, ReminderStore  # noqa: E402
+from utils.trigger_events import TriggerEventQueue  # noqa: E402
+
+CALLBACK_SAMPLES = 50
+
+
+def synthetic_reminders(count, seed=0):
+    """Reminders spread evenly across every reminder type over 30 days."""
+    rng = random.Random(seed)
+    now = datetime.now().replace(second=0, microsecond=0)
+    reminders = []
+    for i in range(count):
+        reminder_type = reminder_types[i % len(reminder_types)]
+        reminders.append(
+            Reminder(
+                str(uuid.UUID(int=rng.getrandbits(128))),
+                f"Synthetic reminder {i}",
+                reminder_type,
+                now + timedelta(minutes=rng.randint(1, 60 * 24 * 30)),
+                rng.randint(2, 30) if reminder_type == "Once in every" else None,
+            )
+        )
+    return reminders
+
+
+def reset_app(name, backend="apscheduler"):
+    """Point the app at an empty store, database and scheduler."""
+    if app.scheduler.running:
+        app.scheduler.shutdown(wait=False)
+    app.reminder_db.close()
+    app.reminder_db = ReminderDatabase(os.path.join(WORK_DIR, f"{name}.db"))
+    app.reminder_store = ReminderStore()
+    app.trigger_events = TriggerEventQueue()
+    app.notifications.stop(5)
+    app.notifications = NotificationDispatcher(app.metrics)
+    app.configure_notifications()
+    app.scheduler = app.create_scheduler(backend)
+    app.register_scheduler_listeners()
+
+
+def summarize(samples_ms):
+    samples_ms = sorted(samples_ms)
+    return {
+        "p50_ms": round(statistics.median(samples_ms), 3),
+        "p95_ms": round(samples_ms[int(0.95 * (len(samples_ms) - 1))], 3),
+        "max_ms": round(samples_ms[-1], 3),
+    }
+
+
+def bench_add_job(count):
+    reminders = synthetic_reminders(count)
+    reset_app(f"add-job-{count}")
+    app.scheduler.start(paused=True)
+    triggers = [
+        app.build_trigger(r.reminder_datetime, r.reminder_type, r.n_days, r.zone)
+        for r in reminders
+    ]
+    with app.quiet_apscheduler_logging():
+        started = time.perf_counter()
+        for reminder, trigger in zip(reminders, triggers):
+            app.scheduler.add_job(
+                func=app.trigger_reminder,
+                trigger=trigger,
+                args=[reminder.reminder_id],
+                id=reminder.reminder_id,
+            )
+        elapsed = time.perf_counter() - started
+    return {"jobs_per_second": round(count / elapsed), "seconds": round(elapsed, 3)}
+
+
+def bench_bulk_schedule(count):
+    reminders = synthetic_reminders(count)
+    reset_app(f"bulk-{count}")
+    app.scheduler.start(paused=True)
+    started = time.perf_counter()
+    for start in range(0, count, app.IMPORT_BATCH_SIZE):
+        app.schedule_reminders_bulk(reminders[start:start + app.IMPORT_BATCH_SIZE])
+    elapsed = time.perf_counter() - started
+    return {"reminders_per_second": round(count / elapsed), "seconds": round(elapsed, 3)}
+
+
+def bench_memory(count):
+    """Bytes retained per reminder by the store and its scheduler job."""
+    reset_app(f"memory-{count}")
+    app.scheduler.start(paused=True)
+    gc.collect()
+    tracemalloc.start()
+    before, _ = tracemalloc.get_traced_memory()
+    reminders = synthetic_reminders(count)
+    for start in range(0, count, app.IMPORT_BATCH_SIZE):
+        app.schedule_reminders_bulk(reminders[start:start + app.IMPORT_BATCH_SIZE])
+    gc.collect()
+    after, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {"bytes_per_reminder": round((after - before) / count)}
+
+
+class LegacyReminder:
+    """The reminder record before it was slotted, kept for bench_layouts."""
+
+    def __init__(self, reminder_id, message, reminder_type, reminder_datetime, n_days=None):
+        self.reminder_id = reminder_id
+        self.message = message
+        self.reminder_type = reminder_type
+        self.reminder_datetime = reminder_datetime
+        self.n_days = n_days
+        self.next_fire_time = reminder_datetime
+
+
+def retained_bytes(build):
+    """Bytes still allocated after `build()` returns, while its result lives."""
+    gc.collect()
+    tracemalloc.start()
+    before, _ = tracemalloc.get_traced_memory()
+    kept = build()
+    gc.collect()
+    after, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del kept
+    return after - before
+
+
+def bench_layouts(count, distinct_messages=500):
+    """Bytes per reminder of each in-memory reminder layout.
+
+    "legacy" is a dict-backed record with datetimes, its fire time index
+    entry and the four job arguments jobs used to carry. "compact" is the
+    slotted Reminder, its index entry and the id-only job arguments.
+    "component" is a full ReminderAIO editor row and "summary_row" the
+    compact row the editor list shows until a row is opened.
+    Messages repeat as in real data, and every string and datetime is built
+    inside the measurement, as loading from the database would.
+    """
+    ids = [str(uuid.UUID(int=i)) for i in range(count)]
+    base = datetime.now().replace(second=0, microsecond=0)
+
+    def rows():
+        for i, reminder_id in enumerate(ids):
+            reminder_type = reminder_types[i % len(reminder_types)]
+            yield (
+                reminder_id,
+                f"Reminder {i % distinct_messages}",
+                reminder_type,
+                base + timedelta(minutes=i),
+                7 if reminder_type == "Once in every" else None,
+            )
+
+    def legacy():
+        kept = []
+        for row in rows():
+            reminder = LegacyReminder(*row)
+            reminder.next_fire_time = reminder.reminder_datetime.replace()
+            args = [
+                reminder.message,
+                reminder.reminder_id,
+                reminder.reminder_datetime,
+                reminder.reminder_type,
+            ]
+            kept.append((reminder, (reminder.next_fire_time, reminder.reminder_id), args))
+        return kept
+
+    def compact():
+        kept = []
+        for row in rows():
+            reminder = Reminder(*row)
+            index_entry = (reminder.next_fire_seconds, reminder.reminder_id)
+            kept.append((reminder, index_entry, [reminder.reminder_id]))
+        return kept
+
+    def component():
+        return [app.create_reminder(row[0], Reminder(*row)) for row in rows()]
+
+    def summary():
+        return [app.create_reminder_summary(Reminder(*row)) for row in rows()]
+
+    # The (record, index entry, args) holder tuples are the same for both
+    empty = [None, None, None]
+    holders = retained_bytes(lambda: [tuple(empty) for _ in ids])
+    result = {
+        "legacy_bytes_per_reminder": round((retained_bytes(legacy) - holders) / count),
+        "compact_bytes_per_reminder": round((retained_bytes(compact) - holders) / count),
+        "component_bytes_per_reminder": round(retained_bytes(component) / count),
+        "summary_row_bytes_per_reminder": round(retained_bytes(summary) / count),
+    }
+    saving = 1 - result["compact_bytes_per_reminder"] / result["legacy_bytes_per_reminder"]
+    result["compact_saving_percent"] = round(100 * saving, 1)
+    return result
+
+
+class CallbackClient:
+    """Run Dash callbacks through the same HTTP dispatch the browser uses."""
+
+    def __init__(self):
+        self.client = app.server.test_client()
+        self.client.get("/")
+        self.dependencies = self.client.get("/_dash-dependencies").get_json()
+
+    def output_for(self, fragment):
+        return next(d["output"] for d in self.dependencies if fragment in d["output"])
+
+    def dispatch(self, payload):
+        started = time.perf_counter()
+        response = self.client.post("/_dash-update-component", json=payload)
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        if response.status_code not in (200, 204):
+            raise RuntimeError(f"Callback failed with {response.status_code}")
+        return elapsed_ms
+
+
+def bench_callbacks(count):
+    reminders = synthetic_reminders(count)
+    reset_app(f"callbacks-{count}")
+    app.scheduler.start(paused=True)
+    for start in range(0, count, app.IMPORT_BATCH_SIZE):
+        app.schedule_reminders_bulk(reminders[start:start + app.IMPORT_BATCH_SIZE])
+    client = CallbackClient()
+
+    add_output = client.output_for("reminder-container.children@")
+    add_samples = [
+        client.dispatch(
+            {
+                "output": add_output,
+                "outputs": {"id": "reminder-container", "property": "children"},
+                "inputs": [
+                    {"id": "add-reminder-button", "property": "n_clicks", "value": i + 1}
+                ],
+                "changedPropIds": ["add-reminder-button.n_clicks"],
+            }
+        )
+        for i in range(CALLBACK_SAMPLES)
+    ]
+
+    delete_output = client.output_for("reminder-row")
+    delete_samples = []
+    for reminder in random.Random(1).sample(reminders, CALLBACK_SAMPLES):
+        row = {"type": "reminder-row", "index": reminder.reminder_id}
+        button = {"type": "delete-button", "index": reminder.reminder_id}
+        delete_samples.append(
+            client.dispatch(
+                {
+                    "output": delete_output,
+                    "outputs": [
+                        {"id": row, "property": "children"},
+                        {"id": row, "property": "style"},
+                    ],
+                    "inputs": [{"id": button, "property": "n_clicks", "value": 1}],
+                    "changedPropIds": [
+                        json.dumps(button, sort_keys=True, separators=(",", ":"))
+                        + ".n_clicks"
+                    ],
+                }
+            )
+        )
+
+    tab_output = client.output_for("tab-content-container")
+    tab_samples = [
+        client.dispatch(
+            {
+                "output": tab_output,
+                "outputs": [
+                    {"id": "tab-content-container", "property": "children"},
+                    {"id": "tab-pagination", "property": "max_value"},
+                    {"id": "tab-pagination", "property": "active_page"},
+                ],
+                "inputs": [
+                    {"id": "upcoming-missed-reminders-tabs", "property": "value", "value": tab},
+                    {"id": "tab-window-dropdown", "property": "value", "value": 0},
+                    {"id": "tab-pagination", "property": "active_page", "value": 1},
+                ],
+                "changedPropIds": ["upcoming-missed-reminders-tabs.value"],
+            }
+        )
+        for i in range(CALLBACK_SAMPLES)
+        for tab in ("upcoming-reminders", "missed-reminders")
+    ]
+
+    search_output = client.output_for("reminder-search-summary")
+    search_payload = {
+        "output": search_output,
+        "outputs": [
+            {"id": "reminder-container", "property": "children"},
+            {"id": "reminder-pagination", "property": "max_value"},
+            {"id": "reminder-pagination", "property": "active_page"},
+            {"id": "reminder-search-summary", "property": "children"},
+        ],
+        "inputs": [
+            {"id": "reminder-search-input", "property": "value", "value": None},
+            {"id": "reminder-type-filter", "property": "value", "value": None},
+            {"id": "reminder-date-filter", "property": "start_date", "value": None},
+            {"id": "reminder-date-filter", "property": "end_date", "value": None},
+            {"id": "reminder-state-filter", "property": "value", "value": "any"},
+            {"id": "reminder-pagination", "property": "active_page", "value": 1},
+        ],
+        "changedPropIds": [],
+    }
+    # The first editor page is what the browser loads after the layout
+    editor_page_samples = [client.dispatch(search_payload) for _ in range(CALLBACK_SAMPLES)]
+    editor_page_bytes = len(
+        client.client.post("/_dash-update-component", json=search_payload).data
+    )
+
+    open_output = client.output_for("open-button")
+    open_samples = []
+    for reminder in random.Random(2).sample(reminders[CALLBACK_SAMPLES:], CALLBACK_SAMPLES):
+        button = {"type": "open-button", "index": reminder.reminder_id}
+        editor = {"type": "reminder-editor", "index": reminder.reminder_id}
+        open_samples.append(
+            client.dispatch(
+                {
+                    "output": open_output,
+                    "outputs": [
+                        {"id": editor, "property": "children"},
+                        {"id": button, "property": "style"},
+                    ],
+                    "inputs": [{"id": button, "property": "n_clicks", "value": 1}],
+                    "changedPropIds": [
+                        json.dumps(button, sort_keys=True, separators=(",", ":"))
+                        + ".n_clicks"
+                    ],
+                }
+            )
+        )
+
+    return {
+        "add_reminder": summarize(add_samples),
+        "delete_reminder": summarize(delete_samples),
+        "render_tab_content": summarize(tab_samples),
+        "editor_first_page": summarize(editor_page_samples),
+        "open_reminder_editor": summarize(open_samples),
+        "editor_first_page_bytes": editor_page_bytes,
+        "layout_bytes": len(client.client.get("/_dash-layout").data),
+    }
+
+
+def add_burst(burst, fire_at, prefix="burst"):
+    """Add `burst` one-off reminders firing at `fire_at` straight to the scheduler."""
+    reminders = [
+        Reminder(f"{prefix}-{i}", f"Burst {i}", "Once only", fire_at) for i in range(burst)
+    ]
+    app.reminder_store.bulk_load(reminders)
+    with app.quiet_apscheduler_logging():
+        for reminder in reminders:
+            app.scheduler.add_job(
+                func=app.trigger_reminder,
+                trigger=app.DateTrigger(run_date=fire_at),
+                args=[reminder.reminder_id],
+                id=reminder.reminder_id,
+            )
+
+
+def bench_fire_burst(burst):
+    """Schedule `burst` one-off reminders for the same second and time delivery."""
+    reset_app(f"burst-{burst}")
+    app.scheduler.start()
+    fire_at = (datetime.now() + timedelta(seconds=2)).replace(microsecond=0)
+    add_burst(burst, fire_at)
+
+    cursor = 0
+    delays_ms = []
+    deadline = time.monotonic() + 60
+    while len(delays_ms) < burst and time.monotonic() < deadline:
+        events, cursor = app.trigger_events.wait(cursor, timeout=1)
+        received = datetime.now()
+        delays_ms.extend(
+            (received - fire_at).total_seconds() * 1000 for _ in events
+        )
+    app.scheduler.shutdown(wait=True)
+
+    result = {"delivered": len(delays_ms), "scheduled": burst}
+    if delays_ms:
+        result.update(summarize(delays_ms))
+    return result
+
+
+class SlowSink:
+    """A notification sink that takes `seconds` per delivery."""
+
+    name = "slow"
+
+    def __init__(self, seconds):
+        self.seconds = seconds
+        self.delivered = 0
+
+    def deliver(self, events):
+        time.sleep(self.seconds)
+        self.delivered += len(events)
+
+
+def bench_slow_sink(burst, sink_seconds=0.5):
+    """Time modal delivery of a burst fired in waves next to a slow sink.
+
+    The burst is split over five consecutive seconds, so later waves fire
+    while the slow sink is still busy with earlier ones.
+    """
+    reset_app(f"slow-sink-{burst}")
+    slow = SlowSink(sink_seconds)
+    app.notifications.add_sink(slow)
+    app.scheduler.start()
+    first = (datetime.now() + timedelta(seconds=2)).replace(microsecond=0)
+    waves = [first + timedelta(seconds=wave) for wave in range(5)]
+    for wave, fire_at in enumerate(waves):
+        add_burst(burst // len(waves), fire_at, f"wave{wave}")
+
+    cursor = 0
+    delays_ms = []
+    deadline = time.monotonic() + 60
+    while len(delays_ms) < burst and time.monotonic() < deadline:
+        events, cursor = app.trigger_events.wait(cursor, timeout=1)
+        received = time.time()
+        delays_ms.extend((received - event["timings"]["fired"]) * 1000 for event in events)
+    modal_done = time.monotonic()
+    while slow.delivered < len(delays_ms) and time.monotonic() < deadline:
+        time.sleep(0.05)
+    app.scheduler.shutdown(wait=True)
+
+    result = {
+        "delivered": len(delays_ms),
+        "slow_sink_delivered": slow.delivered,
+        "slow_sink_lag_seconds": round(time.monotonic() - modal_done, 3),
+    }
+    if delays_ms:
+        result["modal_delay"] = summarize(delays_ms)
+    return result
+
+
+def bench_dispatch(count, burst, backend):
+    """Load `count` reminders into a running scheduler, then time a burst.
+
+    Compares the per-job APScheduler backend with the time-bucketed one on
+    scheduling throughput and on delivering `burst` reminders that share a
+    fire time while the rest of the load is waiting.
+    """
+    reminders = synthetic_reminders(count)
+    reset_app(f"dispatch-{backend}-{count}", backend)
+    app.scheduler.start()
+    started = time.perf_counter()
+    for start in range(0, count, app.IMPORT_BATCH_SIZE):
+        app.schedule_reminders_bulk(reminders[start:start + app.IMPORT_BATCH_SIZE])
+    load_seconds = time.perf_counter() - started
+
+    fire_at = (datetime.now() + timedelta(seconds=2)).replace(microsecond=0)
+    add_burst(burst, fire_at)
+
+    cursor = 0
+    delays_ms = []
+    cpu_started = time.process_time()
+    deadline = time.monotonic() + 60
+    while len(delays_ms) < burst and time.monotonic() < deadline:
+        events, cursor = app.trigger_events.wait(cursor, timeout=1)
+        received = datetime.now()
+        delays_ms.extend((received - fire_at).total_seconds() * 1000 for _ in events)
+    cpu_seconds = time.process_time() - cpu_started
+    app.scheduler.shutdown(wait=True)
+
+    result = {
+        "load_reminders_per_second": round(count / load_seconds),
+        "burst_delivered": len(delays_ms),
+        "burst_cpu_seconds": round(cpu_seconds, 3),
+    }
+    if delays_ms:
+        result["burst_delay"] = summarize(delays_ms)
+    return result
+
+
+def git_revision():
+    try:
+        return subprocess.check_output(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=REPO_ROOT, text=True
+        ).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def compare(results, previous):
+    """Print the relative change of every numeric metric present in both runs."""
+
+    def flatten(data, prefix=""):
+        for key, value in data.items():
+            if isinstance(value, dict):
+                yield from flatten(value, f"{prefix}{key}.")
+            elif isinstance(value, (int, float)):
+                yield f"{prefix}{key}", value
+
+    old = dict(flatten(previous["benchmarks"]))
+    for name, value in flatten(results["benchmarks"]):
+        if old.get(name):
+            change = (value - old[name]) / old[name] * 100
+            print(f"{name:60} {old[name]:>12} -> {value:>12} ({change:+.1f}%)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000])
+    parser.add_argument("--burst", type=int, default=500)
+    parser.add_argument("--dispatch-size", type=int, default=100000)
+    parser.add_argument("--output")
+    parser.add_argument("--compare")
+    args = parser.parse_args()
+
+    revision = git_revision()
+    results = {
+        "revision": revision,
+        "timestamp": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "benchmarks": {},
+    }
+    for size in args.sizes:
+        results["benchmarks"][str(size)] = {
+            "add_job": bench_add_job(size),
+            "bulk_schedule": bench_bulk_schedule(size),
+            "memory": bench_memory(size),
+            "layouts": bench_layouts(size),
+            "callbacks": bench_callbacks(size),
+        }
+        print(json.dumps({size: results["benchmarks"][str(size)]}))
+    results["benchmarks"]["fire_burst"] = bench_fire_burst(args.burst)
+    print(json.dumps({"fire_burst": results["benchmarks"]["fire_burst"]}))
+    results["benchmarks"]["slow_sink"] = bench_slow_sink(args.burst)
+    print(json.dumps({"slow_sink": results["benchmarks"]["slow_sink"]}))
+    results["benchmarks"]["dispatch"] = {
+        backend: bench_dispatch(args.dispatch_size, args.burst, backend)
+        for backend in ("apscheduler", "buckets")
+    }
+    print(json.dumps({"dispatch": results["benchmarks"]["dispatch"]}))
+
+    output = os.path.join(INVOCATION_DIR, args.output) if args.output else os.path.join(REPO_ROOT, "benchmarks", "results", f"{revision}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w", encoding="utf-8") as results_file:
+        json.dump(results, results_file, indent=2)
+    print(f"Results written to {output}")
+
+    if args.compare:
+        with open(os.path.join(INVOCATION_DIR, args.compare), encoding="utf-8") as previous_file:
+            compare(results, json.load(previous_file))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+"""Command line client for the Neuron bulk reminder API.
+
+Examples:
+    python cli.py import reminders.csv
+    python cli.py --url http://127.0.0.1:8050 import calendar.ics
+    python cli.py delete reminder_ids.txt
+    python cli.py export --format jsonl --output reminders.jsonl
+"""
+import argparse
+import json
+import os
+import shutil
+import sys
+import urllib.error
+import urllib.request
+
+from utils.reminder_io import FORMATS
+
+DEFAULT_URL = "http://127.0.0.1:8050"
+EXTENSION_FORMATS = {".csv": "csv", ".jsonl": "jsonl", ".ndjson": "jsonl", ".ics": "ics"}
+
+
+def post_file(url, path):
+    """Stream a file to the API without loading it into memory."""
+    with open(path, "rb") as body:
+        request = urllib.request.Request(
+            url,
+            data=body,
+            method="POST",
+            headers={"Content-Length": str(os.path.getsize(path))},
+        )
+        with urllib.request.urlopen(request) as response:
+            return json.load(response)
+
+
+def import_command(args):
+    fmt = args.format or EXTENSION_FORMATS.get(os.path.splitext(args.file)[1].lower())
+    if fmt is None:
+        sys.exit(f"Cannot tell the format of {args.file}, pass --format")
+    result = post_file(f"{args.url}/api/reminders?format={fmt}", args.file)
+    print(f"Imported {result['imported']} reminders, rejected {result['rejected']}")
+    for error in result["errors"]:
+        print(f"  record {error['record']}: {error['error']}")
+
+
+def delete_command(args):
+    result = post_file(f"{args.url}/api/reminders/delete", args.file)
+    print(f"Deleted {result['deleted']} reminders, rejected {result['rejected']}")
+    for error in result["errors"]:
+        print(f"  line {error['record']}: {error['error']}")
+
+
+def export_command(args):
+    url = f"{args.url}/api/reminders?format={args.format}"
+    with urllib.request.urlopen(url) as response:
+        if args.output:
+            with open(args.output, "wb") as output:
+                shutil.copyfileobj(response, output)
+        else:
+            shutil.copyfileobj(response, sys.stdout.buffer)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--url", default=DEFAULT_URL, help="Neuron server URL")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    import_parser = commands.add_parser("import", help="create or update reminders")
+    import_parser.add_argument("file")
+    import_parser.add_argument("--format", choices=FORMATS)
+    import_parser.set_defaults(func=import_command)
+
+    delete_parser = commands.add_parser("delete", help="delete reminders by id")
+    delete_parser.add_argument("file", help="one reminder id per line, or JSON lines")
+    delete_parser.set_defaults(func=delete_command)
+
+    export_parser = commands.add_parser("export", help="export every reminder")
+    export_parser.add_argument("--format", choices=FORMATS, default="csv")
+    export_parser.add_argument("--output", "-o")
+    export_parser.set_defaults(func=export_command)
+
+    args = parser.parse_args(argv)
+    try:
+        args.func(args)
+    except urllib.error.URLError as ex:
+        sys.exit(f"Request to {args.url} failed: {ex}")
+
+
+if __name__ == "__main__":
+    main()
@@ -6,12 +6,27 @@ UPCOMING_MISSED_REMINDERS_TABS = "upcoming-missed-reminders-tabs"
 # Container objects
 TAB_CONTENT_CONTAINER = "tab-content-container"
 REMINDER_CONTAINER = "reminder-container"
+TAB_CONTROLS = "tab-controls"
+
+# Reminder search controls
+REMINDER_SEARCH_INPUT = "reminder-search-input"
+REMINDER_TYPE_FILTER = "reminder-type-filter"
+REMINDER_DATE_FILTER = "reminder-date-filter"
+REMINDER_STATE_FILTER = "reminder-state-filter"
+REMINDER_SEARCH_SUMMARY = "reminder-search-summary"
+REMINDER_PAGINATION = "reminder-pagination"
+
+# Tab controls
+TAB_WINDOW_DROPDOWN = "tab-window-dropdown"
+TAB_PAGINATION = "tab-pagination"
 
 # Interval updates
 REMINDER_POLL_UPDATE_IN_INTERVALS = "reminder-poll-update-in-intervals"
 UPDATE_TIME_IN_INTERVALS = "update-time-in-intervals"
 # Store objects
 REMINDER_STATUS_MESSAGE_STORE = "reminder-status-message-store"
+REMINDER_EVENT_CURSOR_STORE = "reminder-event-cursor-store"
+PENDING_TRIGGERS_STORE = "pending-triggers-store"
 
 
 # MODAL IDS
@@ -22,3 +37,7 @@ REMINDER_STATUS_MODAL_BODY = "reminder-status-modal-body"
 ADD_REMINDER_BUTTON = "add-reminder-button"
 OK_BUTTON = 'ok-button'
 SNOOZE_BUTTON = 'snooze-button'
+
+# Snooze controls
+SNOOZE_DURATION_SELECT = "snooze-duration-select"
+SNOOZE_CUSTOM_MINUTES_INPUT = "snooze-custom-minutes-input"
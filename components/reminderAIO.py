@@ -1,4 +1,4 @@
-from dash import Dash, html, dcc, Input, Output, callback, MATCH
+from dash import Dash, html, dcc, Input, Output, clientside_callback, MATCH
 import dash_bootstrap_components as dbc
 import uuid
 from datetime import date
@@ -12,6 +12,9 @@ reminder_types = [
     "Once in every",
 ]
 
+# Typed values reach the server after this much idle time, not per keystroke
+INPUT_DEBOUNCE_MS = 500
+
 class ReminderAIO(html.Div):
     class ids:
         @staticmethod
@@ -54,6 +57,14 @@ class ReminderAIO(html.Div):
                 "aio_id": aio_id,
             }
 
+        @staticmethod
+        def zone_dropdown(aio_id):
+            return {
+                "component": "ReminderAIO",
+                "subcomponent": "zone-dropdown",
+                "aio_id": aio_id,
+            }
+
     ids = ids
 
     def __init__(
@@ -64,6 +75,7 @@ class ReminderAIO(html.Div):
         reminder_datepicker_properties=None,
         reminder_time_input_properties=None,
         n_days_input_properties=None,
+        zone_dropdown_properties=None,
     ):
         if aio_id is None:
             aio_id = str(uuid.uuid4())
@@ -76,6 +88,7 @@ class ReminderAIO(html.Div):
         reminder_message_input_properties.setdefault("type", "text")
         reminder_message_input_properties.setdefault("maxlength", 60)
         reminder_message_input_properties.setdefault("placeholder", "Enter Reminder Message")
+        reminder_message_input_properties.setdefault("debounce", INPUT_DEBOUNCE_MS)
 
         reminder_type_dropdown_properties = (
             reminder_type_dropdown_properties.copy()
@@ -112,7 +125,18 @@ class ReminderAIO(html.Div):
             else {}
         )
         n_days_input_properties.setdefault("type", "number")
+        n_days_input_properties.setdefault("min", 1)
+        n_days_input_properties.setdefault("step", 1)
         n_days_input_properties.setdefault("placeholder", "Enter N days")
+        n_days_input_properties.setdefault("debounce", INPUT_DEBOUNCE_MS)
+
+        zone_dropdown_properties = (
+            zone_dropdown_properties.copy()
+            if zone_dropdown_properties
+            else {}
+        )
+        # No zone means the server's; the options are IANA names from the caller
+        zone_dropdown_properties.setdefault("placeholder", "Server time zone")
 
         super().__init__(
             [
@@ -153,6 +177,13 @@ class ReminderAIO(html.Div):
                             ),
                             width=3,
                         ),
+                        dbc.Col(
+                            dcc.Dropdown(
+                                id=self.ids.zone_dropdown(aio_id),
+                                **zone_dropdown_properties
+                            ),
+                            width=3,
+                        ),
                     ],
                     justify="start",
                     align="center",
@@ -160,12 +191,16 @@ class ReminderAIO(html.Div):
             ]
         )
 
-    @callback(
+    # Toggled in the browser, editing a row needs no server round trip
+    clientside_callback(
+        """
+        function update_n_days_input_tag(reminder_type) {
+            return reminder_type !== "Once in every";
+        }
+        """,
         Output(ids.n_days_input(MATCH), 'disabled'),
         Input(ids.reminder_type_dropdown(MATCH), 'value')
     )
-    def update_n_days_input_tag(reminder_type):
-        return(not(reminder_type == "Once in every"))
 
 # Test the app layout
 if __name__ == "__main__":
@@ -0,0 +1,143 @@
+"""Scheduler daemon for running the web tier with several workers.
+
+Start the daemon, then point every web worker at its socket:
+
+    python scheduler_daemon.py
+    NEURON_SCHEDULER_SOCKET=Data/scheduler.sock gunicorn -w 4 -k gthread --threads 32 wsgi:server
+
+The workers must be threaded; see wsgi.py for why.
+
+The daemons and the workers all append to Log/Neuron.log, and none of
+them rotates it: rotate it externally, e.g. with logrotate, which they
+notice and follow by reopening the file.
+
+Only the daemon holding Data/scheduler.lock schedules anything. Further
+daemons wait on the lock as standbys and take over when the leader exits.
+Web workers add, remove and snooze reminders over the socket and follow
+its event feed, which carries triggers and reminder changes (see
+utils/scheduler_ipc.py).
+"""
+import argparse
+import logging
+import os
+
+# This process is the scheduler, never a client of one
+os.environ.pop("NEURON_SCHEDULER_SOCKET", None)
+os.environ["NEURON_SCHEDULER_DAEMON"] = "1"
+
+import app  # noqa: E402
+from apscheduler.events import (  # noqa: E402
+    EVENT_JOB_ERROR,
+    EVENT_JOB_EXECUTED,
+    EVENT_JOB_MISSED,
+    EVENT_JOB_REMOVED,
+)
+from utils.scheduler_ipc import (  # noqa: E402
+    SchedulerServer,
+    acquire_leadership,
+    reminder_from_wire,
+    reminder_to_wire,
+)
+
+DEFAULT_SOCKET = os.path.join(app.data_dir, "scheduler.sock")
+DEFAULT_LOCK = os.path.join(app.data_dir, "scheduler.lock")
+
+# Triggers are already published here, so reminder changes share the feed
+feed = app.trigger_events
+
+
+def publish_upserts(reminder_ids):
+    reminders = [app.reminder_store.get(reminder_id) for reminder_id in reminder_ids]
+    feed.publish(
+        {
+            "kind": "upsert",
+            "reminders": [reminder_to_wire(r) for r in reminders if r is not None],
+        }
+    )
+
+
+def upsert(reminder):
+    reminder = reminder_from_wire(reminder)
+    changed = app.upsert_reminder(reminder)
+    if changed:
+        publish_upserts([reminder.reminder_id])
+    return changed
+
+
+def upsert_many(reminders):
+    reminders = [reminder_from_wire(r) for r in reminders]
+    app.schedule_reminders_bulk(reminders)
+    publish_upserts([r.reminder_id for r in reminders])
+    return len(reminders)
+
+
+def remove(reminder_id):
+    app.remove_reminder(reminder_id)
+    feed.publish({"kind": "remove", "reminder_ids": [reminder_id]})
+
+
+def remove_many(reminder_ids):
+    deleted = app.delete_reminders_bulk(reminder_ids)
+    feed.publish({"kind": "remove", "reminder_ids": reminder_ids})
+    return deleted
+
+
+def snooze(reminder_ids, minutes):
+    # Snoozes are overlay jobs, the reminders themselves do not change
+    app.snooze_reminders(reminder_ids, minutes)
+
+
+HANDLERS = {
+    "upsert": upsert,
+    "upsert_many": upsert_many,
+    "remove": remove,
+    "remove_many": remove_many,
+    "snooze": snooze,
+}
+
+
+def publish_fire_time(event):
+    reminder = app.reminder_store.get(event.job_id)
+    if reminder is None:
+        return
+    next_fire_time = reminder.next_fire_time
+    feed.publish(
+        {
+            "kind": "fire_times",
+            "next_fire_times": {
+                event.job_id: next_fire_time.isoformat() if next_fire_time else None
+            },
+        }
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--socket", default=DEFAULT_SOCKET)
+    parser.add_argument("--lock", default=DEFAULT_LOCK)
+    args = parser.parse_args()
+
+    lock_file = acquire_leadership(args.lock)
+    logging.info(f"Scheduler daemon {os.getpid()} is the leader")
+    app.start_scheduler()
+    # Registered after the app's listeners, so the store is already updated
+    app.scheduler.add_listener(
+        publish_fire_time,
+        EVENT_JOB_EXECUTED | EVENT_JOB_ERROR | EVENT_JOB_MISSED | EVENT_JOB_REMOVED,
+    )
+
+    server = SchedulerServer(
+        args.socket, HANDLERS, feed, snapshot=lambda: iter(app.reminder_store)
+    )
+    logging.info(f"Scheduler daemon listening on {args.socket}")
+    try:
+        server.serve_forever()
+    finally:
+        server.server_close()
+        os.unlink(args.socket)
+        app.scheduler.shutdown(wait=False)
+        lock_file.close()
+
+
+if __name__ == "__main__":
+    main()
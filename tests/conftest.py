@@ -0,0 +1,46 @@
+import os
+
+import pytest
+
+
+@pytest.fixture(scope="session")
+def app_module(tmp_path_factory):
+    """The app, run from a temporary directory so Log/ and Data/ stay out of the checkout."""
+    directory = tmp_path_factory.mktemp("app")
+    cwd = os.getcwd()
+    os.chdir(directory)
+    import app
+
+    yield app
+    app.notifications.stop(5)
+    os.chdir(cwd)
+
+
+@pytest.fixture
+def fresh_app(app_module, tmp_path):
+    """Return a function resetting the app to empty state on a scheduler backend."""
+    from utils.notifications import NotificationDispatcher
+    from utils.reminder_db import ReminderDatabase
+    from utils.reminder_store import ReminderStore
+    from utils.trigger_events import TriggerEventQueue
+
+    app = app_module
+
+    def reset(backend="apscheduler"):
+        if app.scheduler.running:
+            app.scheduler.shutdown(wait=False)
+        app.reminder_db.close()
+        app.reminder_db = ReminderDatabase(str(tmp_path / f"{backend}.db"))
+        app.reminder_store = ReminderStore()
+        app.trigger_events = TriggerEventQueue()
+        app.notifications.stop(5)
+        app.notifications = NotificationDispatcher(app.metrics)
+        app.configure_notifications()
+        app.scheduler = app.create_scheduler(backend)
+        app.register_scheduler_listeners()
+        app.rehydrated.set()
+        return app
+
+    yield reset
+    if app.scheduler.running:
+        app.scheduler.shutdown(wait=False)
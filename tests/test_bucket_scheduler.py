@@ -0,0 +1,50 @@
+import time
+from datetime import datetime, timedelta
+
+from apscheduler.events import (
+    EVENT_JOB_ERROR,
+    EVENT_JOB_EXECUTED,
+    EVENT_JOB_MISSED,
+    EVENT_JOB_REMOVED,
+    EVENT_JOB_SUBMITTED,
+)
+from apscheduler.schedulers.background import BackgroundScheduler
+from apscheduler.triggers.date import DateTrigger
+from apscheduler.triggers.interval import IntervalTrigger
+
+from utils.bucket_scheduler import BucketScheduler
+
+
+def job_events(scheduler):
+    """Events per job id while a one-shot and a recurring job each fire once."""
+    events = []
+    scheduler.add_listener(
+        lambda event: events.append((event.job_id, event.code)),
+        EVENT_JOB_SUBMITTED | EVENT_JOB_EXECUTED | EVENT_JOB_ERROR | EVENT_JOB_MISSED | EVENT_JOB_REMOVED,
+    )
+    run_at = datetime.now().astimezone() + timedelta(seconds=1)
+    scheduler.add_job(print, DateTrigger(run_date=run_at), args=[], id="once")
+    scheduler.add_job(
+        print, IntervalTrigger(hours=1, start_date=run_at), args=[], id="hourly"
+    )
+    scheduler.start()
+    deadline = time.monotonic() + 5
+    while (
+        sum(code == EVENT_JOB_EXECUTED for _, code in events) < 2
+        and time.monotonic() < deadline
+    ):
+        time.sleep(0.05)
+    scheduler.shutdown(wait=True)
+    return {
+        job_id: sorted(code for event_id, code in events if event_id == job_id)
+        for job_id in ("once", "hourly")
+    }
+
+
+def test_exhausted_jobs_are_removed_like_apscheduler():
+    bucket_events = job_events(BucketScheduler())
+    assert bucket_events == job_events(BackgroundScheduler())
+    assert bucket_events["once"] == sorted(
+        [EVENT_JOB_SUBMITTED, EVENT_JOB_EXECUTED, EVENT_JOB_REMOVED]
+    )
+    assert EVENT_JOB_REMOVED not in bucket_events["hourly"]
@@ -0,0 +1,41 @@
+import time
+
+from utils import log_analytics
+from utils.log_analytics import LogAnalyzer
+
+TRIGGER = (
+    "2026-10-01 09:00:01,000: INFO: Reminder r{index} with message m{index} and\n"
+    "    type Daily triggered at 2026-10-01 09:00:01, due 2026-10-01 09:00:00\n"
+)
+
+
+def test_refresh_catches_up_in_the_background(tmp_path, monkeypatch):
+    monkeypatch.setattr(log_analytics, "CATCH_UP_CHUNK_BYTES", 1024)
+    log_path = tmp_path / "Neuron.log"
+    log_path.write_text("".join(TRIGGER.format(index=index % 7) for index in range(500)))
+    analyzer = LogAnalyzer(str(log_path), str(tmp_path / "state.json"))
+
+    analyzer.refresh()
+    deadline = time.monotonic() + 10
+    while analyzer._refreshing and time.monotonic() < deadline:
+        time.sleep(0.01)
+
+    with analyzer.reading() as history:
+        assert history.fires == 500
+        assert len(history.fires_by_reminder) == 7
+    assert analyzer.offset == analyzer.size == log_path.stat().st_size
+
+
+def test_one_off_fires_logged_without_a_due_time_use_their_schedule(tmp_path):
+    log_path = tmp_path / "Neuron.log"
+    log_path.write_text(
+        "2026-10-01 08:00:00,000: INFO: Scheduled reminder r1 at 2026-10-01 09:00:00 "
+        "with type Once only\n"
+        "2026-10-01 09:00:02,000: INFO: Reminder r1 with message m and\n"
+        "    type Once only triggered at 2026-10-01 09:00:02, due None\n"
+    )
+    analyzer = LogAnalyzer(str(log_path), str(tmp_path / "state.json"))
+    analyzer.update()
+
+    assert analyzer.history.delay.count == 1
+    assert analyzer.history.max_delay == 2
@@ -0,0 +1,68 @@
+import subprocess
+
+from utils import notifications
+from utils.notifications import DesktopSink, NotificationDispatcher, WebhookSink
+
+
+class RecordingMetrics:
+    def __init__(self):
+        self.outcomes = {}
+
+    def record_notification(self, sink, outcome, count, seconds=None):
+        self.outcomes[outcome] = self.outcomes.get(outcome, 0) + count
+
+
+def events(count):
+    return [{"reminder_id": f"r{index}", "message": f"m{index}"} for index in range(count)]
+
+
+def test_desktop_sink_retries_only_undelivered_events(monkeypatch):
+    shown = []
+    failures = {"m3": 1}
+
+    def run(command, **kwargs):
+        message = command[-1]
+        if failures.get(message):
+            failures[message] -= 1
+            raise subprocess.CalledProcessError(1, command)
+        shown.append(message)
+
+    monkeypatch.setattr(notifications.subprocess, "run", run)
+    metrics = RecordingMetrics()
+    dispatcher = NotificationDispatcher(metrics, backoff=0)
+    dispatcher._deliver(DesktopSink(), events(6))
+
+    assert shown == [f"m{index}" for index in range(6)]
+    assert metrics.outcomes == {"delivered": 6, "retried": 3}
+
+
+def test_webhook_sink_retries_from_the_failed_chunk(monkeypatch):
+    posted = []
+    failures = [1]
+
+    def post(self, chunk):
+        if chunk[0]["message"] == "m4" and failures[0]:
+            failures[0] -= 1
+            raise OSError("connection reset")
+        posted.append([event["message"] for event in chunk])
+
+    monkeypatch.setattr(WebhookSink, "post", post)
+    metrics = RecordingMetrics()
+    dispatcher = NotificationDispatcher(metrics, backoff=0)
+    dispatcher._deliver(WebhookSink("http://localhost", chunk_size=2), events(6))
+
+    assert posted == [["m0", "m1"], ["m2", "m3"], ["m4", "m5"]]
+    assert metrics.outcomes == {"delivered": 6, "retried": 2}
+
+
+def test_failed_events_are_counted_once_retries_run_out(monkeypatch):
+    def run(command, **kwargs):
+        if command[-1] == "m1":
+            raise subprocess.TimeoutExpired(command, 5)
+
+    monkeypatch.setattr(notifications.subprocess, "run", run)
+    metrics = RecordingMetrics()
+    dispatcher = NotificationDispatcher(metrics, retries=2, backoff=0)
+    dispatcher._deliver(DesktopSink(), events(3))
+
+    assert metrics.outcomes == {"delivered": 1, "retried": 4, "failed": 2}
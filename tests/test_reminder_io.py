@@ -0,0 +1,122 @@
+import json
+from datetime import datetime
+
+import pytest
+
+from utils.reminder_io import read_reminder_ids, read_reminders, write_reminders
+from utils.reminder_store import Reminder
+
+VALID_LINE = (
+    '{"reminder_id": "ok", "message": "m", "reminder_type": "Daily", '
+    '"reminder_datetime": "2026-11-01 09:00"}'
+)
+
+
+def test_read_reminder_ids_rejects_malformed_lines():
+    lines = [
+        "reminder_id\n",
+        "a,Water the plants\n",
+        '{"reminder_id": "b"}\n',
+        '{"reminder_id": "c"\n',
+        "\n",
+        '{"message": "no id"}\n',
+        "d\n",
+    ]
+    assert list(read_reminder_ids(lines)) == [
+        (2, "a", None),
+        (3, "b", None),
+        (4, None, "invalid JSON: Expecting ',' delimiter: line 1 column 20 (char 19)"),
+        (6, None, "reminder_id is required"),
+        (7, "d", None),
+    ]
+
+
+@pytest.mark.parametrize(
+    "line, error",
+    [
+        ("[1]", "record must be an object"),
+        ('"x"', "record must be an object"),
+        ("null", "record must be an object"),
+        ('{"message": 5, "reminder_type": "Daily"}', "message must be a string"),
+        (
+            '{"message": "m", "reminder_type": "Daily", "reminder_datetime": 5}',
+            "invalid reminder_datetime 5",
+        ),
+        (
+            '{"message": "m", "reminder_type": "Daily", "reminder_datetime": "2026-11-01 09:00", "zone": 1}',
+            "zone must be a string",
+        ),
+    ],
+)
+def test_read_reminders_rejects_records_of_the_wrong_shape(line, error):
+    rejected, accepted = read_reminders([line, VALID_LINE], "jsonl")
+    assert rejected == (1, None, error)
+    assert accepted[1].reminder_id == "ok" and accepted[2] is None
+
+
+def ics_event(rrule):
+    return [
+        "BEGIN:VCALENDAR",
+        "BEGIN:VEVENT",
+        "UID:r",
+        "DTSTART:20261102T090000",
+        "SUMMARY:m",
+        f"RRULE:{rrule}",
+        "END:VEVENT",
+        "END:VCALENDAR",
+    ]
+
+
+@pytest.mark.parametrize(
+    "rrule, reminder_type, n_days",
+    [
+        ("FREQ=DAILY", "Daily", None),
+        ("FREQ=DAILY;INTERVAL=3", "Once in every", 3),
+        ("FREQ=WEEKLY;BYDAY=SU", "Every Week", None),
+        ("FREQ=WEEKLY", "Once in every", 7),
+        ("FREQ=WEEKLY;INTERVAL=2;WKST=MO", "Once in every", 14),
+        ("FREQ=MONTHLY", "Every Month", None),
+        ("FREQ=YEARLY;INTERVAL=1", "Every Year", None),
+    ],
+)
+def test_read_ics_maps_rrules_to_reminder_types(rrule, reminder_type, n_days):
+    [(_, reminder, error)] = read_reminders(ics_event(rrule), "ics")
+    assert error is None
+    assert (reminder.reminder_type, reminder.n_days) == (reminder_type, n_days)
+
+
+@pytest.mark.parametrize(
+    "rrule",
+    [
+        "FREQ=HOURLY",
+        "FREQ=DAILY;COUNT=3",
+        "FREQ=DAILY;UNTIL=20261201T000000Z",
+        "FREQ=WEEKLY;BYDAY=MO,WE",
+        "FREQ=WEEKLY;INTERVAL=2;BYDAY=SU",
+        "FREQ=MONTHLY;INTERVAL=2",
+        "FREQ=MONTHLY;BYDAY=1MO",
+        "FREQ=DAILY;INTERVAL=0",
+    ],
+)
+def test_read_ics_rejects_rrules_no_reminder_type_can_follow(rrule):
+    [(number, reminder, error)] = read_reminders(ics_event(rrule), "ics")
+    assert reminder is None and "RRULE" in error
+
+
+def test_ics_round_trips_special_characters():
+    reminder = Reminder("a;b", r"Tea, biscuits; C:\tea", "Daily", datetime(2026, 11, 2, 9))
+    exported = "".join(write_reminders([reminder], "ics"))
+    assert r"SUMMARY:Tea\, biscuits\; C:\\tea" in exported
+
+    [(_, imported, error)] = read_reminders(exported.splitlines(keepends=True), "ics")
+    assert error is None
+    assert (imported.reminder_id, imported.message) == (reminder.reminder_id, reminder.message)
+
+
+@pytest.mark.parametrize("message", ["line\nbreak", "bell\x07", "next\x85line"])
+def test_read_reminders_rejects_control_characters(message):
+    line = json.dumps(
+        {"message": message, "reminder_type": "Daily", "reminder_datetime": "2026-11-01 09:00"}
+    )
+    [(_, reminder, error)] = read_reminders([line], "jsonl")
+    assert reminder is None and error == "message must not contain control characters"
@@ -0,0 +1,23 @@
+from datetime import datetime
+
+from utils.reminder_store import Reminder, ReminderStore
+
+
+def test_bulk_load_keeps_last_reminder_of_repeated_id():
+    store = ReminderStore()
+    store.bulk_load([
+        Reminder("r1", "water the plants", "Daily", datetime(2026, 1, 1, 9)),
+        Reminder("r2", "call mum", "Daily", datetime(2026, 1, 2, 9)),
+        Reminder("r1", "tea time", "Daily", datetime(2026, 1, 3, 16)),
+    ])
+
+    assert len(store) == 2
+    assert store.get("r1").message == "tea time"
+    assert [r.reminder_id for r in store.search("tea")[1]] == ["r1"]
+    assert store.search("water") == (0, [])
+    assert [r.reminder_id for r in store.search()[1]] == ["r2", "r1"]
+    assert [r.reminder_id for r in store.upcoming(datetime(2025, 1, 1))[1]] == ["r2", "r1"]
+
+    store.remove("r1")
+    assert store.search("tea") == (0, [])
+    assert [r.reminder_id for r in store.search()[1]] == ["r2"]
@@ -0,0 +1,57 @@
+import time
+from datetime import datetime, timedelta
+
+import pytest
+
+from utils.reminder_store import Reminder
+
+
+@pytest.mark.parametrize(
+    "duration, custom_minutes, minutes",
+    [
+        ("15", None, 15),
+        ("custom", 30, 30),
+        ("custom", None, 5),
+        ("custom", -3, 5),
+        ("custom", "10", 5),
+        ("custom", 1e300, 7 * 24 * 60),
+    ],
+)
+def test_snooze_minutes(app_module, duration, custom_minutes, minutes):
+    assert app_module.snooze_minutes(duration, custom_minutes) == minutes
+
+
+def snoozed_app(fresh_app, reminder_ids):
+    app = fresh_app()
+    app.start_scheduler()
+    tomorrow = datetime.now() + timedelta(days=1)
+    for reminder_id in reminder_ids:
+        app.upsert_reminder(Reminder(reminder_id, f"message {reminder_id}", "Daily", tomorrow))
+    return app
+
+
+def test_snoozed_batch_fires_once_more(fresh_app):
+    app = snoozed_app(fresh_app, ["a", "b"])
+    app.snooze_reminders(["a", "b"], 60)
+    # Snoozing again moves the overlays instead of adding more
+    app.snooze_reminders(["a", "b"], 1 / 60)
+
+    events = []
+    cursor = 0
+    deadline = time.monotonic() + 3
+    while time.monotonic() < deadline:
+        batch, cursor = app.trigger_events.wait(cursor, timeout=0.2)
+        events.extend(batch)
+
+    assert sorted(event["reminder_id"] for event in events) == ["a", "b"]
+    assert [job.id for job in app.scheduler.get_jobs() if ":" in job.id] == []
+
+
+def test_deleting_reminders_removes_their_snoozes(fresh_app):
+    app = snoozed_app(fresh_app, ["a", "b", "c"])
+    app.snooze_reminders(["a", "b", "c"], 60)
+
+    app.remove_reminder("a")
+    app.delete_reminders_bulk(["b"])
+
+    assert sorted(job.id for job in app.scheduler.get_jobs()) == ["c", "c:snooze"]
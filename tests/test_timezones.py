@@ -0,0 +1,155 @@
+import random
+from datetime import date, datetime, time, timedelta, timezone
+from zoneinfo import ZoneInfo
+
+import pytest
+
+from utils.recurrence import SUNDAY, expand
+from utils.reminder_store import Reminder, from_seconds
+from utils.timezones import WallClockTrigger, ZoneTable, local_zone_name, zone_table
+
+ZONES = ["Europe/Berlin", "America/New_York", "Australia/Lord_Howe", "America/Santiago"]
+YEAR = 2027
+N_DAYS = 2
+
+# The trigger rule app.build_trigger gives each reminder type
+RULES = {
+    "Once only": lambda start: ("once", start),
+    "Daily": lambda start: ("step", (start, 1)),
+    "Every Week": lambda start: ("weekday", SUNDAY),
+    "Every Month": lambda start: ("day", start.day),
+    "Every Year": lambda start: ("month_day", (start.month, start.day)),
+    "Once in every": lambda start: ("step", (start, N_DAYS)),
+}
+# Stepped types start a few days before the transition so they cross it
+START_OFFSETS = {"Daily": 3, "Once in every": 4}
+
+
+def transition(zone, direction):
+    """(instant, offset before, offset after) of the zone's first change of YEAR in `direction`."""
+    table = zone_table(zone)
+    for instant, before, after in zip(table.instants[1:], table.offsets, table.offsets[1:]):
+        forward = after > before
+        if datetime.fromtimestamp(instant, timezone.utc).year == YEAR and forward == (direction == "spring"):
+            return instant, before, after
+    raise AssertionError(f"{zone} has no {direction} transition in {YEAR}")
+
+
+def fires_on(reminder_type, start, day):
+    if reminder_type == "Once only":
+        return day == start
+    if reminder_type == "Daily":
+        return day >= start
+    if reminder_type == "Every Week":
+        return day.weekday() == SUNDAY
+    if reminder_type == "Every Month":
+        return day.day == start.day
+    if reminder_type == "Every Year":
+        return (day.month, day.day) == (start.month, start.day)
+    return day >= start and (day - start).days % N_DAYS == 0
+
+
+def fire_times(trigger, now, end):
+    fires = []
+    previous = None
+    while True:
+        fire = trigger.get_next_fire_time(previous, now)
+        if fire is None or fire > end:
+            return fires
+        fires.append(fire)
+        previous = fire
+
+
+@pytest.mark.parametrize("zone", ZONES)
+@pytest.mark.parametrize("direction", ["spring", "fall"])
+@pytest.mark.parametrize("hour", ["transition", "09:00", "00:30"])
+@pytest.mark.parametrize("reminder_type", list(RULES))
+def test_trigger_fires_like_zoneinfo_across_dst(zone, direction, hour, reminder_type):
+    instant, before, after = transition(zone, direction)
+    transition_day = from_seconds(instant + before).date()
+    if hour == "transition":
+        # A quarter of an hour into the skipped or repeated wall time
+        time_of_day = (from_seconds(instant + min(before, after)) + timedelta(minutes=15)).time()
+    else:
+        time_of_day = time.fromisoformat(hour)
+    start = transition_day - timedelta(days=START_OFFSETS.get(reminder_type, 0))
+    kind, value = RULES[reminder_type](start)
+    trigger = WallClockTrigger(kind, value, time_of_day, zone)
+
+    zoneinfo = ZoneInfo(zone)
+    window_first = transition_day - timedelta(days=6)
+    now = datetime.combine(window_first, time(), zoneinfo)
+    end = datetime.combine(transition_day + timedelta(days=3), time(), zoneinfo)
+    # Skipped times fire shifted forward by the gap and repeated times once,
+    # at the first occurrence: zoneinfo's reading of a naive time with fold=0
+    expected = [
+        instant
+        for instant in (
+            datetime.combine(window_first + timedelta(days=days), time_of_day, zoneinfo).timestamp()
+            for days in range(12)
+            if fires_on(reminder_type, start, window_first + timedelta(days=days))
+        )
+        if now.timestamp() <= instant <= end.timestamp()
+    ]
+    fires = fire_times(trigger, now, end)
+    assert [fire.timestamp() for fire in fires] == expected
+
+    # The agenda shows the same fire times, on the server's wall clock
+    first, last = (now + timedelta(days=1)).date(), (end - timedelta(days=1)).date()
+    reminder = Reminder("r", "m", reminder_type, datetime.combine(start, time_of_day), N_DAYS, zone)
+    server_zone = ZoneInfo(local_zone_name())
+    shown = [
+        fire.astimezone(server_zone).replace(tzinfo=None)
+        for fire in fire_times(trigger, now, end + timedelta(days=2))
+    ]
+    assert expand([reminder], first, last)["r"] == [
+        fire for fire in shown if first <= fire.date() <= last
+    ]
+
+
+def test_daily_reminder_keeps_its_wall_time_after_dst():
+    trigger = WallClockTrigger("step", (date(YEAR, 3, 20), 1), time(9), "Europe/Berlin")
+    now = datetime(YEAR, 3, 20, tzinfo=ZoneInfo("Europe/Berlin"))
+    fires = fire_times(trigger, now, now + timedelta(days=20))
+    assert len(fires) == 20
+    assert {fire.astimezone(ZoneInfo("Europe/Berlin")).time() for fire in fires} == {time(9)}
+
+
+@pytest.mark.parametrize(
+    "zone",
+    ZONES + ["Asia/Kolkata", "Pacific/Apia", "Europe/Dublin", "Africa/Casablanca", "America/St_Johns"],
+)
+def test_zone_table_matches_zoneinfo(zone):
+    table = ZoneTable(zone)
+    zoneinfo = ZoneInfo(zone)
+
+    def expected_utc(wall):
+        return from_seconds(wall).replace(tzinfo=zoneinfo).timestamp()
+
+    rng = random.Random(zone)
+    for _ in range(5000):
+        instant = rng.randint(table.first + 2 * 86400, table.last - 2 * 86400)
+        assert table.to_wall(instant) == instant + datetime.fromtimestamp(instant, zoneinfo).utcoffset().total_seconds()
+        wall = instant + rng.choice([0, 1800, -3600])
+        assert table.to_utc(wall) == expected_utc(wall)
+    # Every wall time around each transition, on either side's offset
+    for instant in table.instants[1:]:
+        for offset in (table.offset_at(instant - 1), table.offset_at(instant)):
+            for delta in range(-7200, 7201, 900):
+                wall = instant + offset + delta
+                assert table.to_utc(wall) == expected_utc(wall)
+    # Outside the table, conversions fall back to zoneinfo
+    for wall in (table.first - 86400 * 400, table.last + 86400 * 400):
+        assert table.to_utc(wall) == expected_utc(wall)
+
+
+@pytest.mark.parametrize("days", [0, -1])
+def test_step_trigger_rejects_steps_under_a_day(days):
+    with pytest.raises(ValueError):
+        WallClockTrigger("step", (date(YEAR, 1, 1), days), time(9))
+
+
+@pytest.mark.parametrize("n_days", [-1, 0.5, 2.5])
+def test_build_trigger_rejects_invalid_n_days(app_module, n_days):
+    with pytest.raises(ValueError):
+        app_module.build_trigger(datetime(YEAR, 1, 1, 9), "Once in every", n_days)
@@ -0,0 +1,44 @@
+import pytest
+
+from utils.trigger_events import TriggerEventQueue
+
+
+@pytest.mark.parametrize("query", ["?cursor=abc", "?cursor=1.5", ""])
+def test_event_stream_starts_at_the_newest_event_without_a_valid_cursor(fresh_app, query):
+    app = fresh_app()
+    app.trigger_events.publish({"message": "old"})
+
+    response = app.server.test_client().get(f"/reminder-events{query}", buffered=False)
+    try:
+        assert response.status_code == 200
+        chunks = iter(response.response)
+        assert next(chunks) == b"retry: 3000\n\n"
+        app.trigger_events.publish({"message": "new"})
+        assert next(chunks).startswith(b'id: 2\ndata: [{"message": "new"')
+    finally:
+        response.close()
+
+
+def test_reader_behind_a_trimmed_queue_resumes_at_the_oldest_event():
+    queue = TriggerEventQueue(capacity=3)
+    queue.publish_many({"n": n} for n in range(1, 6))
+    assert not queue.covers(1)
+
+    events, cursor = queue.read(1, limit=2)
+    assert [event["seq"] for event in events] == [3, 4] and cursor == 4
+    events, cursor = queue.read(cursor)
+    assert [event["seq"] for event in events] == [5] and cursor == 5
+    assert queue.read(cursor) == ([], 5)
+
+
+def test_reader_ahead_of_the_queue_resumes_with_the_next_event():
+    queue = TriggerEventQueue(capacity=3)
+    queue.publish({"n": 1})
+    # A cursor from before a server restart
+    assert not queue.covers(40)
+    events, cursor = queue.read(40)
+    assert events == [] and cursor == 1
+
+    queue.publish({"n": 2})
+    events, cursor = queue.wait(cursor, timeout=1)
+    assert [event["n"] for event in events] == [2] and cursor == 2
@@ -0,0 +1,92 @@
+import time
+from datetime import datetime, timedelta
+from threading import Thread
+
+import pytest
+
+from utils.reminder_store import Reminder
+
+
+def wait_for_events(app, count, timeout=10):
+    events = []
+    cursor = 0
+    deadline = time.monotonic() + timeout
+    while len(events) < count and time.monotonic() < deadline:
+        batch, cursor = app.trigger_events.wait(cursor, timeout=0.5)
+        events.extend(batch)
+    return events
+
+
+@pytest.mark.parametrize("backend", ["apscheduler", "buckets"])
+def test_burst_of_one_off_reminders_reports_their_due_time(fresh_app, backend):
+    app = fresh_app(backend)
+    fire_at = (datetime.now() + timedelta(seconds=2)).replace(microsecond=0)
+    app.schedule_reminders_bulk(
+        [Reminder(f"once-{index}", f"burst {index}", "Once only", fire_at) for index in range(300)]
+    )
+    app.scheduler.start()
+
+    events = wait_for_events(app, 300)
+
+    assert len(events) == 300
+    assert {event["timings"]["due"] for event in events} == {fire_at.timestamp()}
+
+
+def test_rehydration_skips_reminders_it_cannot_schedule(fresh_app):
+    app = fresh_app()
+    fire_at = datetime.now() + timedelta(days=1)
+    app.reminder_db.upsert_many(
+        [
+            Reminder("bad", "negative step", "Once in every", fire_at, -1),
+            Reminder("good", "tomorrow", "Daily", fire_at),
+        ]
+    )
+
+    app.rehydrate_reminders()
+
+    assert app.scheduler.get_job("bad") is None
+    assert app.scheduler.get_job("good") is not None
+    assert app.reminder_store.get("bad").next_fire_time is None
+
+
+def test_invalid_edit_leaves_the_saved_reminder_alone(fresh_app):
+    app = fresh_app()
+    fire_at = datetime.now() + timedelta(days=1)
+    app.upsert_reminder(Reminder("r", "every other day", "Once in every", fire_at, 2))
+    trigger = app.scheduler.get_job("r").trigger
+
+    with pytest.raises(ValueError):
+        app.upsert_reminder(Reminder("r", "every other day", "Once in every", fire_at, -2))
+
+    assert app.reminder_store.get("r").n_days == 2
+    assert [reminder.n_days for reminder, _ in app.reminder_db.load_all()] == [2]
+    assert app.scheduler.get_job("r").trigger is trigger
+
+
+def test_deletes_during_rehydration_wait_for_it(fresh_app):
+    app = fresh_app()
+    app.reminder_db.upsert(Reminder("r", "tomorrow", "Daily", datetime.now() + timedelta(days=1)))
+    app.rehydrated.clear()
+
+    remover = Thread(target=app.remove_reminder, args=["r"])
+    remover.start()
+    remover.join(0.2)
+    assert remover.is_alive()
+    app.start_scheduler(paused=True)
+    remover.join(5)
+
+    assert app.scheduler.get_job("r") is None
+    assert app.reminder_db.load_all() == []
+
+
+def test_upserting_a_reminder_twice_keeps_one_job_and_one_row(fresh_app):
+    app = fresh_app()
+    app.start_scheduler(paused=True)
+    fire_at = datetime.now() + timedelta(days=1)
+    app.upsert_reminder(Reminder("r", "first", "Daily", fire_at))
+    app.upsert_reminder(Reminder("r", "second", "Every Month", fire_at + timedelta(hours=1)))
+
+    assert [job.id for job in app.scheduler.get_jobs()] == ["r"]
+    saved = [(reminder.message, reminder.reminder_type) for reminder, _ in app.reminder_db.load_all()]
+    assert saved == [("second", "Every Month")]
+    assert len(app.reminder_store) == 1
@@ -0,0 +1,241 @@
+"""Time-bucketed alternative to APScheduler's BackgroundScheduler.
+
+Reminders are set to the minute, so many of them share a fire time. The
+BucketScheduler groups jobs into one bucket per fire second, wakes once per
+bucket and hands every job in it to a batch handler in one call, instead of
+evaluating and submitting each job on its own.
+
+It implements the part of the BackgroundScheduler API the app uses
+(add_job, get_job, get_jobs, remove_job, add_listener, start and shutdown)
+and emits the same APScheduler events, so the two are interchangeable.
+"""
+import heapq
+import logging
+import math
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from threading import Condition, Thread
+
+from apscheduler.events import (
+    EVENT_ALL,
+    EVENT_JOB_ERROR,
+    EVENT_JOB_EXECUTED,
+    EVENT_JOB_MISSED,
+    EVENT_JOB_REMOVED,
+    EVENT_JOB_SUBMITTED,
+    JobEvent,
+    JobExecutionEvent,
+    JobSubmissionEvent,
+)
+from apscheduler.jobstores.base import ConflictingIdError, JobLookupError
+
+JOBSTORE = "default"
+# Upper bound on one sleep, so a changed system clock is noticed
+MAX_WAIT_SECONDS = 60
+
+
+class BucketJob:
+    __slots__ = ("id", "func", "trigger", "args", "next_run_time")
+
+    def __init__(self, id, func, trigger, args, next_run_time):
+        self.id = id
+        self.func = func
+        self.trigger = trigger
+        self.args = args
+        self.next_run_time = next_run_time
+
+    def __repr__(self):
+        return f"BucketJob({self.id!r}, next run at {self.next_run_time})"
+
+
+def bucket_key(run_time):
+    # Rounded up, so a job never runs before its fire time
+    return math.ceil(run_time.timestamp())
+
+
+class BucketScheduler:
+    """Run jobs due in the same second as one batch.
+
+    `batch_handlers` maps a job function to a function that takes the list
+    of argument lists of every due job using it and the list of their run
+    times. Jobs whose function has no batch handler are called one by one.
+    """
+
+    def __init__(self, batch_handlers=None, job_defaults=None, max_workers=4):
+        job_defaults = job_defaults or {}
+        self.misfire_grace_time = job_defaults.get("misfire_grace_time", 1)
+        self.batch_handlers = dict(batch_handlers or {})
+        self.max_workers = max_workers
+        self._condition = Condition()
+        self._jobs = {}
+        self._buckets = {}
+        self._bucket_times = []
+        self._listeners = []
+        self._thread = None
+        self._executor = None
+        self._running = False
+        self._paused = False
+
+    @property
+    def running(self):
+        return self._running
+
+    def start(self, paused=False):
+        with self._condition:
+            self._running = True
+            self._paused = paused
+            self._executor = ThreadPoolExecutor(
+                self.max_workers, thread_name_prefix="BucketScheduler"
+            )
+            self._thread = Thread(target=self._run, name="BucketScheduler", daemon=True)
+            self._thread.start()
+
+    def shutdown(self, wait=True):
+        with self._condition:
+            self._running = False
+            self._condition.notify()
+        if self._thread is not None:
+            self._thread.join()
+            self._executor.shutdown(wait=wait)
+
+    def add_listener(self, callback, mask=EVENT_ALL):
+        self._listeners.append((callback, mask))
+
+    def add_job(self, func, trigger, args=None, id=None, replace_existing=False, **kwargs):
+        now = datetime.now().astimezone()
+        job = BucketJob(id, func, trigger, list(args or ()), trigger.get_next_fire_time(None, now))
+        with self._condition:
+            previous = self._jobs.get(id)
+            if previous is not None:
+                if not replace_existing:
+                    raise ConflictingIdError(id)
+                self._unbucket(previous)
+            self._jobs[id] = job
+            self._bucket(job)
+        return job
+
+    def get_job(self, job_id):
+        return self._jobs.get(job_id)
+
+    def get_jobs(self):
+        with self._condition:
+            return list(self._jobs.values())
+
+    def remove_job(self, job_id):
+        with self._condition:
+            job = self._jobs.pop(job_id, None)
+            if job is None:
+                raise JobLookupError(job_id)
+            self._unbucket(job)
+        self._dispatch(JobEvent(EVENT_JOB_REMOVED, job_id, JOBSTORE))
+
+    def _bucket(self, job):
+        if job.next_run_time is None:
+            return
+        key = bucket_key(job.next_run_time)
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            bucket = self._buckets[key] = {}
+            heapq.heappush(self._bucket_times, key)
+            self._condition.notify()
+        bucket[job.id] = job
+
+    def _unbucket(self, job):
+        # Emptied buckets stay in the heap and are skipped when they come up
+        if job.next_run_time is not None:
+            self._buckets.get(bucket_key(job.next_run_time), {}).pop(job.id, None)
+
+    def _next_due(self):
+        """Pop and return the earliest bucket if it is due, else seconds to wait."""
+        while self._bucket_times:
+            key = self._bucket_times[0]
+            if not self._buckets.get(key):
+                heapq.heappop(self._bucket_times)
+                self._buckets.pop(key, None)
+                continue
+            wait = key - datetime.now().timestamp()
+            if wait > 0:
+                return min(wait, MAX_WAIT_SECONDS)
+            heapq.heappop(self._bucket_times)
+            return self._buckets.pop(key)
+        return MAX_WAIT_SECONDS
+
+    def _run(self):
+        while True:
+            with self._condition:
+                if not self._running:
+                    return
+                due = MAX_WAIT_SECONDS if self._paused else self._next_due()
+                if not isinstance(due, dict):
+                    self._condition.wait(due)
+                    continue
+                batch = self._advance(list(due.values()))
+            if batch:
+                self._executor.submit(self._execute, batch)
+
+    def _advance(self, jobs):
+        """Reschedule the due jobs and return the (job, run_time) pairs to run."""
+        now = datetime.now().astimezone()
+        grace = timedelta(seconds=self.misfire_grace_time)
+        batch = []
+        for job in jobs:
+            run_time = job.next_run_time
+            # Coalesce: run once however many fire times were missed
+            next_run_time = job.trigger.get_next_fire_time(run_time, now)
+            while next_run_time is not None and next_run_time <= now:
+                next_run_time = job.trigger.get_next_fire_time(next_run_time, now)
+            job.next_run_time = next_run_time
+            if next_run_time is None:
+                del self._jobs[job.id]
+            else:
+                self._bucket(job)
+
+            if now - run_time > grace:
+                logging.warning(f"Run time of job {job.id} was missed by {now - run_time}")
+                self._dispatch(JobExecutionEvent(EVENT_JOB_MISSED, job.id, JOBSTORE, run_time))
+            else:
+                batch.append((job, run_time))
+            if next_run_time is None:
+                # The trigger is exhausted; APScheduler reports this as a removal
+                self._dispatch(JobEvent(EVENT_JOB_REMOVED, job.id, JOBSTORE))
+        return batch
+
+    def _execute(self, batch):
+        by_func = {}
+        for job, run_time in batch:
+            self._dispatch(JobSubmissionEvent(EVENT_JOB_SUBMITTED, job.id, JOBSTORE, [run_time]))
+            by_func.setdefault(job.func, []).append((job, run_time))
+
+        for func, entries in by_func.items():
+            handler = self.batch_handlers.get(func)
+            if handler is not None:
+                self._run_batch(handler, entries)
+            else:
+                handler = lambda batch, run_times: [func(*args) for args in batch]  # noqa: E731
+                for entry in entries:
+                    self._run_batch(handler, [entry])
+
+    def _run_batch(self, handler, entries):
+        try:
+            results = handler(
+                [job.args for job, _ in entries], [run_time for _, run_time in entries]
+            )
+        except Exception as ex:
+            logging.exception(f"Batch of {len(entries)} jobs raised an exception")
+            for job, run_time in entries:
+                self._dispatch(
+                    JobExecutionEvent(EVENT_JOB_ERROR, job.id, JOBSTORE, run_time, exception=ex)
+                )
+            return
+        for (job, run_time), result in zip(entries, results):
+            self._dispatch(
+                JobExecutionEvent(EVENT_JOB_EXECUTED, job.id, JOBSTORE, run_time, retval=result)
+            )
+
+    def _dispatch(self, event):
+        for callback, mask in self._listeners:
+            if event.code & mask:
+                try:
+                    callback(event)
+                except Exception:
+                    logging.exception(f"Error notifying listener {callback}")
@@ -0,0 +1,331 @@
+"""Incremental trigger history analytics over Log/Neuron.log.
+
+The log is memory-mapped and scanned with one compiled regular expression,
+so only the pages being matched are resident, however large the file is.
+Each update resumes from the offset saved with the aggregates and reads at
+most `budget_bytes`. Callbacks do not update themselves: `refresh` catches
+up on a background thread in chunks of CATCH_UP_CHUNK_BYTES, and `reading`
+waits for at most the chunk being folded, so a first scan of a multi-GB
+log never blocks a render for long.
+
+Two records are parsed, both written by app.py:
+
+    <asctime>: INFO: Scheduled reminder <id> at <time> with type <type>
+    <asctime>: INFO: Reminder <id> with message <message> and
+                type <type> triggered at <time>[, due <time>]
+
+Older logs have no "due" part; the delay is then only known for "Once only"
+reminders, whose due time is the time they were scheduled at.
+"""
+import json
+import logging
+import mmap
+import os
+import re
+import time
+from collections import Counter
+from contextlib import contextmanager
+from datetime import datetime
+from threading import Lock, Thread
+
+from utils.metrics import Histogram
+
+# Seconds between a reminder's due time and the moment it fired
+DELAY_BUCKETS = (0.1, 0.5, 1, 2.5, 5, 10, 30, 60, 300, 900, 3600)
+DEFAULT_BUDGET_BYTES = 256 * 1024 * 1024
+# Read per update when catching up in the background; readers wait for at
+# most one chunk
+CATCH_UP_CHUNK_BYTES = 4 * 1024 * 1024
+# The saved state grows with the number of reminders, so it is not
+# rewritten on every update
+SAVE_INTERVAL_SECONDS = 30
+
+RECORD = re.compile(
+    rb": INFO: (?:"
+    rb"Scheduled reminder (\S+) at ([^\n]+?) with type ([^\n]+)"
+    rb"|"
+    rb"Reminder (\S+) with message ([^\n]*) and\n"
+    rb"[ \t]+type ([^\n]+?) triggered at ([^\n,]+)(?:, due ([^\n]+))?"
+    rb")$",
+    re.MULTILINE,
+)
+# First line of a trigger record whose second line is not written yet
+PARTIAL_TRIGGER = re.compile(rb": INFO: Reminder \S+ with message [^\n]* and$")
+ONCE_ONLY = b"Once only"
+NO_DUE = b"None"
+
+
+def parse_time(value):
+    try:
+        return datetime.fromisoformat(value.decode("utf-8"))
+    except ValueError:
+        return None
+
+
+class TriggerHistory:
+    """Aggregates of every trigger and schedule record read so far.
+
+    Ids, types, messages and times stay the bytes they were in the log
+    until they are shown or saved, which keeps folding millions of records
+    cheap. Use the accessors for decoded values.
+    """
+
+    def __init__(self):
+        self.fires_by_reminder = Counter()
+        self.fires_by_type = Counter()
+        self.fires_by_hour = [0] * 24
+        self.scheduled_by_type = Counter()
+        self.messages = {}
+        self.once_only_due = {}
+        self.delay = Histogram(DELAY_BUCKETS)
+        self.max_delay = 0.0
+
+    @property
+    def fires(self):
+        return sum(self.fires_by_type.values())
+
+    def fold(self, matches):
+        """Add the RECORD matches to the aggregates."""
+        fires_by_reminder = self.fires_by_reminder
+        fires_by_type = self.fires_by_type
+        fires_by_hour = self.fires_by_hour
+        messages = self.messages
+        once_only_due = self.once_only_due
+        for match in matches:
+            (
+                scheduled_id,
+                scheduled_at,
+                scheduled_type,
+                reminder_id,
+                message,
+                reminder_type,
+                triggered_at,
+                due,
+            ) = match.groups()
+            if scheduled_id is not None:
+                self.scheduled_by_type[scheduled_type] += 1
+                if scheduled_type == ONCE_ONLY:
+                    once_only_due[scheduled_id] = scheduled_at
+                else:
+                    once_only_due.pop(scheduled_id, None)
+                continue
+
+            fires_by_reminder[reminder_id] += 1
+            fires_by_type[reminder_type] += 1
+            messages[reminder_id] = message
+            fired = parse_time(triggered_at)
+            if fired is None:
+                continue
+            fires_by_hour[fired.hour] += 1
+            if due in (None, NO_DUE) and reminder_type == ONCE_ONLY:
+                # Older logs write "due None" for one-off reminders
+                due = once_only_due.get(reminder_id)
+            due = parse_time(due) if due else None
+            if due is not None and due <= fired:
+                self.observe_delay((fired - due).total_seconds())
+
+    def observe_delay(self, delay):
+        self.delay.observe(delay)
+        self.max_delay = max(self.max_delay, delay)
+
+    def delay_quantile(self, quantile):
+        """Upper bound of the delay bucket holding `quantile` of the fires."""
+        if not self.delay.count:
+            return None
+        rank = quantile * self.delay.count
+        seen = 0
+        for bound, count in zip(self.delay.buckets, self.delay.counts):
+            seen += count
+            if seen >= rank:
+                return min(bound, self.max_delay)
+        return self.max_delay
+
+    def by_type(self):
+        """Map each reminder type to (fires, times scheduled)."""
+        reminder_types = sorted(set(self.fires_by_type) | set(self.scheduled_by_type))
+        return {
+            reminder_type.decode("utf-8"): (
+                self.fires_by_type[reminder_type],
+                self.scheduled_by_type[reminder_type],
+            )
+            for reminder_type in reminder_types
+        }
+
+    def top_reminders(self, limit=None, offset=0):
+        """Return (reminder id, message, fires) from the most fired down."""
+        ranked = self.fires_by_reminder.most_common(offset + limit if limit else None)
+        return [
+            (
+                reminder_id.decode("utf-8"),
+                self.messages.get(reminder_id, b"").decode("utf-8", "replace"),
+                fires,
+            )
+            for reminder_id, fires in ranked[offset:]
+        ]
+
+    def to_json(self):
+        def text(values):
+            return {
+                key.decode("utf-8", "replace"): (
+                    value.decode("utf-8", "replace") if isinstance(value, bytes) else value
+                )
+                for key, value in values.items()
+            }
+
+        return {
+            "fires_by_reminder": text(self.fires_by_reminder),
+            "fires_by_type": text(self.fires_by_type),
+            "fires_by_hour": self.fires_by_hour,
+            "scheduled_by_type": text(self.scheduled_by_type),
+            "messages": text(self.messages),
+            "once_only_due": text(self.once_only_due),
+            "delay_counts": self.delay.counts,
+            "delay_sum": self.delay.sum,
+            "max_delay": self.max_delay,
+        }
+
+    @classmethod
+    def from_json(cls, state):
+        def raw(values):
+            return {
+                key.encode("utf-8"): value.encode("utf-8") if isinstance(value, str) else value
+                for key, value in values.items()
+            }
+
+        history = cls()
+        history.fires_by_reminder.update(raw(state["fires_by_reminder"]))
+        history.fires_by_type.update(raw(state["fires_by_type"]))
+        history.fires_by_hour = state["fires_by_hour"]
+        history.scheduled_by_type.update(raw(state["scheduled_by_type"]))
+        history.messages = raw(state["messages"])
+        history.once_only_due = raw(state["once_only_due"])
+        history.delay.counts = state["delay_counts"]
+        history.delay.count = sum(history.delay.counts)
+        history.delay.sum = state["delay_sum"]
+        history.max_delay = state["max_delay"]
+        return history
+
+
+class LogAnalyzer:
+    """Fold Neuron.log into a TriggerHistory, resuming from a saved offset.
+
+    The offset, the log's inode and the aggregates are saved together in
+    `state_path`. When RotatingFileHandler rotates the log, the rest of the
+    rotated file is read first if it is still Neuron.log.1, then the new log
+    from its start.
+    """
+
+    def __init__(self, log_path, state_path):
+        self.log_path = log_path
+        self.state_path = state_path
+        self._lock = Lock()
+        self.history = TriggerHistory()
+        self.inode = None
+        self.offset = 0
+        self.size = 0
+        self._saved_at = float("-inf")
+        self._refreshing = False
+        self._load()
+
+    def _load(self):
+        try:
+            with open(self.state_path, encoding="utf-8") as state_file:
+                state = json.load(state_file)
+            self.history = TriggerHistory.from_json(state["history"])
+            self.inode = state["inode"]
+            self.offset = state["offset"]
+        except FileNotFoundError:
+            pass
+        except (ValueError, KeyError, TypeError):
+            # A state from an incompatible version is rebuilt from the log
+            self.history = TriggerHistory()
+
+    def _save(self, force=False):
+        if not force and time.monotonic() - self._saved_at < SAVE_INTERVAL_SECONDS:
+            return
+        self._saved_at = time.monotonic()
+        state = {"inode": self.inode, "offset": self.offset, "history": self.history.to_json()}
+        temporary = f"{self.state_path}.tmp"
+        with open(temporary, "w", encoding="utf-8") as state_file:
+            json.dump(state, state_file)
+        os.replace(temporary, self.state_path)
+
+    def update(self, budget_bytes=DEFAULT_BUDGET_BYTES):
+        """Read up to `budget_bytes` of new log and return the bytes read."""
+        with self._lock:
+            try:
+                stat = os.stat(self.log_path)
+            except FileNotFoundError:
+                return 0
+            read = 0
+            if self.inode is not None and stat.st_ino != self.inode:
+                read += self._finish_rotated(budget_bytes)
+                if self.inode is not None:
+                    # Still inside the rotated file, the budget is spent
+                    self._save(force=True)
+                    return read
+            if self.inode is None or stat.st_size < self.offset:
+                # A new file, or one that was truncated in place
+                self.inode, self.offset = stat.st_ino, 0
+            self.size = stat.st_size
+            read += self._scan(self.log_path, budget_bytes - read)
+            if read:
+                self._save()
+            return read
+
+    def refresh(self):
+        """Catch up with the log on a background thread, unless one already is."""
+        with self._lock:
+            if self._refreshing:
+                return
+            self._refreshing = True
+        Thread(target=self._catch_up, name="LogAnalyzer", daemon=True).start()
+
+    def _catch_up(self):
+        try:
+            while self.update(CATCH_UP_CHUNK_BYTES):
+                pass
+        except Exception:
+            logging.exception("Failed to read trigger history from the log")
+        finally:
+            self._refreshing = False
+
+    @contextmanager
+    def reading(self):
+        """Hold off updates while the caller reads `history`."""
+        with self._lock:
+            yield self.history
+
+    def _finish_rotated(self, budget_bytes):
+        rotated = f"{self.log_path}.1"
+        try:
+            if os.stat(rotated).st_ino != self.inode:
+                raise FileNotFoundError(rotated)
+        except FileNotFoundError:
+            # Rotated away more than once; what remained of it is lost
+            self.inode, self.offset = None, 0
+            return 0
+        read = self._scan(rotated, budget_bytes)
+        if self.offset >= os.stat(rotated).st_size:
+            self.inode, self.offset = None, 0
+        return read
+
+    def _scan(self, path, budget_bytes):
+        with open(path, "rb") as log_file:
+            size = os.fstat(log_file.fileno()).st_size
+            if size <= self.offset or budget_bytes <= 0:
+                return 0
+            with mmap.mmap(log_file.fileno(), 0, access=mmap.ACCESS_READ) as view:
+                end = min(size, self.offset + budget_bytes)
+                # Stop after the last complete line, and before a trigger
+                # record that is still missing its second line
+                end = view.rfind(b"\n", self.offset, end) + 1
+                if end <= self.offset:
+                    return 0
+                last_line = max(self.offset, view.rfind(b"\n", self.offset, end - 1) + 1)
+                if PARTIAL_TRIGGER.search(view, last_line, end - 1):
+                    end = last_line
+                start = self.offset
+                self.history.fold(RECORD.finditer(view, start, end))
+                self.offset = end
+                return end - start
@@ -0,0 +1,90 @@
+import atexit
+import json
+import logging
+import os
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler, WatchedFileHandler
+from queue import SimpleQueue
+
+LOG_FORMAT = "%(asctime)s: %(levelname)s: %(message)s"
+
+
+class lazy:
+    """Defer an expensive log argument until the record is actually formatted.
+
+    logging.debug("Jobs: %s", lazy(scheduler.get_jobs)) costs nothing when
+    DEBUG is disabled.
+    """
+
+    def __init__(self, func):
+        self.func = func
+
+    def __str__(self):
+        return str(self.func())
+
+
+class JsonLinesFormatter(logging.Formatter):
+    """Format each record as one JSON object per line."""
+
+    def format(self, record):
+        entry = {
+            "time": self.formatTime(record),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        if record.exc_info:
+            entry["exc_info"] = self.formatException(record.exc_info)
+        return json.dumps(entry, ensure_ascii=False)
+
+
+def configure_logging(
+    log_dir,
+    level=logging.INFO,
+    json_lines=False,
+    max_bytes=10 * 1024 * 1024,
+    backup_count=5,
+    rotate=True,
+):
+    """Route all logging through a queue to rotating files.
+
+    Callers only put records on an unbounded queue; a QueueListener thread
+    does the formatting and file I/O, so callbacks and scheduler jobs never
+    wait on the disk. Log/Neuron.log keeps the human-readable format, and
+    `json_lines` adds a Neuron.jsonl file next to it.
+
+    RotatingFileHandler is only safe with one process writing the files.
+    When several do, pass `rotate=False`: each process then appends through
+    a WatchedFileHandler, which reopens the file after an external tool
+    such as logrotate has moved it, and rotation is left to that tool.
+
+    Returns the listener, which is stopped (and flushed) at exit.
+    """
+    if not os.path.exists(log_dir):
+        os.makedirs(log_dir)
+
+    def file_handler(name):
+        path = os.path.join(log_dir, name)
+        if not rotate:
+            return WatchedFileHandler(path, encoding="utf-8")
+        return RotatingFileHandler(
+            path, maxBytes=max_bytes, backupCount=backup_count, encoding="utf-8"
+        )
+
+    text_handler = file_handler("Neuron.log")
+    text_handler.setFormatter(logging.Formatter(LOG_FORMAT))
+    handlers = [text_handler]
+
+    if json_lines:
+        json_handler = file_handler("Neuron.jsonl")
+        json_handler.setFormatter(JsonLinesFormatter())
+        handlers.append(json_handler)
+
+    log_queue = SimpleQueue()
+    listener = QueueListener(log_queue, *handlers, respect_handler_level=True)
+    # The queue handler only merges the message; the file handlers do the layout
+    logging.basicConfig(
+        handlers=[QueueHandler(log_queue)], level=level, format="%(message)s", force=True
+    )
+    listener.start()
+    atexit.register(listener.stop)
+    return listener
@@ -0,0 +1,206 @@
+from bisect import bisect_left
+from collections import defaultdict, deque
+from threading import Lock
+
+TRIGGER_LATENCY_WINDOW = 4096
+TRIGGER_LATENCY_QUANTILES = (0.5, 0.95, 0.99)
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+
+
+class Histogram:
+    """Cumulative-bucket histogram in the shape Prometheus expects."""
+
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def render(self, name, labels=""):
+        separator = "," if labels else ""
+        cumulative = 0
+        for bound, count in zip(self.buckets, self.counts):
+            cumulative += count
+            yield f'{name}_bucket{{{labels}{separator}le="{bound}"}} {cumulative}'
+        yield f'{name}_bucket{{{labels}{separator}le="+Inf"}} {self.count}'
+        label_block = f"{{{labels}}}" if labels else ""
+        yield f"{name}_sum{label_block} {self.sum}"
+        yield f"{name}_count{label_block} {self.count}"
+
+
+class RollingQuantiles:
+    """Quantiles over the most recent `size` samples.
+
+    Samples go into a ring buffer; sorting happens only when quantiles are
+    read, which is far rarer than recording.
+    """
+
+    def __init__(self, size=TRIGGER_LATENCY_WINDOW):
+        self.samples = deque(maxlen=size)
+        self.count = 0
+
+    def observe(self, value):
+        self.samples.append(value)
+        self.count += 1
+
+    def quantiles(self, quantiles=TRIGGER_LATENCY_QUANTILES):
+        if not self.samples:
+            return {}
+        ordered = sorted(self.samples)
+        return {q: ordered[min(len(ordered) - 1, int(q * len(ordered)))] for q in quantiles}
+
+
+class DriftAlert:
+    """Raise once when fire drift exceeds `threshold` seconds, then clear.
+
+    `observe` returns "raised" when drift first goes over the threshold and
+    "cleared" once it is back under half of it, so jobs finishing out of
+    order around the threshold do not make the alert flap.
+    """
+
+    def __init__(self, threshold):
+        self.threshold = threshold
+        self.active = False
+        self.raised = 0
+        self._lock = Lock()
+
+    def observe(self, drift):
+        with self._lock:
+            if drift > self.threshold and not self.active:
+                self.active = True
+                self.raised += 1
+                return "raised"
+            if drift <= self.threshold / 2 and self.active:
+                self.active = False
+                return "cleared"
+            return None
+
+
+class Metrics:
+    """Counters and histograms for callbacks and scheduler jobs.
+
+    Recording is a dict lookup and a bisect under one lock, cheap enough to
+    leave on in production.
+    """
+
+    def __init__(self):
+        self._lock = Lock()
+        self.callback_latency = defaultdict(lambda: Histogram(LATENCY_BUCKETS))
+        self.callback_request_bytes = defaultdict(lambda: Histogram(SIZE_BUCKETS))
+        self.callback_response_bytes = defaultdict(lambda: Histogram(SIZE_BUCKETS))
+        self.callback_errors = defaultdict(int)
+        self.job_events = defaultdict(int)
+        self.fire_delay = Histogram(LATENCY_BUCKETS)
+        self.trigger_latency = defaultdict(RollingQuantiles)
+        self.notifications = defaultdict(int)
+        self.notification_latency = defaultdict(lambda: Histogram(LATENCY_BUCKETS))
+
+    def record_callback(self, callback, seconds, request_bytes, response_bytes, failed):
+        with self._lock:
+            self.callback_latency[callback].observe(seconds)
+            self.callback_request_bytes[callback].observe(request_bytes)
+            self.callback_response_bytes[callback].observe(response_bytes)
+            if failed:
+                self.callback_errors[callback] += 1
+
+    def record_job_event(self, event, fire_delay=None):
+        with self._lock:
+            self.job_events[event] += 1
+            if fire_delay is not None:
+                self.fire_delay.observe(fire_delay)
+
+    def record_trigger_latency(self, stage, seconds):
+        with self._lock:
+            self.trigger_latency[stage].observe(seconds)
+
+    def record_notification(self, sink, outcome, count, seconds=None):
+        """Count triggers a notification sink delivered, retried, failed or dropped."""
+        with self._lock:
+            self.notifications[sink, outcome] += count
+            if seconds is not None:
+                self.notification_latency[sink].observe(seconds)
+
+    def render(self, gauges=None):
+        """Return every metric in the Prometheus text exposition format."""
+        lines = []
+        with self._lock:
+            lines += [
+                "# HELP neuron_callback_latency_seconds Server time spent in each Dash callback.",
+                "# TYPE neuron_callback_latency_seconds histogram",
+            ]
+            for callback, histogram in sorted(self.callback_latency.items()):
+                lines += histogram.render(
+                    "neuron_callback_latency_seconds", f'callback="{callback}"'
+                )
+            for name, histograms, help_text in (
+                ("neuron_callback_request_bytes", self.callback_request_bytes, "Callback request payload size."),
+                ("neuron_callback_response_bytes", self.callback_response_bytes, "Callback response payload size."),
+            ):
+                lines += [f"# HELP {name} {help_text}", f"# TYPE {name} histogram"]
+                for callback, histogram in sorted(histograms.items()):
+                    lines += histogram.render(name, f'callback="{callback}"')
+
+            lines += [
+                "# HELP neuron_callback_errors_total Callbacks that returned a server error.",
+                "# TYPE neuron_callback_errors_total counter",
+            ]
+            lines += [
+                f'neuron_callback_errors_total{{callback="{callback}"}} {count}'
+                for callback, count in sorted(self.callback_errors.items())
+            ]
+
+            lines += [
+                "# HELP neuron_scheduler_jobs_total Scheduler job events by outcome.",
+                "# TYPE neuron_scheduler_jobs_total counter",
+            ]
+            lines += [
+                f'neuron_scheduler_jobs_total{{event="{event}"}} {count}'
+                for event, count in sorted(self.job_events.items())
+            ]
+
+            lines += [
+                "# HELP neuron_scheduler_fire_delay_seconds Delay between a job's scheduled and actual start.",
+                "# TYPE neuron_scheduler_fire_delay_seconds histogram",
+            ]
+            lines += self.fire_delay.render("neuron_scheduler_fire_delay_seconds")
+
+            lines += [
+                "# HELP neuron_trigger_latency_seconds Trigger latency by stage over the most recent triggers.",
+                "# TYPE neuron_trigger_latency_seconds summary",
+            ]
+            for stage, rolling in sorted(self.trigger_latency.items()):
+                for quantile, value in rolling.quantiles().items():
+                    lines.append(
+                        f'neuron_trigger_latency_seconds{{stage="{stage}",quantile="{quantile}"}} {value}'
+                    )
+                lines.append(f'neuron_trigger_latency_seconds_count{{stage="{stage}"}} {rolling.count}')
+
+            lines += [
+                "# HELP neuron_notifications_total Triggers handled by each notification sink, by outcome.",
+                "# TYPE neuron_notifications_total counter",
+            ]
+            lines += [
+                f'neuron_notifications_total{{sink="{sink}",outcome="{outcome}"}} {count}'
+                for (sink, outcome), count in sorted(self.notifications.items())
+            ]
+            lines += [
+                "# HELP neuron_notification_delivery_seconds Time a notification sink took per delivered batch.",
+                "# TYPE neuron_notification_delivery_seconds histogram",
+            ]
+            for sink, histogram in sorted(self.notification_latency.items()):
+                lines += histogram.render("neuron_notification_delivery_seconds", f'sink="{sink}"')
+
+        for name, (value, help_text) in sorted((gauges or {}).items()):
+            lines += [f"# HELP {name} {help_text}", f"# TYPE {name} gauge"]
+            if isinstance(value, dict):
+                # Labelled gauge: maps a label string such as 'sink="file"' to a value
+                lines += [f"{name}{{{labels}}} {v}" for labels, v in sorted(value.items())]
+            else:
+                lines.append(f"{name} {value}")
+        return "\n".join(lines) + "\n"
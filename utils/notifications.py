@@ -0,0 +1,310 @@
+"""Fan triggered reminders out to notification sinks.
+
+trigger_reminders hands each batch of trigger events to a
+NotificationDispatcher and returns; the dispatcher puts the batch on a
+bounded queue per sink, and each sink has its own worker threads. A sink
+that is slow, failing or retrying therefore only ever holds up its own
+queue, never the scheduler threads that fire reminders nor the other
+sinks. When a sink's queue is full the batch is dropped for that sink and
+counted, rather than blocking the scheduler.
+
+A sink is an object with a `name` and a `deliver(events)` method that
+raises on failure. Failed deliveries are retried with exponential backoff
+up to `retries` times. A sink that delivers a batch in parts raises
+PartialDelivery with the events it did not get to, so a retry never
+repeats a notification that was already shown or posted.
+"""
+import json
+import logging
+import os
+import random
+import shutil
+import subprocess
+import sys
+import time
+import urllib.request
+from queue import Empty, Full, Queue
+from threading import Lock, Thread
+
+DEFAULT_QUEUE_SIZE = 1000
+# Events a worker takes from its queue per delivery during a burst
+DEFAULT_MAX_BATCH = 500
+DEFAULT_RETRIES = 3
+BACKOFF_SECONDS = 0.5
+MAX_BACKOFF_SECONDS = 30
+WEBHOOK_TIMEOUT_SECONDS = 5
+# Events per webhook request; a failed request is retried from its chunk
+WEBHOOK_CHUNK_SIZE = 100
+DESKTOP_TIMEOUT_SECONDS = 5
+
+_STOP = object()
+
+
+class PartialDelivery(Exception):
+    """A sink delivered only part of a batch; `undelivered` is the rest."""
+
+    def __init__(self, undelivered, error):
+        super().__init__(f"{len(undelivered)} event(s) undelivered: {error!r}")
+        self.undelivered = undelivered
+        self.error = error
+
+
+class ModalSink:
+    """Publish to the trigger event queue the browser modal reads."""
+
+    name = "modal"
+
+    def __init__(self, publish):
+        self.publish = publish
+
+    def deliver(self, events):
+        self.publish(events)
+
+
+class FileSink:
+    """Append each event to a file as one JSON object per line."""
+
+    name = "file"
+
+    def __init__(self, path):
+        self.path = path
+        directory = os.path.dirname(path)
+        if directory and not os.path.exists(directory):
+            os.makedirs(directory)
+
+    def deliver(self, events):
+        lines = "".join(json.dumps(event, ensure_ascii=False) + "\n" for event in events)
+        with open(self.path, "a", encoding="utf-8") as sink_file:
+            sink_file.write(lines)
+
+
+class WebhookSink:
+    """POST events as {"events": [...]} JSON to a URL, `chunk_size` at a time."""
+
+    name = "webhook"
+
+    def __init__(self, url, timeout=WEBHOOK_TIMEOUT_SECONDS, chunk_size=WEBHOOK_CHUNK_SIZE):
+        self.url = url
+        self.timeout = timeout
+        self.chunk_size = chunk_size
+
+    def deliver(self, events):
+        for position in range(0, len(events), self.chunk_size):
+            try:
+                self.post(events[position:position + self.chunk_size])
+            except Exception as error:
+                raise PartialDelivery(events[position:], error) from error
+
+    def post(self, events):
+        request = urllib.request.Request(
+            self.url,
+            data=json.dumps({"events": events}).encode("utf-8"),
+            method="POST",
+            headers={"Content-Type": "application/json"},
+        )
+        # urlopen raises for error statuses, which makes the batch retry
+        with urllib.request.urlopen(request, timeout=self.timeout) as response:
+            response.read()
+
+
+class DesktopSink:
+    """Show a desktop notification per event with notify-send or osascript."""
+
+    name = "desktop"
+
+    def __init__(self, title="Neuron", timeout=DESKTOP_TIMEOUT_SECONDS):
+        self.title = title
+        self.timeout = timeout
+
+    @staticmethod
+    def available():
+        if sys.platform == "darwin":
+            return shutil.which("osascript") is not None
+        return shutil.which("notify-send") is not None
+
+    def command(self, message):
+        if sys.platform == "darwin":
+            script = f"display notification {json.dumps(message)} with title {json.dumps(self.title)}"
+            return ["osascript", "-e", script]
+        return ["notify-send", "--app-name", self.title, self.title, message]
+
+    def deliver(self, events):
+        for position, event in enumerate(events):
+            try:
+                subprocess.run(
+                    self.command(event["message"]),
+                    check=True,
+                    timeout=self.timeout,
+                    stdout=subprocess.DEVNULL,
+                    stderr=subprocess.DEVNULL,
+                )
+            except Exception as error:
+                raise PartialDelivery(events[position:], error) from error
+
+
+class _SinkWorker:
+    """A sink's bounded queue and the threads delivering from it."""
+
+    def __init__(self, sink, queue_size, concurrency):
+        self.sink = sink
+        self.queue = Queue(maxsize=queue_size)
+        self.concurrency = concurrency
+        self.threads = []
+        self.dropping = False
+
+
+class NotificationDispatcher:
+    """Deliver trigger event batches to every sink concurrently.
+
+    Workers start on the first `submit`, so a dispatcher costs nothing in
+    processes that never fire a reminder. `metrics` receives per sink
+    outcome counts and delivery times through `record_notification`.
+    """
+
+    def __init__(
+        self,
+        metrics=None,
+        queue_size=DEFAULT_QUEUE_SIZE,
+        max_batch=DEFAULT_MAX_BATCH,
+        retries=DEFAULT_RETRIES,
+        backoff=BACKOFF_SECONDS,
+    ):
+        self.metrics = metrics
+        self.queue_size = queue_size
+        self.max_batch = max_batch
+        self.retries = retries
+        self.backoff = backoff
+        self._workers = {}
+        self._lock = Lock()
+        self.running = False
+
+    @property
+    def sinks(self):
+        return [worker.sink for worker in self._workers.values()]
+
+    def add_sink(self, sink, concurrency=1):
+        """Register a sink; `concurrency` threads deliver from its queue."""
+        with self._lock:
+            worker = self._workers[sink.name] = _SinkWorker(sink, self.queue_size, concurrency)
+            if self.running:
+                self._start_worker(worker)
+
+    def start(self):
+        with self._lock:
+            if self.running:
+                return
+            self.running = True
+            for worker in self._workers.values():
+                self._start_worker(worker)
+
+    def _start_worker(self, worker):
+        for index in range(worker.concurrency):
+            thread = Thread(
+                target=self._run,
+                args=(worker,),
+                name=f"Notify-{worker.sink.name}-{index}",
+                daemon=True,
+            )
+            worker.threads.append(thread)
+            thread.start()
+
+    def stop(self, timeout=None):
+        """Deliver what is already queued, then stop the workers."""
+        with self._lock:
+            if not self.running:
+                return
+            self.running = False
+            workers = list(self._workers.values())
+        deadline = None if timeout is None else time.monotonic() + timeout
+
+        def remaining():
+            return None if deadline is None else max(0, deadline - time.monotonic())
+
+        for worker in workers:
+            for _ in worker.threads:
+                try:
+                    worker.queue.put(_STOP, timeout=remaining())
+                except Full:
+                    # Still full at the deadline; the daemon threads die with the process
+                    break
+        for worker in workers:
+            for thread in worker.threads:
+                thread.join(remaining())
+            worker.threads = []
+
+    def submit(self, events):
+        """Queue a batch for every sink without ever blocking the caller."""
+        if not events:
+            return
+        if not self.running:
+            self.start()
+        for worker in list(self._workers.values()):
+            try:
+                worker.queue.put_nowait(events)
+            except Full:
+                self._record(worker.sink.name, "dropped", len(events))
+                if not worker.dropping:
+                    # Once per overflow; the dropped count is in the metrics
+                    worker.dropping = True
+                    logging.warning(
+                        f"Notification queue for {worker.sink.name} is full, "
+                        "dropping triggers until it drains"
+                    )
+            else:
+                worker.dropping = False
+
+    def queue_depths(self):
+        """Map each sink to the batches waiting in its queue."""
+        return {name: worker.queue.qsize() for name, worker in self._workers.items()}
+
+    def _run(self, worker):
+        while True:
+            batch = worker.queue.get()
+            if batch is _STOP:
+                return
+            events = list(batch)
+            stop = False
+            # Coalesce a burst into one delivery
+            while len(events) < self.max_batch:
+                try:
+                    batch = worker.queue.get_nowait()
+                except Empty:
+                    break
+                if batch is _STOP:
+                    stop = True
+                    break
+                events.extend(batch)
+            self._deliver(worker.sink, events)
+            if stop:
+                return
+
+    def _deliver(self, sink, events):
+        for attempt in range(self.retries + 1):
+            started = time.perf_counter()
+            try:
+                sink.deliver(events)
+            except Exception as error:
+                if isinstance(error, PartialDelivery):
+                    # Only what the sink did not deliver is retried
+                    delivered = len(events) - len(error.undelivered)
+                    if delivered:
+                        self._record(sink.name, "delivered", delivered, time.perf_counter() - started)
+                    events = error.undelivered
+                if attempt == self.retries:
+                    self._record(sink.name, "failed", len(events))
+                    logging.error(
+                        f"Notification sink {sink.name} failed to deliver "
+                        f"{len(events)} trigger(s): {error!r}"
+                    )
+                    return
+                self._record(sink.name, "retried", len(events))
+                # Full jitter keeps retrying workers from hammering in step
+                delay = min(MAX_BACKOFF_SECONDS, self.backoff * 2**attempt)
+                time.sleep(random.uniform(0, delay))
+            else:
+                self._record(sink.name, "delivered", len(events), time.perf_counter() - started)
+                return
+
+    def _record(self, sink_name, outcome, count, seconds=None):
+        if self.metrics is not None:
+            self.metrics.record_notification(sink_name, outcome, count, seconds)
@@ -0,0 +1,140 @@
+"""Expand reminders into their fire times over a window of days.
+
+The occurrences match the triggers app.build_trigger creates: "Daily" and
+"Once in every" step from the reminder's own start, while "Every Week",
+"Every Month" and "Every Year" are calendar rules on the time of day alone.
+
+Expansion is batched rather than asked of each trigger in turn. The
+window's dates are grouped once by weekday, day of month and (month, day).
+Every distinct (rule, time of day, zone) is then expanded once and shared
+by all reminders that use it. Day 31 and Feb 29 need no special cases:
+they only appear in the groups for months and years that have them, which
+is also when the trigger fires.
+
+Occurrences are on the server's wall clock, as the agenda shows them.
+Rules are expanded on the wall clock of each reminder's zone over a window
+a day wider on each side, then converted, which also moves a time skipped
+by a DST change to when the trigger actually fires it.
+"""
+from collections import defaultdict
+from datetime import datetime, timedelta
+from functools import lru_cache
+
+from utils.reminder_store import from_seconds, to_seconds
+from utils.timezones import local_zone_name, zone_name, zone_table
+
+SUNDAY = 6
+
+
+class WindowCalendar:
+    """Every date from `first` to `last` inclusive, grouped by recurrence key."""
+
+    def __init__(self, first, last):
+        self.first = first
+        self.last = last
+        self.by_weekday = defaultdict(list)
+        self.by_day = defaultdict(list)
+        self.by_month_day = defaultdict(list)
+        day = first
+        while day <= last:
+            self.by_weekday[day.weekday()].append(day)
+            self.by_day[day.day].append(day)
+            self.by_month_day[(day.month, day.day)].append(day)
+            day += timedelta(days=1)
+
+
+@lru_cache(maxsize=16)
+def window_calendar(first, last):
+    return WindowCalendar(first, last)
+
+
+def stepped_dates(calendar, first_date, step):
+    """Dates from `first_date` every `step` days up to the end of the window."""
+    dates = []
+    day = first_date
+    while day <= calendar.last:
+        dates.append(day)
+        day += timedelta(days=step)
+    return dates
+
+
+def recurrence_rule(reminder, calendar):
+    """Return a hashable rule for a recurring reminder, or None.
+
+    Reminders with equal rules fire on the same dates of the window.
+    """
+    moment = reminder.reminder_datetime
+    if reminder.reminder_type == "Every Week":
+        return ("weekday", SUNDAY)
+    if reminder.reminder_type == "Every Month":
+        return ("day", moment.day)
+    if reminder.reminder_type == "Every Year":
+        return ("month_day", (moment.month, moment.day))
+    if reminder.reminder_type == "Daily":
+        step = 1
+    elif reminder.reminder_type == "Once in every" and reminder.n_days:
+        step = reminder.n_days
+    else:
+        return None
+    # Interval triggers start at the reminder itself; the rule keeps only the
+    # first date in the window, so reminders in phase share it
+    start_date = moment.date()
+    offset = (calendar.first - start_date).days
+    skipped = max(0, -(-offset // step))
+    return ("step", start_date + timedelta(days=skipped * step), step)
+
+
+def rule_dates(rule, calendar):
+    kind, value = rule[0], rule[1]
+    if kind == "weekday":
+        return calendar.by_weekday[value]
+    if kind == "day":
+        return calendar.by_day[value]
+    if kind == "month_day":
+        return calendar.by_month_day[value]
+    return stepped_dates(calendar, value, rule[2])
+
+
+def local_fire_times(wall_times, zone, first, last):
+    """Convert sorted wall times in `zone` to the server's, keeping `first` to `last`."""
+    table = zone_table(zone_name(zone))
+    local = zone_table(local_zone_name())
+    fire_times = []
+    for wall_time in wall_times:
+        fire_time = from_seconds(local.to_wall(table.to_utc(to_seconds(wall_time))))
+        if first <= fire_time.date() <= last:
+            fire_times.append(fire_time)
+    return fire_times
+
+
+def expand(reminders, first, last):
+    """Map each reminder id to its sorted fire times from `first` to `last`.
+
+    `first` and `last` are dates; both days are included. Reminders that share
+    a rule, time of day and zone share one list, so treat the lists as
+    read-only.
+    """
+    calendar = window_calendar(first - timedelta(days=1), last + timedelta(days=1))
+    shared = {}
+    occurrences = {}
+    for reminder in reminders:
+        moment = reminder.reminder_datetime
+        rule = recurrence_rule(reminder, calendar)
+        if rule is None:
+            once = reminder.reminder_type == "Once only"
+            occurrences[reminder.reminder_id] = (
+                local_fire_times([moment], reminder.zone, first, last) if once else []
+            )
+            continue
+
+        key = (rule, moment.time(), reminder.zone)
+        fire_times = shared.get(key)
+        if fire_times is None:
+            fire_times = shared[key] = local_fire_times(
+                (datetime.combine(day, moment.time()) for day in rule_dates(rule, calendar)),
+                reminder.zone,
+                first,
+                last,
+            )
+        occurrences[reminder.reminder_id] = fire_times
+    return occurrences
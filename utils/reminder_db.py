@@ -0,0 +1,235 @@
+import sqlite3
+from datetime import datetime
+from threading import Lock
+
+from utils.reminder_store import Reminder, from_seconds
+from utils.timezones import to_utc_datetime, zone_table
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS reminders (
+    reminder_id   TEXT PRIMARY KEY,
+    message       TEXT NOT NULL,
+    reminder_type TEXT NOT NULL,
+    reminder_at   INTEGER NOT NULL,
+    n_days        INTEGER,
+    zone          TEXT,
+    last_fired_at INTEGER,
+    updated_at    INTEGER NOT NULL
+) WITHOUT ROWID;
+-- Reminders are only ever loaded whole or by id; older databases had
+-- indexes for time and type queries that nothing runs
+DROP INDEX IF EXISTS reminders_by_reminder_at;
+DROP INDEX IF EXISTS reminders_by_type;
+
+CREATE TABLE IF NOT EXISTS trigger_history (
+    trigger_id      INTEGER PRIMARY KEY,
+    reminder_id     TEXT NOT NULL,
+    message         TEXT NOT NULL,
+    triggered_at    INTEGER NOT NULL,
+    acknowledged_at INTEGER,
+    action          TEXT
+);
+CREATE INDEX IF NOT EXISTS trigger_history_missed
+    ON trigger_history (triggered_at) WHERE acknowledged_at IS NULL;
+"""
+
+
+def to_epoch(value, zone=None):
+    """Epoch seconds of a naive time on the wall clock of `zone`, or the server's."""
+    if value is None:
+        return None
+    if zone is not None:
+        value = to_utc_datetime(value, zone)
+    return int(value.timestamp())
+
+
+def from_epoch(value, zone=None):
+    if value is None:
+        return None
+    if zone is not None:
+        return from_seconds(zone_table(zone).to_wall(value))
+    return datetime.fromtimestamp(value)
+
+
+class ReminderDatabase:
+    """SQLite persistence for reminders.
+
+    Reminders are stored as plain columns, with times as epoch seconds,
+    so the scheduler jobs can be rebuilt from them on startup without
+    storing pickled job state. A reminder's time is the UTC instant of its
+    wall clock time plus its zone, NULL for the server's zone.
+    """
+
+    def __init__(self, path):
+        self._lock = Lock()
+        self._connection = sqlite3.connect(path, check_same_thread=False)
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute("PRAGMA synchronous=NORMAL")
+        self._connection.executescript(SCHEMA)
+        columns = {row[1] for row in self._connection.execute("PRAGMA table_info(reminders)")}
+        if "zone" not in columns:
+            # Databases from before per-reminder zones
+            with self._connection:
+                self._connection.execute("ALTER TABLE reminders ADD COLUMN zone TEXT")
+
+    def close(self):
+        with self._lock:
+            self._connection.close()
+
+    def copy(self, path):
+        """Copy the database to `path` and return the copy, opened."""
+        target = sqlite3.connect(path)
+        try:
+            with self._lock:
+                self._connection.backup(target)
+        finally:
+            target.close()
+        return ReminderDatabase(path)
+
+    def upsert(self, reminder):
+        self.upsert_many([reminder])
+
+    def upsert_many(self, reminders):
+        now = to_epoch(datetime.now())
+        rows = (
+            (
+                r.reminder_id,
+                r.message,
+                r.reminder_type,
+                to_epoch(r.reminder_datetime, r.zone),
+                r.n_days,
+                r.zone,
+                now,
+            )
+            for r in reminders
+        )
+        with self._lock, self._connection:
+            self._connection.executemany(
+                """
+                INSERT INTO reminders
+                    (reminder_id, message, reminder_type, reminder_at, n_days, zone, updated_at)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT (reminder_id) DO UPDATE SET
+                    message = excluded.message,
+                    reminder_type = excluded.reminder_type,
+                    reminder_at = excluded.reminder_at,
+                    n_days = excluded.n_days,
+                    zone = excluded.zone,
+                    updated_at = excluded.updated_at
+                """,
+                rows,
+            )
+
+    def delete(self, reminder_id):
+        self.delete_many([reminder_id])
+
+    def delete_many(self, reminder_ids):
+        with self._lock, self._connection:
+            self._connection.executemany(
+                "DELETE FROM reminders WHERE reminder_id = ?",
+                ((reminder_id,) for reminder_id in reminder_ids),
+            )
+
+    def record_trigger(self, reminder_id, message, triggered_at):
+        """Append a trigger to the history and return its trigger id."""
+        with self._lock, self._connection:
+            cursor = self._connection.execute(
+                """
+                INSERT INTO trigger_history (reminder_id, message, triggered_at)
+                VALUES (?, ?, ?)
+                """,
+                (reminder_id, message, to_epoch(triggered_at)),
+            )
+            return cursor.lastrowid
+
+    def record_fired_many(self, fired, fired_at):
+        """Mark a batch of (reminder_id, message) as fired in one transaction.
+
+        Returns the trigger ids of the new history rows, in order.
+        """
+        epoch = to_epoch(fired_at)
+        with self._lock, self._connection:
+            self._connection.executemany(
+                "UPDATE reminders SET last_fired_at = ? WHERE reminder_id = ?",
+                [(epoch, reminder_id) for reminder_id, _ in fired],
+            )
+            return [
+                self._connection.execute(
+                    """
+                    INSERT INTO trigger_history (reminder_id, message, triggered_at)
+                    VALUES (?, ?, ?)
+                    """,
+                    (reminder_id, message, epoch),
+                ).lastrowid
+                for reminder_id, message in fired
+            ]
+
+    def acknowledge_triggers(self, trigger_ids, action, acknowledged_at):
+        with self._lock, self._connection:
+            self._connection.executemany(
+                """
+                UPDATE trigger_history SET acknowledged_at = ?, action = ?
+                WHERE trigger_id = ? AND acknowledged_at IS NULL
+                """,
+                [(to_epoch(acknowledged_at), action, t) for t in trigger_ids],
+            )
+
+    def missed_triggers(self, since, until, limit, offset=0):
+        """Return one page of unacknowledged triggers between since and until.
+
+        Newest first, as (total, [(reminder_id, message, triggered_at), ...]).
+        Both queries are range scans on the partial trigger_history_missed
+        index, so their cost depends on the window and not on how much
+        history has built up.
+        """
+        bounds = (to_epoch(since), to_epoch(until))
+        with self._lock:
+            (total,) = self._connection.execute(
+                """
+                SELECT COUNT(*) FROM trigger_history
+                WHERE acknowledged_at IS NULL AND triggered_at BETWEEN ? AND ?
+                """,
+                bounds,
+            ).fetchone()
+            rows = self._connection.execute(
+                """
+                SELECT reminder_id, message, triggered_at FROM trigger_history
+                WHERE acknowledged_at IS NULL AND triggered_at BETWEEN ? AND ?
+                ORDER BY triggered_at DESC
+                LIMIT ? OFFSET ?
+                """,
+                bounds + (limit, offset),
+            ).fetchall()
+        return total, [
+            (reminder_id, message, from_epoch(triggered_at))
+            for reminder_id, message, triggered_at in rows
+        ]
+
+    def load_all(self):
+        """Load every reminder in one pass.
+
+        Returns a list of (reminder, last_fired_at) pairs. Reminders that
+        never fired use the time they were last saved instead.
+        """
+        with self._lock:
+            rows = self._connection.execute(
+                """
+                SELECT reminder_id, message, reminder_type, reminder_at, n_days, zone,
+                       last_fired_at, updated_at
+                FROM reminders
+                """
+            ).fetchall()
+        return [
+            (
+                Reminder(
+                    reminder_id,
+                    message,
+                    reminder_type,
+                    from_epoch(reminder_at, zone),
+                    n_days,
+                    zone,
+                ),
+                from_epoch(last_fired_at or updated_at),
+            )
+            for reminder_id, message, reminder_type, reminder_at, n_days, zone, last_fired_at, updated_at in rows
+        ]
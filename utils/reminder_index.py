@@ -0,0 +1,183 @@
+"""Search indexes over reminders, maintained by ReminderStore.
+
+Messages go into an inverted index from lowercase word tokens to reminder
+ids. The tokens are also kept sorted, so a prefix query is a bisect to the
+first matching token followed by a walk over the adjacent ones, which is
+what search-as-you-type needs for the word being typed. Reminder type,
+reminder date and whether the reminder still has a next fire time have
+their own indexes. Every index is updated per reminder on add, edit and
+delete; nothing is rebuilt on query.
+"""
+import re
+from bisect import bisect_left, insort
+from collections import defaultdict
+from functools import lru_cache
+
+TOKEN = re.compile(r"\w+")
+# Above this share of the date range, filtering the date ordered index is
+# cheaper than sorting the candidates
+SCAN_RATIO = 0.125
+
+
+@lru_cache(maxsize=65536)
+def tokenize(text):
+    return frozenset(TOKEN.findall(text.casefold())) if text else frozenset()
+
+
+class ReminderIndex:
+    """Token, prefix and attribute indexes from which search returns ids.
+
+    Not thread-safe on its own; ReminderStore calls it under its lock.
+    """
+
+    def __init__(self):
+        self.postings = {}
+        self.vocabulary = []
+        self.by_type = defaultdict(set)
+        self.by_date = []
+        self.seconds = {}
+        self.inactive = set()
+
+    def add(self, reminder):
+        for token in tokenize(reminder.message):
+            ids = self.postings.get(token)
+            if ids is None:
+                ids = self.postings[token] = set()
+                insort(self.vocabulary, token)
+            ids.add(reminder.reminder_id)
+        self._add_attributes(reminder)
+        insort(self.by_date, (reminder.reminder_seconds, reminder.reminder_id))
+
+    def add_many(self, reminders):
+        """Add reminders that are not indexed yet, sorting only once."""
+        for reminder in reminders:
+            for token in tokenize(reminder.message):
+                self.postings.setdefault(token, set()).add(reminder.reminder_id)
+            self._add_attributes(reminder)
+            self.by_date.append((reminder.reminder_seconds, reminder.reminder_id))
+        self.vocabulary = sorted(self.postings)
+        self.by_date.sort()
+
+    def _add_attributes(self, reminder):
+        self.seconds[reminder.reminder_id] = reminder.reminder_seconds
+        self.by_type[reminder.type_code].add(reminder.reminder_id)
+        if reminder.next_fire_seconds is None:
+            self.inactive.add(reminder.reminder_id)
+
+    def remove(self, reminder):
+        reminder_id = reminder.reminder_id
+        for token in tokenize(reminder.message):
+            ids = self.postings.get(token)
+            if ids is None:
+                continue
+            ids.discard(reminder_id)
+            if not ids:
+                del self.postings[token]
+                del self.vocabulary[bisect_left(self.vocabulary, token)]
+        self.by_type[reminder.type_code].discard(reminder_id)
+        self.inactive.discard(reminder_id)
+        self.seconds.pop(reminder_id, None)
+        key = (reminder.reminder_seconds, reminder_id)
+        position = bisect_left(self.by_date, key)
+        if position < len(self.by_date) and self.by_date[position] == key:
+            del self.by_date[position]
+
+    def set_active(self, reminder_id, active):
+        if active:
+            self.inactive.discard(reminder_id)
+        else:
+            self.inactive.add(reminder_id)
+
+    def prefix_ids(self, prefix):
+        """Ids of reminders with a message token starting with `prefix`.
+
+        The returned set may be an index posting, so do not modify it.
+        """
+        vocabulary = self.vocabulary
+        position = bisect_left(vocabulary, prefix)
+        tokens = []
+        while position < len(vocabulary) and vocabulary[position].startswith(prefix):
+            tokens.append(vocabulary[position])
+            position += 1
+        if len(tokens) == 1:
+            return self.postings[tokens[0]]
+        return set().union(*(self.postings[token] for token in tokens))
+
+    def search(
+        self,
+        query=None,
+        type_code=None,
+        first=None,
+        last=None,
+        active=None,
+        limit=None,
+        offset=0,
+    ):
+        """Return (total, ids) of the reminders matching every filter.
+
+        Each word of `query` matches message tokens it is a prefix of.
+        `first` and `last` bound the reminder date in seconds, `last`
+        exclusive. `active` keeps only reminders that will (True) or will no
+        longer (False) fire. Ids are ordered by reminder date and the page
+        is `limit` ids from `offset`.
+        """
+        constraints = [self.prefix_ids(word) for word in tokenize(query)]
+        if type_code is not None:
+            constraints.append(self.by_type.get(type_code, set()))
+        if active is False:
+            constraints.append(self.inactive)
+        constraints.sort(key=len)
+
+        candidates = None
+        for ids in constraints:
+            if candidates is None:
+                candidates = ids
+            else:
+                candidates = candidates.intersection(ids)
+            if not candidates:
+                return 0, []
+        if active and candidates is not None:
+            candidates = candidates - self.inactive
+
+        start = 0 if first is None else bisect_left(self.by_date, (first,))
+        stop = len(self.by_date) if last is None else bisect_left(self.by_date, (last,))
+        stop = max(start, stop)
+        if candidates is not None and len(candidates) < SCAN_RATIO * (stop - start):
+            # Few candidates: sort them instead of walking the date range
+            keys = sorted(
+                key
+                for key in ((self.seconds[reminder_id], reminder_id) for reminder_id in candidates)
+                if (first is None or key[0] >= first) and (last is None or key[0] < last)
+            )
+            matches = [reminder_id for _, reminder_id in keys]
+            return len(matches), matches[offset:None if limit is None else offset + limit]
+
+        if candidates is None and not active:
+            # No filter but the date range, so the page needs no scan
+            total = stop - start
+            start = min(start + offset, stop)
+            if limit is not None:
+                stop = min(stop, start + limit)
+            return total, [reminder_id for _, reminder_id in self.by_date[start:stop]]
+
+        if candidates is None:
+            inactive = self.inactive
+
+            def keep(reminder_id):
+                return reminder_id not in inactive
+        else:
+            keep = candidates.__contains__
+        if first is None and last is None:
+            total = len(self.seconds) - len(self.inactive) if candidates is None else len(candidates)
+        else:
+            total = sum(1 for _, reminder_id in self.by_date[start:stop] if keep(reminder_id))
+        # Walk the date order only as far as the requested page
+        page = []
+        wanted = None if limit is None else offset + limit
+        for position in range(start, stop):
+            reminder_id = self.by_date[position][1]
+            if keep(reminder_id):
+                page.append(reminder_id)
+                if wanted is not None and len(page) >= wanted:
+                    break
+        return total, page[offset:]
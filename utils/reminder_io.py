@@ -0,0 +1,324 @@
+"""Streaming import and export of reminders as CSV, JSON lines and iCalendar."""
+import csv
+import io
+import json
+import re
+import unicodedata
+import uuid
+from datetime import datetime, timezone
+
+from components.reminderAIO import reminder_types
+from utils.reminder_store import Reminder
+from utils.timezones import from_utc_datetime, validate_zone
+
+FORMATS = ("csv", "jsonl", "ics")
+CSV_FIELDS = ["reminder_id", "message", "reminder_type", "reminder_datetime", "n_days", "zone"]
+MAX_MESSAGE_LENGTH = 60
+
+ICS_FREQUENCIES = {
+    "MONTHLY": "Every Month",
+    "YEARLY": "Every Year",
+}
+# RFC 5545 TEXT escapes, e.g. "\\," for a comma in a SUMMARY
+ICS_ESCAPES = {"\\": "\\\\", ";": "\\;", ",": "\\,", "\n": "\\n"}
+ICS_ESCAPED = re.compile(r"[\\;,\n]")
+ICS_UNESCAPED = {"\\": "\\", ";": ";", ",": ",", "n": "\n", "N": "\n"}
+ICS_ESCAPE = re.compile(r"\\([\\;,nN])")
+
+
+class ReminderValidationError(ValueError):
+    pass
+
+
+def parse_datetime(value, zone=None):
+    """Parse a naive wall time; times with an offset are converted to `zone`."""
+    if isinstance(value, datetime):
+        return value
+    if value is not None and not isinstance(value, str):
+        raise ReminderValidationError(f"invalid reminder_datetime {value!r}")
+    value = (value or "").strip()
+    for fmt in ("%Y-%m-%d %H:%M", "%Y-%m-%dT%H:%M"):
+        try:
+            return datetime.strptime(value, fmt)
+        except ValueError:
+            pass
+    try:
+        parsed = datetime.fromisoformat(value)
+    except ValueError:
+        raise ReminderValidationError(f"invalid reminder_datetime {value!r}")
+    if parsed.tzinfo is not None:
+        parsed = from_utc_datetime(parsed, zone)
+    return parsed
+
+
+def text_field(fields, name):
+    value = fields.get(name)
+    if value is not None and not isinstance(value, str):
+        raise ReminderValidationError(f"{name} must be a string")
+    if value and any(unicodedata.category(char) == "Cc" for char in value):
+        raise ReminderValidationError(f"{name} must not contain control characters")
+    return value or ""
+
+
+def validate_reminder(fields):
+    """Build a Reminder from a dict of raw field values, or raise."""
+    if not isinstance(fields, dict):
+        raise ReminderValidationError("record must be an object")
+    message = text_field(fields, "message").strip()
+    if not message:
+        raise ReminderValidationError("message is required")
+    if len(message) > MAX_MESSAGE_LENGTH:
+        raise ReminderValidationError(
+            f"message is longer than {MAX_MESSAGE_LENGTH} characters"
+        )
+
+    reminder_type = fields.get("reminder_type")
+    if reminder_type not in reminder_types:
+        raise ReminderValidationError(f"unknown reminder_type {reminder_type!r}")
+
+    n_days = fields.get("n_days")
+    if reminder_type == "Once in every":
+        try:
+            n_days = int(n_days)
+        except (TypeError, ValueError):
+            raise ReminderValidationError("n_days is required for 'Once in every'")
+        if n_days < 1:
+            raise ReminderValidationError("n_days must be positive")
+    else:
+        n_days = None
+
+    try:
+        zone = validate_zone(text_field(fields, "zone").strip())
+    except ValueError as ex:
+        raise ReminderValidationError(str(ex))
+
+    return Reminder(
+        text_field(fields, "reminder_id") or str(uuid.uuid4()),
+        message,
+        reminder_type,
+        parse_datetime(fields.get("reminder_datetime"), zone),
+        n_days,
+        zone,
+    )
+
+
+def read_csv(lines):
+    for row in csv.DictReader(lines):
+        yield row
+
+
+def read_jsonl(lines):
+    for line in lines:
+        line = line.strip()
+        if line:
+            try:
+                yield json.loads(line)
+            except ValueError as ex:
+                yield ReminderValidationError(f"invalid JSON: {ex}")
+
+
+def unfold_ics(lines):
+    """Join RFC 5545 folded continuation lines."""
+    current = None
+    for line in lines:
+        line = line.rstrip("\r\n")
+        if line[:1] in (" ", "\t") and current is not None:
+            current += line[1:]
+            continue
+        if current is not None:
+            yield current
+        current = line
+    if current is not None:
+        yield current
+
+
+def parse_ics_datetime(value):
+    if "T" not in value:
+        return datetime.strptime(value, "%Y%m%d")
+    if value.endswith("Z"):
+        parsed = datetime.strptime(value, "%Y%m%dT%H%M%SZ").replace(tzinfo=timezone.utc)
+        return parsed.astimezone().replace(tzinfo=None)
+    return datetime.strptime(value, "%Y%m%dT%H%M%S")
+
+
+def ics_reminder_type(value):
+    """Map an RRULE value to (reminder_type, n_days), or raise if no type fires like it."""
+    rule = dict(p.split("=", 1) for p in value.upper().split(";") if "=" in p)
+    # The week start only matters to BYDAY and BYWEEKNO rules, rejected below
+    rule.pop("WKST", None)
+    frequency = rule.pop("FREQ", None)
+    interval = rule.pop("INTERVAL", "1")
+    if not interval.isdigit() or int(interval) < 1:
+        raise ReminderValidationError(f"invalid RRULE interval {interval!r}")
+    interval = int(interval)
+
+    if frequency == "WEEKLY" and interval == 1 and rule == {"BYDAY": "SU"}:
+        return "Every Week", None
+    if not rule:
+        if frequency == "DAILY":
+            return ("Daily", None) if interval == 1 else ("Once in every", interval)
+        if frequency == "WEEKLY":
+            # Every Week reminders fire on Sundays, not on DTSTART's weekday
+            return "Once in every", 7 * interval
+        if frequency in ICS_FREQUENCIES and interval == 1:
+            return ICS_FREQUENCIES[frequency], None
+    raise ReminderValidationError(f"RRULE {value!r} matches no reminder_type")
+
+
+def ics_escape(text):
+    return ICS_ESCAPED.sub(lambda match: ICS_ESCAPES[match.group()], text)
+
+
+def ics_unescape(text):
+    return ICS_ESCAPE.sub(lambda match: ICS_UNESCAPED[match.group(1)], text)
+
+
+def read_ics(lines):
+    event = None
+    error = None
+    for line in unfold_ics(lines):
+        name, _, value = line.partition(":")
+        name, *parameters = name.split(";")
+        name = name.upper()
+
+        if name == "BEGIN" and value == "VEVENT":
+            event = {"reminder_type": "Once only"}
+            error = None
+        elif event is None:
+            continue
+        elif name == "END" and value == "VEVENT":
+            yield error or event
+            event = None
+        elif name == "UID":
+            event["reminder_id"] = ics_unescape(value)
+        elif name == "SUMMARY":
+            event["message"] = ics_unescape(value)
+        elif name == "DTSTART":
+            for parameter in parameters:
+                key, _, zone = parameter.partition("=")
+                if key.upper() == "TZID":
+                    try:
+                        event["zone"] = validate_zone(zone.strip('"'))
+                    except ValueError:
+                        # Not an IANA name, e.g. a Windows zone; use the server's
+                        pass
+            try:
+                event["reminder_datetime"] = parse_ics_datetime(value)
+            except ValueError:
+                event["reminder_datetime"] = value
+        elif name == "RRULE":
+            try:
+                event["reminder_type"], event["n_days"] = ics_reminder_type(value)
+            except ReminderValidationError as ex:
+                error = ex
+
+
+READERS = {"csv": read_csv, "jsonl": read_jsonl, "ics": read_ics}
+
+
+def read_reminders(lines, fmt):
+    """Parse and validate reminders one record at a time.
+
+    Yields (record_number, reminder, error) where exactly one of reminder
+    and error is set, so a bad record does not stop the import. Readers
+    yield an exception in place of a record they could not parse.
+    """
+    for number, fields in enumerate(READERS[fmt](lines), start=1):
+        if isinstance(fields, Exception):
+            yield number, None, str(fields)
+            continue
+        try:
+            yield number, validate_reminder(fields), None
+        except ReminderValidationError as ex:
+            yield number, None, str(ex)
+
+
+def read_reminder_ids(lines):
+    """Read reminder ids to delete, one per line or as JSON lines.
+
+    Yields (line_number, reminder_id, error) like read_reminders, so a
+    malformed line is rejected without failing the others.
+    """
+    for number, line in enumerate(lines, start=1):
+        line = line.strip()
+        if not line or line == "reminder_id":
+            continue
+        if not line.startswith("{"):
+            yield number, line.split(",", 1)[0], None
+            continue
+        try:
+            reminder_id = json.loads(line).get("reminder_id")
+        except ValueError as ex:
+            yield number, None, f"invalid JSON: {ex}"
+            continue
+        if isinstance(reminder_id, str) and reminder_id:
+            yield number, reminder_id, None
+        else:
+            yield number, None, "reminder_id is required"
+
+
+def reminder_to_dict(reminder):
+    return {
+        "reminder_id": reminder.reminder_id,
+        "message": reminder.message,
+        "reminder_type": reminder.reminder_type,
+        "reminder_datetime": reminder.reminder_datetime.strftime("%Y-%m-%d %H:%M"),
+        "n_days": reminder.n_days,
+        "zone": reminder.zone,
+    }
+
+
+def write_csv(reminders):
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=CSV_FIELDS)
+    writer.writeheader()
+    for reminder in reminders:
+        writer.writerow(reminder_to_dict(reminder))
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+    yield buffer.getvalue()
+
+
+def write_jsonl(reminders):
+    for reminder in reminders:
+        yield json.dumps(reminder_to_dict(reminder), ensure_ascii=False) + "\n"
+
+
+def ics_rrule(reminder):
+    if reminder.reminder_type == "Daily":
+        return "FREQ=DAILY"
+    if reminder.reminder_type == "Once in every":
+        return f"FREQ=DAILY;INTERVAL={reminder.n_days}"
+    if reminder.reminder_type == "Every Week":
+        return "FREQ=WEEKLY;BYDAY=SU"
+    if reminder.reminder_type == "Every Month":
+        return "FREQ=MONTHLY"
+    if reminder.reminder_type == "Every Year":
+        return "FREQ=YEARLY"
+    return None
+
+
+def write_ics(reminders):
+    yield "BEGIN:VCALENDAR\r\nVERSION:2.0\r\nPRODID:-//Neuron//Reminders//EN\r\n"
+    for reminder in reminders:
+        tzid = f";TZID={reminder.zone}" if reminder.zone else ""
+        lines = [
+            "BEGIN:VEVENT",
+            f"UID:{ics_escape(reminder.reminder_id)}",
+            f"DTSTART{tzid}:{reminder.reminder_datetime.strftime('%Y%m%dT%H%M%S')}",
+            f"SUMMARY:{ics_escape(reminder.message)}",
+        ]
+        rrule = ics_rrule(reminder)
+        if rrule:
+            lines.append(f"RRULE:{rrule}")
+        lines.append("END:VEVENT")
+        yield "\r\n".join(lines) + "\r\n"
+    yield "END:VCALENDAR\r\n"
+
+
+WRITERS = {"csv": write_csv, "jsonl": write_jsonl, "ics": write_ics}
+
+
+def write_reminders(reminders, fmt):
+    return WRITERS[fmt](reminders)
@@ -0,0 +1,274 @@
+import sys
+from bisect import bisect_left, insort
+from datetime import datetime, timedelta
+from threading import RLock
+
+from components.reminderAIO import reminder_types
+from utils.reminder_index import ReminderIndex
+
+# Sorts after every reminder id, for bisecting on fire time alone
+_MAX_ID = chr(0x10FFFF)
+
+_EPOCH = datetime(1970, 1, 1)
+_SECOND = timedelta(seconds=1)
+
+# Reminder types are stored as small ints; unknown types get the next code
+_TYPE_NAMES = list(reminder_types)
+_TYPE_CODES = {name: code for code, name in enumerate(_TYPE_NAMES)}
+
+
+def to_seconds(value):
+    """Seconds since 1970-01-01 on the naive local wall clock.
+
+    Unlike `timestamp()` this never consults the timezone, so every naive
+    datetime, including those in a DST gap or fold, converts back exactly.
+    """
+    return None if value is None else (value - _EPOCH) / _SECOND
+
+
+def from_seconds(value):
+    return None if value is None else _EPOCH + timedelta(seconds=value)
+
+
+def type_code(reminder_type):
+    code = _TYPE_CODES.get(reminder_type)
+    if code is None:
+        _TYPE_NAMES.append(reminder_type)
+        code = _TYPE_CODES[reminder_type] = len(_TYPE_NAMES) - 1
+    return code
+
+
+class Reminder:
+    """A reminder as defined by a ReminderAIO row.
+
+    Reminders are kept for the life of the process, often 100k of them, so
+    the record is slotted: times are float seconds (see `to_seconds`), the
+    type is a small int code and messages and zones are interned, so
+    repeated ones are stored once. The datetime attributes convert on access.
+
+    `reminder_datetime` is on the wall clock of `zone`, an IANA zone name,
+    or of the server's zone when `zone` is None. `next_fire_time` is always
+    on the server's wall clock, like every other time the app shows.
+    """
+
+    __slots__ = (
+        "reminder_id",
+        "message",
+        "type_code",
+        "n_days",
+        "zone",
+        "reminder_seconds",
+        "next_fire_seconds",
+    )
+
+    def __init__(
+        self,
+        reminder_id,
+        message,
+        reminder_type,
+        reminder_datetime,
+        n_days=None,
+        zone=None,
+    ):
+        self.reminder_id = reminder_id
+        self.message = sys.intern(message) if isinstance(message, str) else message
+        self.type_code = type_code(reminder_type)
+        self.n_days = n_days
+        self.zone = sys.intern(zone) if zone else None
+        self.reminder_seconds = self.next_fire_seconds = to_seconds(reminder_datetime)
+
+    @property
+    def reminder_type(self):
+        return _TYPE_NAMES[self.type_code]
+
+    @property
+    def reminder_datetime(self):
+        return from_seconds(self.reminder_seconds)
+
+    @property
+    def next_fire_time(self):
+        return from_seconds(self.next_fire_seconds)
+
+    @next_fire_time.setter
+    def next_fire_time(self, value):
+        self.next_fire_seconds = to_seconds(value)
+
+    def schedule_key(self):
+        """The fields that decide when the reminder fires."""
+        return (self.type_code, self.reminder_seconds, self.n_days, self.zone)
+
+    def __repr__(self):
+        return (
+            f"Reminder({self.reminder_id!r}, {self.message!r}, "
+            f"{self.reminder_type!r}, {self.reminder_datetime!r}, {self.n_days!r}, "
+            f"{self.zone!r})"
+        )
+
+
+class ReminderStore:
+    """In-process reminder store keyed by reminder id.
+
+    Reminders are also kept in a list sorted by next fire seconds so that
+    range queries are a bisect instead of a scan over every reminder, and
+    in the search indexes of utils/reminder_index.py. `version` changes whenever a reminder is added, replaced or removed, so
+    callers can cache results derived from the reminder definitions.
+    """
+
+    def __init__(self):
+        self._lock = RLock()
+        self._reminders = {}
+        self._fire_index = []
+        self._search_index = ReminderIndex()
+        self.version = 0
+
+    def __len__(self):
+        return len(self._reminders)
+
+    def __contains__(self, reminder_id):
+        return reminder_id in self._reminders
+
+    def __iter__(self):
+        with self._lock:
+            return iter(list(self._reminders.values()))
+
+    def get(self, reminder_id):
+        return self._reminders.get(reminder_id)
+
+    def upsert(self, reminder):
+        """Insert or replace a reminder and return the previous one, if any."""
+        with self._lock:
+            previous = self._reminders.get(reminder.reminder_id)
+            if previous is not None:
+                self._unindex(previous)
+                self._search_index.remove(previous)
+            self._reminders[reminder.reminder_id] = reminder
+            self._index(reminder)
+            self._search_index.add(reminder)
+            self.version += 1
+            return previous
+
+    def bulk_load(self, reminders):
+        """Add many reminders at once, sorting the fire time index only once.
+
+        Imports can repeat an id within a batch; the last reminder wins.
+        """
+        with self._lock:
+            reminders = list({r.reminder_id: r for r in reminders}.values())
+            for reminder in reminders:
+                previous = self._reminders.get(reminder.reminder_id)
+                if previous is not None:
+                    self._unindex(previous)
+                    self._search_index.remove(previous)
+                self._reminders[reminder.reminder_id] = reminder
+            self._search_index.add_many(reminders)
+            self._fire_index.extend(
+                (r.next_fire_seconds, r.reminder_id)
+                for r in reminders
+                if r.next_fire_seconds is not None
+            )
+            self._fire_index.sort()
+            self.version += 1
+
+    def clear(self):
+        with self._lock:
+            self._reminders = {}
+            self._fire_index = []
+            self._search_index = ReminderIndex()
+            self.version += 1
+
+    def remove(self, reminder_id):
+        with self._lock:
+            reminder = self._reminders.pop(reminder_id, None)
+            if reminder is not None:
+                self._unindex(reminder)
+                self._search_index.remove(reminder)
+                self.version += 1
+            return reminder
+
+    def set_next_fire_time(self, reminder_id, next_fire_time):
+        with self._lock:
+            reminder = self._reminders.get(reminder_id)
+            if reminder is None:
+                return None
+            self._unindex(reminder)
+            reminder.next_fire_time = next_fire_time
+            self._index(reminder)
+            self._search_index.set_active(reminder_id, next_fire_time is not None)
+            return reminder
+
+    def set_next_fire_times(self, next_fire_times):
+        """Update many next fire times at once and rebuild the index.
+
+        `next_fire_times` maps reminder ids to their new next fire time.
+        """
+        with self._lock:
+            for reminder_id, next_fire_time in next_fire_times.items():
+                reminder = self._reminders.get(reminder_id)
+                if reminder is not None:
+                    reminder.next_fire_time = next_fire_time
+                    self._search_index.set_active(reminder_id, next_fire_time is not None)
+            self._fire_index = sorted(
+                (r.next_fire_seconds, r.reminder_id)
+                for r in self._reminders.values()
+                if r.next_fire_seconds is not None
+            )
+
+    def upcoming(self, after, until=None, limit=None, offset=0):
+        """Return reminders whose next fire time is later than `after`.
+
+        Returns (total, reminders), where total counts every match up to
+        `until` and reminders is the `limit` sized page starting at `offset`,
+        ordered by next fire time.
+        """
+        with self._lock:
+            start = bisect_left(self._fire_index, (to_seconds(after), _MAX_ID))
+            stop = len(self._fire_index)
+            if until is not None:
+                stop = bisect_left(self._fire_index, (to_seconds(until), _MAX_ID), start)
+            total = stop - start
+            start = min(start + offset, stop)
+            if limit is not None:
+                stop = min(stop, start + limit)
+            return total, [
+                self._reminders[reminder_id]
+                for _, reminder_id in self._fire_index[start:stop]
+            ]
+
+    def _index(self, reminder):
+        if reminder.next_fire_seconds is not None:
+            insort(self._fire_index, (reminder.next_fire_seconds, reminder.reminder_id))
+
+    def _unindex(self, reminder):
+        if reminder.next_fire_seconds is None:
+            return
+        key = (reminder.next_fire_seconds, reminder.reminder_id)
+        position = bisect_left(self._fire_index, key)
+        if position < len(self._fire_index) and self._fire_index[position] == key:
+            del self._fire_index[position]
+
+    def search(
+        self,
+        query=None,
+        reminder_type=None,
+        first=None,
+        last=None,
+        active=None,
+        limit=None,
+        offset=0,
+    ):
+        """Return (total, reminders) matching a search, ordered by reminder date.
+
+        `first` and `last` are datetimes bounding the reminder date, `last`
+        exclusive; see ReminderIndex.search for the other filters.
+        """
+        with self._lock:
+            total, reminder_ids = self._search_index.search(
+                query,
+                None if reminder_type is None else type_code(reminder_type),
+                to_seconds(first),
+                to_seconds(last),
+                active,
+                limit,
+                offset,
+            )
+            return total, [self._reminders[reminder_id] for reminder_id in reminder_ids]
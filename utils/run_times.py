@@ -0,0 +1,43 @@
+"""Tell APScheduler jobs which run time they were submitted for.
+
+APScheduler calls a job function with the job's own arguments only, and
+the reminder store cannot stand in: a "Once only" job is removed, and its
+next fire time cleared, as soon as it is submitted, often before it runs.
+RunTimeExecutor keeps the run time in a thread-local while the job runs,
+for `current_run_time` to read. BucketScheduler hands run times to its
+batch handlers directly.
+"""
+import concurrent.futures
+from threading import local
+
+from apscheduler.executors.pool import BasePoolExecutor
+
+DEFAULT_MAX_WORKERS = 10
+
+_running = local()
+
+
+def current_run_time():
+    """The run time of the APScheduler job running on this thread, or None."""
+    return getattr(_running, "run_time", None)
+
+
+def _run_job(run_job, job, jobstore_alias, run_times, logger_name):
+    # Jobs are coalesced, so only the last run time runs
+    _running.run_time = run_times[-1]
+    try:
+        return run_job(job, jobstore_alias, run_times, logger_name)
+    finally:
+        _running.run_time = None
+
+
+class _RunTimePool(concurrent.futures.ThreadPoolExecutor):
+    def submit(self, fn, /, *args, **kwargs):
+        return super().submit(_run_job, fn, *args, **kwargs)
+
+
+class RunTimeExecutor(BasePoolExecutor):
+    """APScheduler's thread pool executor, recording each job's run time."""
+
+    def __init__(self, max_workers=DEFAULT_MAX_WORKERS):
+        super().__init__(_RunTimePool(max_workers))
@@ -0,0 +1,227 @@
+"""Local IPC between web workers and the scheduler daemon.
+
+Messages are JSON objects, one per line, over a Unix domain socket. A
+request is {"op": ..., **fields} and gets one {"ok": true, "result": ...}
+or {"ok": false, "error": ...} reply. The "subscribe" op instead keeps the
+connection open. It optionally streams a snapshot of every reminder as
+{"snapshot": [...], "first": bool} chunks, then sends {"events": [...]}
+batches from the daemon's event feed, with {"keepalive": true} lines
+while it is idle.
+"""
+import json
+import logging
+import os
+import socket
+import socketserver
+import time
+import uuid
+from datetime import datetime
+
+from utils.reminder_store import Reminder
+
+SNAPSHOT_CHUNK_SIZE = 1000
+KEEPALIVE_SECONDS = 15
+RECONNECT_MAX_SECONDS = 30
+
+
+class SchedulerUnavailable(ConnectionError):
+    pass
+
+
+class SchedulerError(RuntimeError):
+    pass
+
+
+def reminder_to_wire(reminder):
+    return {
+        "reminder_id": reminder.reminder_id,
+        "message": reminder.message,
+        "reminder_type": reminder.reminder_type,
+        "reminder_datetime": reminder.reminder_datetime.isoformat(),
+        "n_days": reminder.n_days,
+        "zone": reminder.zone,
+        "next_fire_time": (
+            reminder.next_fire_time.isoformat() if reminder.next_fire_time else None
+        ),
+    }
+
+
+def reminder_from_wire(fields):
+    reminder = Reminder(
+        fields["reminder_id"],
+        fields["message"],
+        fields["reminder_type"],
+        datetime.fromisoformat(fields["reminder_datetime"]),
+        fields.get("n_days"),
+        fields.get("zone"),
+    )
+    if "next_fire_time" in fields:
+        reminder.next_fire_time = parse_fire_time(fields["next_fire_time"])
+    return reminder
+
+
+def parse_fire_time(value):
+    return datetime.fromisoformat(value) if value else None
+
+
+def write_message(stream, message):
+    stream.write(json.dumps(message, default=str).encode("utf-8") + b"\n")
+    stream.flush()
+
+
+def acquire_leadership(lock_path):
+    """Block until this process holds the scheduler lock, then return its file.
+
+    The lock is an flock on `lock_path`, so it is released by the kernel
+    when the leader exits or crashes and the next waiting daemon takes over.
+    Keep the returned file open for as long as the process leads.
+    """
+    import fcntl
+
+    lock_file = open(lock_path, "a+")
+    try:
+        fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except BlockingIOError:
+        logging.info(f"Another scheduler holds {lock_path}, waiting as a standby")
+        fcntl.flock(lock_file, fcntl.LOCK_EX)
+    lock_file.seek(0)
+    lock_file.truncate()
+    lock_file.write(str(os.getpid()))
+    lock_file.flush()
+    return lock_file
+
+
+class RequestHandler(socketserver.StreamRequestHandler):
+    def handle(self):
+        for line in self.rfile:
+            try:
+                request = json.loads(line)
+                op = request.pop("op")
+            except (ValueError, KeyError, AttributeError):
+                write_message(self.wfile, {"ok": False, "error": "malformed request"})
+                continue
+            if op == "subscribe":
+                self.server.serve_subscription(self.wfile, **request)
+                return
+            handler = self.server.handlers.get(op)
+            if handler is None:
+                write_message(self.wfile, {"ok": False, "error": f"unknown op {op!r}"})
+                continue
+            try:
+                response = {"ok": True, "result": handler(**request)}
+            except Exception as ex:
+                logging.exception(f"Scheduler request {op} failed")
+                response = {"ok": False, "error": str(ex)}
+            write_message(self.wfile, response)
+
+
+class SchedulerServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    """Serve scheduler requests and the event feed on a Unix socket.
+
+    `handlers` maps op names to functions taking the request fields as
+    keyword arguments. `feed` is the TriggerEventQueue subscribers follow,
+    and `snapshot` returns the reminders sent to subscribers that need a
+    full resync.
+    """
+
+    daemon_threads = True
+
+    def __init__(self, path, handlers, feed, snapshot):
+        if os.path.exists(path):
+            # Only the lock holder gets here, so the socket is a stale leftover
+            os.unlink(path)
+        super().__init__(path, RequestHandler)
+        self.handlers = dict(handlers, ping=lambda: "pong")
+        self.feed = feed
+        self.snapshot = snapshot
+        # Changes on every start, so subscribers know their cursor is void
+        self.epoch = uuid.uuid4().hex
+
+    def serve_subscription(self, stream, epoch=None, cursor=None):
+        try:
+            resync = (
+                epoch != self.epoch
+                or cursor is None
+                or not self.feed.covers(cursor)
+            )
+            if resync:
+                cursor = self.feed.last_seq
+            write_message(
+                stream, {"ok": True, "epoch": self.epoch, "cursor": cursor, "resync": resync}
+            )
+            if resync:
+                reminders = [reminder_to_wire(r) for r in self.snapshot()]
+                for start in range(0, max(len(reminders), 1), SNAPSHOT_CHUNK_SIZE):
+                    write_message(
+                        stream,
+                        {
+                            "snapshot": reminders[start:start + SNAPSHOT_CHUNK_SIZE],
+                            "first": start == 0,
+                        },
+                    )
+            while True:
+                events, cursor = self.feed.wait(cursor, KEEPALIVE_SECONDS, SNAPSHOT_CHUNK_SIZE)
+                if events:
+                    write_message(stream, {"events": events, "cursor": cursor})
+                else:
+                    write_message(stream, {"keepalive": True})
+        except (BrokenPipeError, ConnectionResetError):
+            return
+
+
+class SchedulerClient:
+    """Client side of the scheduler socket, used by the web workers."""
+
+    def __init__(self, path, timeout=10):
+        self.path = path
+        self.timeout = timeout
+
+    def connect(self, timeout):
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        sock.settimeout(timeout)
+        try:
+            sock.connect(self.path)
+        except OSError as ex:
+            sock.close()
+            raise SchedulerUnavailable(f"Scheduler at {self.path} is unavailable: {ex}") from ex
+        return sock
+
+    def request(self, op, **fields):
+        with self.connect(self.timeout) as sock, sock.makefile("rwb") as stream:
+            try:
+                write_message(stream, dict(fields, op=op))
+                line = stream.readline()
+            except OSError as ex:
+                raise SchedulerUnavailable(f"Scheduler request {op} failed: {ex}") from ex
+        if not line:
+            raise SchedulerUnavailable(f"Scheduler closed the connection during {op}")
+        response = json.loads(line)
+        if not response["ok"]:
+            raise SchedulerError(response["error"])
+        return response.get("result")
+
+    def subscribe(self):
+        """Yield feed messages forever, reconnecting with backoff.
+
+        The cursor and daemon epoch are remembered across reconnects, so a
+        resync snapshot is only sent after a daemon restart or if this
+        subscriber fell too far behind.
+        """
+        epoch = cursor = None
+        delay = 1
+        while True:
+            try:
+                with self.connect(KEEPALIVE_SECONDS * 2) as sock, sock.makefile("rwb") as stream:
+                    write_message(stream, {"op": "subscribe", "epoch": epoch, "cursor": cursor})
+                    for line in stream:
+                        message = json.loads(line)
+                        if "epoch" in message:
+                            epoch = message["epoch"]
+                            delay = 1
+                        if "cursor" in message:
+                            cursor = message["cursor"]
+                        yield message
+            except (OSError, ValueError) as ex:
+                logging.warning(f"Lost the scheduler event feed: {ex}")
+            time.sleep(delay)
+            delay = min(delay * 2, RECONNECT_MAX_SECONDS)
@@ -0,0 +1,93 @@
+"""Startup timing behind `python app.py --profile-startup`.
+
+app.py imports this module first and marks the end of each startup phase.
+The report runs a fresh interpreter with `-X importtime` to split the
+import phase by top-level package as well.
+"""
+import json
+import os
+import subprocess
+import sys
+import time
+from collections import defaultdict
+
+STARTED = time.perf_counter()
+_marks = []
+
+
+def mark(phase):
+    """Record that `phase` has just finished."""
+    _marks.append((phase, time.perf_counter()))
+
+
+def phases():
+    """Return (phase, seconds) pairs in the order the phases finished."""
+    result = []
+    previous = STARTED
+    for phase, finished in _marks:
+        result.append((phase, finished - previous))
+        previous = finished
+    return result
+
+
+def import_times(importtime_output, module):
+    """Sum the cumulative `-X importtime` microseconds of `module`'s imports.
+
+    Only imports made directly while importing `module` are counted, grouped
+    by their top-level package.
+    """
+    totals = defaultdict(int)
+    depth = None
+    lines = [line for line in importtime_output.splitlines() if line.startswith("import time:")]
+    for line in reversed(lines):
+        _, cumulative, name = line[len("import time:"):].split("|")
+        indent = len(name) - len(name.lstrip())
+        name = name.strip()
+        if name == module:
+            depth = indent + 2
+            continue
+        if depth is not None and indent == depth:
+            totals[name.split(".")[0]] += int(cumulative)
+        elif depth is not None and indent < depth:
+            break
+    return sorted(totals.items(), key=lambda item: item[1], reverse=True)
+
+
+def run_report(module, measure, top=12):
+    """Profile a cold start of `module` in a child interpreter and print it.
+
+    `measure` names a function of the module that finishes starting up and
+    returns the phases as a JSON-serializable list of (phase, seconds).
+    """
+    # The child must find `module` however this script was started
+    script_dir = os.path.dirname(os.path.abspath(sys.argv[0]))
+    env = dict(os.environ)
+    env["PYTHONPATH"] = os.pathsep.join(filter(None, [script_dir, env.get("PYTHONPATH")]))
+    started = time.perf_counter()
+    child = subprocess.run(
+        [
+            sys.executable,
+            "-X",
+            "importtime",
+            "-c",
+            f"import json, {module}; print(json.dumps({module}.{measure}()))",
+        ],
+        capture_output=True,
+        text=True,
+        check=True,
+        env=env,
+    )
+    wall = time.perf_counter() - started
+    measured = json.loads(child.stdout.strip().splitlines()[-1])
+
+    print(f"Startup profile of {module} (child process wall time {wall:.3f}s)")
+    print()
+    print(f"{'Phase':40} {'Seconds':>10}")
+    for phase, seconds in measured:
+        print(f"{phase:40} {seconds:>10.3f}")
+    print(f"{'Total':40} {sum(s for _, s in measured):>10.3f}")
+    print()
+    print("Imports by top-level package (cumulative, includes their dependencies)")
+    print(f"{'Package':40} {'Seconds':>10}")
+    for package, microseconds in import_times(child.stderr, module)[:top]:
+        print(f"{package:40} {microseconds / 1e6:>10.3f}")
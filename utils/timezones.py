@@ -0,0 +1,248 @@
+"""Per-reminder time zones: cached DST transition tables and a wall-clock trigger.
+
+A reminder is defined on the wall clock of its IANA zone ("09:00 every day
+in Europe/Berlin"), or of the server's zone when it has none. Converting a
+wall time to an instant needs the zone's UTC offset at that moment, so each
+zone in use gets a ZoneTable: every offset change from last year to
+TABLE_YEARS ahead, found once by probing zoneinfo and then looked up by
+bisection. Times outside that span, such as old reminder dates, are
+converted by zoneinfo directly.
+
+WallClockTrigger is the APScheduler trigger for every reminder type. It
+steps through the rule's dates on the wall clock and converts each through
+the table, so a daily reminder stays at 09:00 across DST changes instead
+of drifting by an hour as a fixed 24 hour interval does. Nothing has to be
+rescheduled when a transition passes. Wall times that do not exist
+(spring forward) fire at the same instant zoneinfo gives them with
+fold=0, i.e. shifted forward by the gap; ambiguous ones (fall back) fire
+once, at the first occurrence.
+"""
+import calendar
+from bisect import bisect_right
+from datetime import date, datetime, time, timedelta, timezone
+from functools import lru_cache
+from zoneinfo import ZoneInfo, available_timezones
+
+import tzlocal
+from apscheduler.triggers.base import BaseTrigger
+
+from utils.reminder_store import from_seconds, to_seconds
+
+# Years after the current one that the transition tables cover
+TABLE_YEARS = 30
+# Offsets are probed this far apart; no zone's rules change the offset
+# twice within a week
+PROBE_SECONDS = 7 * 86400
+DAY_SECONDS = 86400
+
+
+@lru_cache(maxsize=1)
+def local_zone_name():
+    return tzlocal.get_localzone_name()
+
+
+@lru_cache(maxsize=1)
+def available_zones():
+    return sorted(available_timezones())
+
+
+def zone_name(zone):
+    """The IANA name a reminder's `zone` stands for; None is the server's zone."""
+    return zone or local_zone_name()
+
+
+def validate_zone(zone):
+    """Return `zone` if zoneinfo knows it, else raise ValueError."""
+    if zone:
+        try:
+            ZoneInfo(zone)
+        except (KeyError, ValueError):
+            raise ValueError(f"unknown time zone {zone!r}")
+    return zone or None
+
+
+class ZoneTable:
+    """Every UTC offset change of one zone, for conversions by bisection.
+
+    `instants[i]` is the UTC second from which `offsets[i]` applies. Times
+    outside the table fall back to zoneinfo.
+    """
+
+    def __init__(self, name, first_year=None, last_year=None):
+        this_year = date.today().year
+        first_year = first_year or this_year - 1
+        last_year = last_year or this_year + TABLE_YEARS
+        self.name = name
+        self.zone = ZoneInfo(name)
+        self.first = int(datetime(first_year, 1, 1, tzinfo=timezone.utc).timestamp())
+        self.last = int(datetime(last_year + 1, 1, 1, tzinfo=timezone.utc).timestamp())
+        self.instants = [self.first]
+        self.offsets = [self._probe(self.first)]
+        probe = self.first
+        while probe < self.last:
+            following = min(probe + PROBE_SECONDS, self.last)
+            offset = self._probe(following)
+            if offset != self.offsets[-1]:
+                self._add_transition(probe, following, offset)
+            probe = following
+
+    def _probe(self, instant):
+        return int(datetime.fromtimestamp(instant, self.zone).utcoffset().total_seconds())
+
+    def _add_transition(self, before, after, offset):
+        # Bisect to the first second with the new offset
+        while after - before > 1:
+            middle = (before + after) // 2
+            if self._probe(middle) == self.offsets[-1]:
+                before = middle
+            else:
+                after = middle
+        self.instants.append(after)
+        self.offsets.append(offset)
+
+    def offset_at(self, instant):
+        """UTC offset in seconds at `instant`, in UTC seconds."""
+        if self.first <= instant < self.last:
+            return self.offsets[bisect_right(self.instants, instant) - 1]
+        return int(datetime.fromtimestamp(instant, self.zone).utcoffset().total_seconds())
+
+    def to_wall(self, instant):
+        """Wall clock seconds (see reminder_store.to_seconds) at a UTC instant."""
+        return instant + self.offset_at(instant)
+
+    def to_utc(self, wall):
+        """UTC seconds of a wall clock time, resolved like zoneinfo with fold=0."""
+        if not self.first + DAY_SECONDS <= wall < self.last - DAY_SECONDS:
+            return from_seconds(wall).replace(tzinfo=self.zone).timestamp()
+        instants, offsets = self.instants, self.offsets
+        nearest = bisect_right(instants, wall) - 1
+        skipped = None
+        # Offsets are under a day, so only the neighbouring periods can hold
+        # the instant; the first that does is the earlier of a repeated time
+        for index in range(max(0, nearest - 1), min(len(instants), nearest + 2)):
+            instant = wall - offsets[index]
+            end = instants[index + 1] if index + 1 < len(instants) else self.last
+            if instant < instants[index]:
+                continue
+            if instant < end:
+                return instant
+            # Past this period's end: if the next period does not hold it
+            # either, the time was skipped by a forward change
+            skipped = instant
+        return skipped
+
+
+@lru_cache(maxsize=None)
+def zone_table(name):
+    return ZoneTable(name)
+
+
+def wall_to_local(wall, zone):
+    """Convert wall clock seconds in `zone` to the server's wall clock."""
+    return zone_table(local_zone_name()).to_wall(zone_table(zone_name(zone)).to_utc(wall))
+
+
+def to_utc_datetime(value, zone):
+    """The aware UTC datetime of a naive wall time in `zone`."""
+    return datetime.fromtimestamp(zone_table(zone_name(zone)).to_utc(to_seconds(value)), timezone.utc)
+
+
+def from_utc_datetime(value, zone):
+    """The naive wall time in `zone` of an aware datetime."""
+    return from_seconds(zone_table(zone_name(zone)).to_wall(value.timestamp()))
+
+
+class WallClockTrigger(BaseTrigger):
+    """Fire at a time of day on the dates of a rule, on a zone's wall clock.
+
+    `kind` and `value` are the rules of utils/recurrence.py plus "once":
+    ("once", date), ("step", (first date, days)), ("weekday", weekday),
+    ("day", day of month) and ("month_day", (month, day)). A trigger that
+    many reminders share should `memoize`: it then keeps its last answer,
+    so scheduling a batch of those reminders is one computation. There is
+    one trigger per job otherwise, hence the slots.
+    """
+
+    __slots__ = ("kind", "value", "time_of_day", "table", "seconds_of_day", "memoize", "_memo")
+
+    def __init__(self, kind, value, time_of_day, zone=None, memoize=False):
+        if kind == "step" and value[1] < 1:
+            raise ValueError(f"step must be at least one day, not {value[1]!r}")
+        self.kind = kind
+        self.value = value
+        self.time_of_day = time_of_day
+        self.table = zone_table(zone_name(zone))
+        self.seconds_of_day = time_of_day.hour * 3600 + time_of_day.minute * 60 + time_of_day.second
+        self.memoize = memoize
+        self._memo = None
+
+    def dates(self, first):
+        """The rule's dates from `first` on, in order."""
+        kind, value = self.kind, self.value
+        if kind == "once":
+            if value >= first:
+                yield value
+            return
+        if kind == "step":
+            start, step = value
+            day = start
+            if day < first:
+                day += timedelta(days=-(-(first - start).days // step) * step)
+            while day <= date.max - timedelta(days=step):
+                yield day
+                day += timedelta(days=step)
+            return
+        if kind == "weekday":
+            day = first + timedelta(days=(value - first.weekday()) % 7)
+            while day <= date.max - timedelta(days=7):
+                yield day
+                day += timedelta(days=7)
+            return
+        year, month = first.year, first.month
+        if kind == "month_day":
+            month, day = value
+            year += (month, day) < (first.month, first.day)
+            while year <= date.max.year:
+                if day <= calendar.monthrange(year, month)[1]:
+                    yield date(year, month, day)
+                year += 1
+            return
+        while year <= date.max.year:
+            if value <= calendar.monthrange(year, month)[1] and date(year, month, value) >= first:
+                yield date(year, month, value)
+            year, month = (year + 1, 1) if month == 12 else (year, month + 1)
+
+    def fire_instant(self, day):
+        return self.table.to_utc(to_seconds(datetime.combine(day, time())) + self.seconds_of_day)
+
+    def get_next_fire_time(self, previous_fire_time, now):
+        key = (previous_fire_time, None if previous_fire_time else now)
+        memo = self._memo
+        if memo is not None and memo[0] == key:
+            return memo[1]
+        if previous_fire_time is None and self.kind == "once":
+            # Like DateTrigger, even when past; the scheduler handles misfires
+            result = datetime.fromtimestamp(self.fire_instant(self.value), self.table.zone)
+        else:
+            after = (previous_fire_time or now).timestamp()
+            # A skipped or repeated hour moves a fire by less than a day, so
+            # the day before may still fire after `after`
+            first = from_seconds(self.table.to_wall(after)).date() - timedelta(days=1)
+            result = None
+            for day in self.dates(first):
+                instant = self.fire_instant(day)
+                if instant > after or (previous_fire_time is None and instant == after):
+                    result = datetime.fromtimestamp(instant, self.table.zone)
+                    break
+        if self.memoize:
+            self._memo = (key, result)
+        return result
+
+    def __str__(self):
+        return f"wall_clock[{self.kind}={self.value} at {self.time_of_day:%H:%M} {self.table.name}]"
+
+    def __repr__(self):
+        return (
+            f"<WallClockTrigger ({self.kind}={self.value!r}, "
+            f"time_of_day='{self.time_of_day:%H:%M}', zone='{self.table.name}')>"
+        )
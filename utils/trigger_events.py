@@ -0,0 +1,83 @@
+import json
+import logging
+from collections import deque
+from itertools import islice
+from threading import Condition
+
+
+class TriggerEventQueue:
+    """Bounded, thread-safe log of trigger events read through cursors.
+
+    Every event gets a sequence number. Readers keep their own cursor (the
+    last sequence number they have seen) and drain everything newer in one
+    call, so bursts are delivered as a batch and one reader never consumes
+    events meant for another.
+    """
+
+    def __init__(self, capacity=10000):
+        self._condition = Condition()
+        self._events = deque(maxlen=capacity)
+        self._last_seq = 0
+
+    @property
+    def last_seq(self):
+        return self._last_seq
+
+    def covers(self, cursor):
+        """True if every event after `cursor` is still held by the queue."""
+        with self._condition:
+            if cursor > self._last_seq:
+                return False
+            return not self._events or cursor + 1 >= self._events[0]["seq"]
+
+    def publish(self, event):
+        with self._condition:
+            self._last_seq += 1
+            event = dict(event, seq=self._last_seq)
+            self._events.append(event)
+            self._condition.notify_all()
+            return self._last_seq
+
+    def publish_many(self, events):
+        """Publish a batch of events with one wakeup; returns the last seq."""
+        with self._condition:
+            for event in events:
+                self._last_seq += 1
+                self._events.append(dict(event, seq=self._last_seq))
+            self._condition.notify_all()
+            return self._last_seq
+
+    def read(self, cursor, limit=None):
+        """Return the events after `cursor` and the cursor to use next."""
+        with self._condition:
+            return self._read(cursor, limit)
+
+    def wait(self, cursor, timeout=None, limit=None):
+        """Like `read`, but block up to `timeout` seconds for a new event."""
+        with self._condition:
+            self._condition.wait_for(lambda: self._last_seq > cursor, timeout)
+            return self._read(cursor, limit)
+
+    def stream(self, cursor, keepalive_seconds=15, limit=500):
+        """Yield server-sent events until the client disconnects."""
+        yield "retry: 3000\n\n"
+        while True:
+            events, cursor = self.wait(cursor, keepalive_seconds, limit)
+            if not events:
+                yield ": keep-alive\n\n"
+                continue
+            yield f"id: {cursor}\ndata: {json.dumps(events, default=str)}\n\n"
+
+    def _read(self, cursor, limit):
+        if cursor >= self._last_seq:
+            # A cursor ahead of the queue comes from before a server restart
+            return [], self._last_seq
+        oldest_seq = self._events[0]["seq"]
+        if cursor + 1 < oldest_seq:
+            logging.warning(
+                f"Trigger event reader fell behind, {oldest_seq - cursor - 1} events dropped"
+            )
+        start = max(cursor + 1 - oldest_seq, 0)
+        stop = None if limit is None else start + limit
+        events = list(islice(self._events, start, stop))
+        return events, events[-1]["seq"]
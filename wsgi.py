@@ -0,0 +1,23 @@
+"""WSGI entry point for serving the web tier with several workers.
+
+    NEURON_SCHEDULER_SOCKET=Data/scheduler.sock gunicorn -w 4 -k gthread --threads 32 wsgi:server
+
+Use threaded workers (-k gthread). Every open browser tab keeps a
+/reminder-events stream open, and a stream occupies whatever serves it
+for as long as the tab is connected: with the default sync workers, four
+tabs would take the whole tier and leave no worker for callbacks. With
+gthread a stream holds one thread of its worker, so the tier above
+serves up to 128 tabs, less the threads callbacks need; raise --threads
+for more. Async workers such as gevent are not used because the app
+relies on real threads for the scheduler and its event feed.
+
+With NEURON_SCHEDULER_SOCKET set, each worker follows scheduler_daemon.py
+instead of running a scheduler of its own. Without it, every worker would
+fire every reminder, so only use a single worker then.
+
+With several processes appending to Log/Neuron.log, none of them rotates
+it; see scheduler_daemon.py.
+"""
+from app import server, start_scheduler
+
+start_scheduler()